@@ -5,21 +5,65 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 import os
+import json
+import asyncio
+import argparse
+import base64
+import tempfile
+import zlib
 from pathlib import Path
+from contextlib import asynccontextmanager
+from columnar_store import ColumnarStore
+from events import EventBroadcaster
+from journal import Journal
+from seed_data import generate_catalog
+from shared_state import StateServer, RemoteStore
+from store import (InMemoryStore, SQLiteStore, StoreError, ActivityNotFound,
+                   AlreadySignedUp, ActivityFull, NotSignedUp)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same bytes
+    orjson = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Store changes are published from request threads onto this loop
+    broadcaster.bind(asyncio.get_running_loop())
+    yield
+    # Flush journals and close connections on shutdown
+    store.close()
+
+
+# Built once: json.dumps with options constructs a new encoder on every call
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_json(obj):
+    """Compact UTF-8 JSON, matching what FastAPI's JSONResponse produces"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _json_encoder.encode(obj).encode("utf-8")
+
 
 app = FastAPI(title="Mergington High School API",
-              description="API for viewing and signing up for extracurricular activities")
+              description="API for viewing and signing up for extracurricular activities",
+              lifespan=lifespan)
 
 # Mount the static files directory
 current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
           "static")), name="static")
 
-# In-memory activity database
+# Activity data: the live state of the default in-memory store, and the seed
+# for an empty SQLite database (see create_store)
 activities = {
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
@@ -82,33 +126,422 @@ activities = {
 
 
 
+# Signup validation rules: how each rejection from the store is reported, as
+# (HTTP status, error detail, per-item status in batch results)
+SIGNUP_ERRORS = {
+    ActivityNotFound: (404, "Activity not found", "unknown_activity"),
+    AlreadySignedUp: (400, "Student already signed up for this activity", "duplicate"),
+    ActivityFull: (400, "Activity is full", "full"),
+}
+
+# How each rejection of an unregistration is reported, as (HTTP status, error detail)
+UNREGISTER_ERRORS = {
+    ActivityNotFound: (404, "Activity not found"),
+    NotSignedUp: (400, "Student is not signed up for this activity"),
+}
+
+# Largest number of signups accepted in one batch request
+MAX_BATCH_SIGNUPS = 1000
+
+
+class SignupItem(BaseModel):
+    activity: str
+    email: str
+
+
+class BatchSignupRequest(BaseModel):
+    signups: List[SignupItem] = Field(max_length=MAX_BATCH_SIGNUPS)
+
+
+# Response models. Routes declaring one are serialized by FastAPI straight to
+# JSON bytes in pydantic-core, skipping the generic jsonable_encoder pass.
+
+class ParticipantPage(BaseModel):
+    activity: str
+    participants: List[str]
+    total: int
+    next_cursor: Optional[str]
+
+
+class SignupResult(BaseModel):
+    message: str
+
+
+class UnregisterResult(BaseModel):
+    message: str
+
+
+class BatchItemResult(BaseModel):
+    activity: str
+    email: str
+    status: str
+
+
+class BatchSignupResult(BaseModel):
+    signed_up: int
+    results: List[BatchItemResult]
+
+
+class StudentActivities(BaseModel):
+    email: str
+    activities: List[str]
+
+
+def seed_generated_catalog():
+    """
+    Replace the built-in activities with a generated catalog if requested
+
+    ACTIVITY_SEED_ACTIVITIES sets the number of activities; the other
+    ACTIVITY_SEED_* variables tune the generator (see seed_data.py). The
+    module-level dict is updated in place, so it stays the live state of the
+    in-memory store and the seed of an empty SQLite database.
+    """
+    num_activities = os.environ.get("ACTIVITY_SEED_ACTIVITIES")
+    if not num_activities:
+        return
+    num_activities = int(num_activities)
+    catalog = generate_catalog(
+        num_activities,
+        int(os.environ.get("ACTIVITY_SEED_PARTICIPANTS", num_activities * 10)),
+        skew=float(os.environ.get("ACTIVITY_SEED_SKEW", "1.0")),
+        headroom=float(os.environ.get("ACTIVITY_SEED_HEADROOM", "0.2")),
+        seed=int(os.environ.get("ACTIVITY_SEED_RANDOM", "0"))
+    )
+    activities.clear()
+    activities.update(catalog)
+
+
+def create_store():
+    """Build the storage backend selected by the ACTIVITY_STORE env variable"""
+    backend = os.environ.get("ACTIVITY_STORE", "memory")
+    if backend == "remote":
+        # Worker of a multi-worker deployment, replicating the state server's catalog
+        return RemoteStore(os.environ["ACTIVITY_STATE_SOCKET"])
+    seed_generated_catalog()
+    if backend == "memory":
+        # Optional write-ahead journal making the in-memory store durable
+        journal = None
+        journal_dir = os.environ.get("ACTIVITY_JOURNAL_DIR")
+        if journal_dir:
+            journal = Journal(
+                journal_dir,
+                fsync=os.environ.get("ACTIVITY_JOURNAL_FSYNC", "interval"),
+                fsync_interval_ms=float(os.environ.get("ACTIVITY_JOURNAL_FSYNC_MS", "10")),
+                snapshot_every=int(os.environ.get("ACTIVITY_JOURNAL_SNAPSHOT_EVERY", "10000"))
+            )
+        return InMemoryStore(activities, journal=journal)
+    if backend == "sqlite":
+        return SQLiteStore(os.environ.get("ACTIVITY_DB_PATH", "activities.db"), seed=activities)
+    if backend == "columnar":
+        columnar = ColumnarStore(activities)
+        # The columns are now the only copy; keeping the dicts would undo the saving
+        activities.clear()
+        return columnar
+    raise ValueError(f"Unknown ACTIVITY_STORE backend: {backend}")
+
+
+store = create_store()
+
+# Live change feed for /events. Workers sharing a state server see
+# the same changes but number them independently, so their event ids must not
+# be mistaken for each other's
+broadcaster = EventBroadcaster(f"{store.epoch}.{os.getpid()}" if isinstance(store, RemoteStore) else store.epoch)
+store.add_listener(broadcaster.publish)
+
+# Fields a client can select with ?fields=; the activity name is always the key
+ACTIVITY_FIELDS = ("description", "schedule", "max_participants", "participants",
+                   "participant_count", "spots_left")
+DEFAULT_PROJECTION = ("description", "schedule", "max_participants", "participants")
+
+# Largest page size accepted by ?limit=
+MAX_PAGE_SIZE = 1000
+
+# projection -> (version, encoded "name":{...} fragments, full encoded catalog).
+# The store's version is bumped on every mutation, so each projection is only
+# re-encoded when something changed, and pages are joins of cached fragments.
+_catalog_cache = {}
+
+
+def project_activity(details, projection):
+    """Build the public representation of one activity for a projection"""
+    if projection == DEFAULT_PROJECTION and tuple(details) == DEFAULT_PROJECTION:
+        # Stored activities already have the default shape, keys in order, so
+        # encode them as they are instead of copying every one
+        return details
+    projected = {}
+    for field in projection:
+        if field == "participant_count":
+            projected[field] = len(details["participants"])
+        elif field == "spots_left":
+            projected[field] = details["max_participants"] - len(details["participants"])
+        else:
+            projected[field] = details[field]
+    return projected
+
+
+def parse_projection(fields, include_participants):
+    """Turn the ?fields= and ?include_participants= parameters into a projection"""
+    if fields is None:
+        projection = list(DEFAULT_PROJECTION)
+    else:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        requested.discard("name")
+        unknown = requested - set(ACTIVITY_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        projection = [field for field in ACTIVITY_FIELDS if field in requested]
+    if not include_participants and "participants" in projection:
+        # Counts instead of full lists
+        projection[projection.index("participants")] = "participant_count"
+    return tuple(dict.fromkeys(projection))
+
+
+def get_encoded_catalog(projection=DEFAULT_PROJECTION):
+    """Return (version, fragments, body) for a projection, re-encoding only after a mutation"""
+    cached = _catalog_cache.get(projection)
+    current = store.version
+    if cached is None or cached[0] != current:
+        # Read the version before encoding: a mutation racing with us bumps it
+        # again afterwards, so the next request re-encodes instead of serving
+        # a stale body under a newer version
+        if "participants" in projection:
+            fragments = [
+                encode_json(name) + b":" + encode_json(project_activity(details, projection))
+                for name, details in list(store.get_catalog().items())
+            ]
+        else:
+            # Count-only projections are built from summaries, without participant lists
+            fragments = [
+                encode_json(name) + b":" + encode_json({field: summary[field] for field in projection})
+                for name, summary in store.get_catalog_summary().items()
+            ]
+        cached = (current, fragments, b"{" + b",".join(fragments) + b"}")
+        _catalog_cache[projection] = cached
+    return cached
+
+
+def get_catalog_snapshot():
+    """Return (version, JSON-encoded catalog) in the default representation"""
+    version, _, body = get_encoded_catalog()
+    return version, body
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the offset stored in an opaque page cursor"""
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        if kind != "o" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def catalog_etag(version, representation=None):
+    """Strong validator for a given catalog version and representation"""
+    # The epoch distinguishes versions across restarts and databases
+    etag = f"{store.epoch}-v{version}"
+    if representation:
+        # Pages and projections are different representations of one version
+        etag += f"-{zlib.crc32(representation.encode()):08x}"
+    return f'"{etag}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header value against our ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function, so ignore W/ prefixes
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/static/index.html")
 
 
 @app.get("/activities")
-def get_activities():
-    return activities
+def get_activities(cursor: Optional[str] = None,
+                   limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+                   fields: Optional[str] = None,
+                   include_participants: bool = True,
+                   if_none_match: Optional[str] = Header(default=None)):
+    projection = parse_projection(fields, include_participants)
+    version, fragments, body = get_encoded_catalog(projection)
+    headers = {"Cache-Control": "no-cache"}
 
+    representation = None
+    if cursor is not None or limit is not None:
+        # Serve one page, joined from the cached per-activity fragments
+        offset = decode_cursor(cursor) if cursor else 0
+        end = len(fragments) if limit is None else offset + limit
+        body = b"{" + b",".join(fragments[offset:end]) + b"}"
+        if end < len(fragments):
+            headers["X-Next-Cursor"] = encode_cursor(end)
+        representation = f"{projection};{offset};{limit}"
+    elif projection != DEFAULT_PROJECTION:
+        representation = f"{projection}"
 
-@app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
-    """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
+    etag = catalog_etag(version, representation)
+    headers["ETag"] = etag
+    # Clients that already hold this version get an empty 304
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # Serve the cached encoding directly, skipping jsonable_encoder
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Outside /activities, so it cannot shadow an activity's own route
+@app.get("/events")
+async def activity_events(last_event_id: Optional[str] = Header(default=None)):
+    """Stream catalog changes as Server-Sent Events"""
+    return StreamingResponse(
+        broadcaster.stream(last_event_id),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events are delivered immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/activities/{activity_name}")
+def get_activity(activity_name: str,
+                 fields: Optional[str] = None,
+                 include_participants: bool = True,
+                 if_none_match: Optional[str] = Header(default=None)):
+    """Get a single activity, in the same representation as in the catalog"""
+    projection = parse_projection(fields, include_participants)
+    # Read the version first so the ETag is never newer than the body
+    etag = catalog_etag(store.version, f"{activity_name};{projection}")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        details = store.get_activity(activity_name)
+    except ActivityNotFound:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return Response(content=encode_json(project_activity(details, projection)),
+                    media_type="application/json", headers=headers)
+
+
+@app.get("/activities/{activity_name}/participants", response_model=ParticipantPage)
+def get_activity_participants(activity_name: str,
+                              cursor: Optional[str] = None,
+                              limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE)):
+    """Get one page of an activity's participants, in signup order"""
+    offset = decode_cursor(cursor) if cursor else 0
+    try:
+        participants, total = store.get_participants(activity_name, offset, limit)
+    except ActivityNotFound:
         raise HTTPException(status_code=404, detail="Activity not found")
+    if offset and offset >= total:
+        # Removals shrank the list since the cursor was issued; start over from the first page
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    end = offset + len(participants)
+    return {
+        "activity": activity_name,
+        "participants": participants,
+        "total": total,
+        "next_cursor": encode_cursor(end) if end < total else None
+    }
+
 
-    # Get the specificy activity
-    activity = activities[activity_name]
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
-    # Add student
-    activity["participants"].append(email)
+@app.post("/activities/{activity_name}/signup", response_model=SignupResult)
+def signup_for_activity(activity_name: str, email: str):
+    """Sign up a student for an activity"""
+    try:
+        store.add_participant(activity_name, email)
+    except StoreError as e:
+        status_code, detail, _ = SIGNUP_ERRORS[type(e)]
+        raise HTTPException(status_code=status_code, detail=detail)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
+@app.delete("/activities/{activity_name}/signup", response_model=UnregisterResult)
+def unregister_from_activity(activity_name: str, email: str):
+    """Remove a student from an activity, freeing their spot"""
+    try:
+        store.remove_participant(activity_name, email)
+    except StoreError as e:
+        status_code, detail = UNREGISTER_ERRORS[type(e)]
+        raise HTTPException(status_code=status_code, detail=detail)
+    return {"message": f"Unregistered {email} from {activity_name}"}
+
+
+@app.post("/activities/signup:batch", response_model=BatchSignupResult)
+def batch_signup(request: BatchSignupRequest):
+    """Sign up many students at once, reporting a status for each item"""
+    # Group items by activity so each activity is locked only once
+    by_activity = {}
+    for position, item in enumerate(request.signups):
+        by_activity.setdefault(item.activity, []).append(position)
+
+    statuses = [None] * len(request.signups)
+    for activity_name, positions in by_activity.items():
+        emails = [request.signups[position].email for position in positions]
+        outcomes = store.add_participants(activity_name, emails)
+        for position, error in zip(positions, outcomes):
+            statuses[position] = "ok" if error is None else SIGNUP_ERRORS[type(error)][2]
+
+    return {
+        "signed_up": statuses.count("ok"),
+        "results": [
+            {"activity": item.activity, "email": item.email, "status": status}
+            for item, status in zip(request.signups, statuses)
+        ]
+    }
+
+
+@app.get("/students/{email}/activities", response_model=StudentActivities)
+def get_student_activities(email: str):
+    """List the activities a student is signed up for, in signup order"""
+    # Students are identified only by their signups, so an unknown email has none
+    return {"email": email, "activities": store.get_student_activities(email)}
+
+
+def run_workers(workers, host, port):
+    """
+    Serve with several worker processes sharing this process's store
+
+    The in-memory store stays in this (supervisor) process behind a
+    StateServer and every worker replicates it through a RemoteStore. SQLite
+    databases are already shared, so their workers open the file directly.
+    """
+    import uvicorn
+    if isinstance(store, SQLiteStore):
+        uvicorn.run("app:app", host=host, port=port, workers=workers)
+        return
+    # A private (0700) directory, so other local users cannot reach the socket
+    socket_dir = tempfile.mkdtemp(prefix="mergington-state-")
+    socket_path = os.path.join(socket_dir, "state.sock")
+    server = StateServer(store, socket_path)
+    server.start()
+    # Inherited by the worker processes, which import this module as "app"
+    os.environ["ACTIVITY_STORE"] = "remote"
+    os.environ["ACTIVITY_STATE_SOCKET"] = socket_path
+    try:
+        uvicorn.run("app:app", host=host, port=port, workers=workers)
+    finally:
+        server.close()
+        store.close()
+        os.rmdir(socket_dir)
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Mergington High School API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes; above 1 they share one catalog (see shared_state.py)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        run_workers(args.workers, args.host, args.port)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
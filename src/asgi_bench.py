@@ -0,0 +1,371 @@
+"""
+In-process micro-benchmarks of the API, driven through the ASGI interface
+
+The FastAPI `app` object is called directly with pre-built ASGI scopes, so no
+server, socket or HTTP parser is involved and handler-level changes show up
+without TCP and uvicorn noise. Routes still go through the full Starlette and
+FastAPI stack: routing, parameter validation, the thread pool that runs sync
+endpoints, and response encoding.
+
+For every benchmark the harness reports:
+
+- ns/op: wall time per request, the median over several rounds
+- ops/s: requests per second at the chosen concurrency
+- peak B/op and retained B/op: traced memory a request allocates on top of
+  what was live before it, at its peak and after it finished. tracemalloc
+  cannot count individual allocations, so peak bytes stand in for
+  "allocations per request". This runs in a separate pass because tracing
+  slows everything down.
+
+The app is pointed at a fresh store holding a copy of the seed catalog plus a
+large "Benchmark Club", so signups never hit capacity and the default store
+is left untouched. With --catalog-sizes the suite runs once per size against
+a generated catalog (see seed_data.py) and prints how ns/op scales with the
+number of activities.
+
+Usage:
+    python asgi_bench.py [--store memory|sqlite|columnar] [--filter signup] [--json results.json]
+    python asgi_bench.py --catalog-sizes 10,1000,10000 [--participants-per-activity 10] [--skew 1.0]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import math
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import quote
+
+import app as app_module
+import bench_history
+from columnar_store import ColumnarStore
+from seed_data import generate_catalog
+from store import InMemoryStore, SQLiteStore
+
+BENCHMARK_ACTIVITY = "Benchmark Club"
+
+# Signups per batch request in the batch benchmark
+BATCH_SIZE = 10
+
+
+def bench_catalog(num_activities=None, participants_per_activity=10, skew=1.0):
+    """The app's own catalog, or a generated one of num_activities activities"""
+    if num_activities is None:
+        catalog = copy.deepcopy(app_module.activities)
+    else:
+        catalog = generate_catalog(num_activities, num_activities * participants_per_activity, skew)
+    catalog[BENCHMARK_ACTIVITY] = {
+        "description": "Only used by the ASGI benchmarks",
+        "schedule": "Never",
+        "max_participants": 10 ** 9,
+        "participants": [f"member{i}@mergington.edu" for i in range(50)]
+    }
+    return catalog
+
+
+def http_scope(method, path, query="", headers=()):
+    """
+    ASGI HTTP scope for one request; Starlette adds keys to it, so build one per request
+    
+    path is the decoded path, as a server would pass it on.
+    """
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": quote(path).encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def call_app(scope, body=b""):
+    """Send one request through the ASGI app; return (status, headers, body)"""
+    request = {"type": "http.request", "body": body, "more_body": False}
+    response = {"status": None, "headers": [], "body": []}
+
+    async def receive():
+        return request
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await app_module.app(scope, receive, send)
+    return response["status"], dict(response["headers"]), b"".join(response["body"])
+
+
+class Benchmark:
+    """One request shape: make_request(i) returns (scope, body) for iteration i"""
+
+    def __init__(self, name, expected_status, make_request):
+        self.name = name
+        self.expected_status = expected_status
+        self.make_request = make_request
+
+    async def run_once(self, i):
+        scope, body = self.make_request(i)
+        status, _, _ = await call_app(scope, body)
+        if status != self.expected_status:
+            raise RuntimeError(f"{self.name}: expected status {self.expected_status}, got {status}")
+
+
+async def build_benchmarks(run_id, activity):
+    """Benchmarks for every JSON route; reads come first so writes do not invalidate their caches"""
+
+    # Current ETag of the catalog, for the conditional request
+    _, headers, _ = await call_app(http_scope("GET", "/activities"))
+    etag = headers[b"etag"]
+
+    def fixed(method, path, query="", headers=()):
+        return lambda i: (http_scope(method, path, query, headers), b"")
+
+    def uncached(i):
+        # Drop the encoded catalog, as a signup would, so every request re-encodes it
+        app_module._catalog_cache.clear()
+        return http_scope("GET", "/activities"), b""
+
+    def signup(i):
+        return http_scope("POST", f"/activities/{BENCHMARK_ACTIVITY}/signup",
+                          f"email=bench{i}_{run_id}%40mergington.edu"), b""
+
+    def batch(i):
+        body = json.dumps({"signups": [
+            {"activity": BENCHMARK_ACTIVITY, "email": f"batch{i}_{j}_{run_id}@mergington.edu"}
+            for j in range(BATCH_SIZE)
+        ]}).encode()
+        return http_scope("POST", "/activities/signup:batch", headers=[(b"content-type", b"application/json")]), body
+
+    return [
+        Benchmark("GET /activities", 200, fixed("GET", "/activities")),
+        Benchmark("GET /activities (uncached)", 200, uncached),
+        Benchmark("GET /activities (If-None-Match, 304)", 304,
+                  fixed("GET", "/activities", headers=[(b"if-none-match", etag)])),
+        Benchmark("GET /activities?limit=3", 200, fixed("GET", "/activities", "limit=3")),
+        Benchmark("GET /activities?fields=spots_left", 200, fixed("GET", "/activities", "fields=spots_left")),
+        Benchmark("GET /activities/{activity_name}", 200, fixed("GET", f"/activities/{activity}")),
+        Benchmark("GET /activities/{activity_name}/participants", 200,
+                  fixed("GET", f"/activities/{BENCHMARK_ACTIVITY}/participants")),
+        Benchmark("GET /students/{email}/activities", 200,
+                  fixed("GET", "/students/member0%40mergington.edu/activities")),
+        Benchmark("POST /activities/{activity_name}/signup", 200, signup),
+        Benchmark("POST /activities/{activity_name}/signup (duplicate, 400)", 400,
+                  fixed("POST", f"/activities/{BENCHMARK_ACTIVITY}/signup", "email=member0%40mergington.edu")),
+        Benchmark(f"POST /activities/signup:batch ({BATCH_SIZE} items)", 200, batch),
+    ]
+
+
+async def time_benchmark(benchmark, iterations, rounds, warmup, concurrency, counter, max_round_time=None):
+    """
+    Return the ns/op of every round
+
+    With max_round_time, slow benchmarks (such as re-encoding a large
+    catalog) run fewer iterations so that one round takes about that long.
+    """
+    async def run(count):
+        async def worker(share):
+            for _ in range(share):
+                await benchmark.run_once(next(counter))
+        shares = [count // concurrency + (1 if k < count % concurrency else 0) for k in range(concurrency)]
+        await asyncio.gather(*(worker(share) for share in shares))
+
+    if max_round_time:
+        # The first request doubles as a calibration of the cost per request
+        start = time.perf_counter()
+        await run(1)
+        cost = time.perf_counter() - start
+        iterations = max(min(iterations, int(max_round_time / cost)), concurrency)
+        warmup = min(warmup, iterations)
+    await run(warmup)
+    results = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        await run(iterations)
+        results.append((time.perf_counter_ns() - start) / iterations)
+    return results
+
+
+async def measure_memory(benchmark, iterations, counter):
+    """Return (mean peak bytes, mean retained bytes) per request under tracemalloc"""
+    tracemalloc.start()
+    try:
+        peaks = []
+        baseline_start, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await benchmark.run_once(next(counter))
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        baseline_end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks), (baseline_end - baseline_start) / iterations
+
+
+def create_bench_store(backend, directory, catalog):
+    if backend == "sqlite":
+        return SQLiteStore(Path(directory) / "bench.db", seed=catalog)
+    if backend == "columnar":
+        return ColumnarStore(catalog)
+    return InMemoryStore(catalog)
+
+
+async def run_benchmarks(args, num_activities=None):
+    catalog = bench_catalog(num_activities, args.participants_per_activity, args.skew)
+    # The single-activity benchmark reads the first activity of the catalog
+    activity = next(iter(catalog))
+    with tempfile.TemporaryDirectory() as directory:
+        store = create_bench_store(args.store, directory, catalog)
+        # Swap the store in the way the tests do, and forget catalog encodings
+        # cached for the old one; change events are broadcast as in production
+        app_module.store = store
+        app_module._catalog_cache.clear()
+        app_module.broadcaster.bind(asyncio.get_running_loop())
+        store.add_listener(app_module.broadcaster.publish)
+        try:
+            benchmarks = await build_benchmarks(int(time.time()), activity)
+            counter = iter(range(sys.maxsize))
+            results = []
+            for benchmark in benchmarks:
+                if args.filter and args.filter.lower() not in benchmark.name.lower():
+                    continue
+                rounds = await time_benchmark(benchmark, args.iterations, args.rounds, args.warmup,
+                                              args.concurrency, counter, args.max_round_time)
+                ns_per_op = statistics.median(rounds)
+                result = {
+                    "name": benchmark.name,
+                    "activities": len(catalog),
+                    "ns_per_op": round(ns_per_op),
+                    "ns_per_op_rounds": [round(ns) for ns in rounds],
+                    "ops_per_second": round(1e9 / ns_per_op, 1),
+                }
+                if not args.no_memory:
+                    memory_iterations = args.memory_iterations
+                    if args.max_round_time:
+                        memory_iterations = max(1, min(memory_iterations, int(args.max_round_time * 1e9 / ns_per_op)))
+                    peak, retained = await measure_memory(benchmark, memory_iterations, counter)
+                    result["peak_bytes_per_op"] = round(peak)
+                    result["retained_bytes_per_op"] = round(retained)
+                results.append(result)
+                print_result(result)
+        finally:
+            store.close()
+    return results
+
+
+def print_result(result):
+    memory = ""
+    if "peak_bytes_per_op" in result:
+        memory = f" {result['peak_bytes_per_op']:>12,} {result['retained_bytes_per_op']:>14,}"
+    print(f"{result['name']:<58} {result['ns_per_op']:>12,} {result['ops_per_second']:>12,.0f}{memory}")
+
+
+def print_scaling(results):
+    """ns/op of every benchmark per catalog size, and the log-log slope between the extremes"""
+    sizes = sorted({result["activities"] for result in results})
+    print(f"\nScaling with catalog size (ns/op)")
+    header = f"{'benchmark':<58}" + "".join(f" {size:>12,}" for size in sizes) + f" {'exponent':>9}"
+    print(header)
+    for name in dict.fromkeys(result["name"] for result in results):
+        by_size = {result["activities"]: result["ns_per_op"] for result in results if result["name"] == name}
+        columns = [by_size[size] for size in sizes]
+        # 0 means constant time per request, 1 linear in the number of activities
+        exponent = math.log(columns[-1] / columns[0]) / math.log(sizes[-1] / sizes[0])
+        print(f"{name:<58}" + "".join(f" {ns:>12,}" for ns in columns) + f" {exponent:>9.2f}")
+
+
+def record_history(args, results):
+    """Append the run to the benchmark history; the rounds are the ns/op samples"""
+    metric = bench_history.metric
+    metrics = {}
+    for result in results:
+        metrics[f"{result['name']} ns/op"] = metric(result["ns_per_op"], "lower", result["ns_per_op_rounds"])
+        if "peak_bytes_per_op" in result:
+            metrics[f"{result['name']} peak B/op"] = metric(result["peak_bytes_per_op"], "lower")
+    name = f"{args.store} store, concurrency {args.concurrency}"
+    if args.catalog_sizes:
+        name += f", {results[0]['activities']} activities"
+    if args.filter:
+        name += f", filter {args.filter!r}"
+    bench_history.append_run("asgi_bench", name, metrics)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="In-process ASGI benchmarks of the activities API")
+    parser.add_argument("--store", choices=["memory", "sqlite", "columnar"], default="memory",
+                        help="Storage backend to benchmark against")
+    parser.add_argument("--iterations", type=int, default=2000, help="Requests per timed round")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark; the median is reported")
+    parser.add_argument("--warmup", type=int, default=200, help="Untimed requests before the first round")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Requests in flight at once; above 1 ns/op is wall time divided by requests")
+    parser.add_argument("--max-round-time", type=float, default=2.0,
+                        help="Run fewer iterations of benchmarks whose rounds would take longer than this (seconds)")
+    parser.add_argument("--memory-iterations", type=int, default=200,
+                        help="Requests traced by tracemalloc per benchmark")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--catalog-sizes",
+                        help="Comma-separated numbers of activities to run the suite against, e.g. 10,1000,10000")
+    parser.add_argument("--participants-per-activity", type=int, default=10,
+                        help="Average participants per activity in generated catalogs")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf exponent of participant counts over activities in generated catalogs")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the benchmark history used for regression checks")
+    args = parser.parse_args()
+
+    sizes = sorted({int(size) for size in args.catalog_sizes.split(",")}) if args.catalog_sizes else [None]
+    print(f"ASGI benchmarks: store={args.store}, concurrency={args.concurrency}, "
+          f"{args.rounds} x {args.iterations} requests")
+    header = f"{'benchmark':<58} {'ns/op':>12} {'ops/s':>12}"
+    if not args.no_memory:
+        header += f" {'peak B/op':>12} {'retained B/op':>14}"
+
+    results = []
+    for size in sizes:
+        if size is not None:
+            print(f"\nCatalog: {size:,} activities, {size * args.participants_per_activity:,} participants "
+                  f"(skew {args.skew})")
+        print(header)
+        size_results = await run_benchmarks(args, size)
+        if not args.no_history:
+            record_history(args, size_results)
+        results.extend(size_results)
+    if len(sizes) > 1:
+        print_scaling(results)
+    if not args.no_history:
+        print(f"\nRuns recorded in the benchmark history: {bench_history.HISTORY_PATH}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": sys.version.split()[0],
+                "store": args.store,
+                "concurrency": args.concurrency,
+                "iterations": args.iterations,
+                "rounds": args.rounds,
+                "catalog_sizes": sizes if args.catalog_sizes else None,
+                "benchmarks": results
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,365 @@
+"""
+Benchmark history and regression checks
+
+Every benchmark run (load_test.py, asgi_bench.py, performance_tests.py)
+appends one JSON line to an append-only history file instead of only
+overwriting the latest report:
+
+    {"timestamp", "commit", "dirty", "machine": {"fingerprint", ...},
+     "suite", "name", "metrics": {metric: {"value", "better", "samples"}}}
+
+`better` is "higher" or "lower"; `samples` are the repeated measurements
+behind `value` (per-interval throughput, per-round ns/op, ...) and are what
+the statistical comparison works on.
+
+The compare command checks the latest run of a benchmark against a baseline
+recorded on the same machine (same fingerprint) at another commit:
+
+    python bench_history.py compare --suite load_test [--baseline <commit>]
+
+For each metric it reports the change of the median, a bootstrap 95%
+confidence interval of that change and a two-sided Mann-Whitney U test. A
+metric regresses when it got worse by more than --threshold and the
+difference is significant: the p-value is below --alpha and the confidence
+interval lies entirely on the worse side of 0. The command then exits with
+status 1, so it can gate CI; noise moves the median but rarely passes both
+tests.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Append-only history, next to the other reports unless BENCHMARK_HISTORY says otherwise
+HISTORY_PATH = Path(os.environ.get(
+    "BENCHMARK_HISTORY",
+    Path(__file__).resolve().parent.parent / "reports" / "benchmark_history.jsonl"
+))
+
+# Relative change of the median treated as a regression by default
+DEFAULT_THRESHOLD = 0.05
+
+# Significance level of the Mann-Whitney test
+DEFAULT_ALPHA = 0.05
+
+# Fewer samples than this per side are compared on the medians alone
+MIN_SAMPLES = 3
+
+BOOTSTRAP_RESAMPLES = 2000
+
+
+def git_commit():
+    """Return (commit hash, whether the working tree has uncommitted changes)"""
+    root = Path(__file__).resolve().parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def machine_info():
+    """Describe the machine, with a fingerprint of everything that affects results"""
+    info = {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+    }
+    # The hostname is informational only, so renamed or ephemeral CI hosts
+    # of the same shape share a fingerprint
+    fingerprint = hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+    return {"fingerprint": fingerprint, "hostname": platform.node(), **info}
+
+
+def metric(value, better, samples=None):
+    """Build a metric entry; better is "higher" or "lower" """
+    if better not in ("higher", "lower"):
+        raise ValueError(f"better must be 'higher' or 'lower', not {better!r}")
+    entry = {"value": value, "better": better}
+    if samples:
+        entry["samples"] = list(samples)
+    return entry
+
+
+def append_run(suite, name, metrics, path=None):
+    """Append one benchmark run to the history and return the record"""
+    path = Path(path or HISTORY_PATH)
+    commit, dirty = git_commit()
+    record = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "dirty": dirty,
+        "machine": machine_info(),
+        "suite": suite,
+        "name": name,
+        "metrics": metrics,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One write per record in append mode, so concurrent writers do not interleave lines
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return record
+
+
+def load_runs(path=None):
+    """Read every run in the history, oldest first, skipping unreadable lines"""
+    path = Path(path or HISTORY_PATH)
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+
+def mann_whitney_u(a, b):
+    """
+    Two-sided Mann-Whitney U test of samples a and b
+
+    Uses the normal approximation with tie and continuity corrections.
+    Returns (U statistic of a, p-value).
+    """
+    n1, n2 = len(a), len(b)
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    n = n1 + n2
+    ranks = [0.0] * n
+    tie_term = 0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # Tied values share the average of their ranks
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    difference = u - mean
+    z = (abs(difference) - 0.5) / variance ** 0.5 if difference else 0.0
+    return u, min(1.0, 2 * (1 - statistics.NormalDist().cdf(max(z, 0.0))))
+
+
+def bootstrap_change(baseline, candidate, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """95% bootstrap confidence interval of the relative change of the median"""
+    rng = random.Random(seed)
+    changes = []
+    for _ in range(resamples):
+        base = statistics.median(rng.choices(baseline, k=len(baseline)))
+        cand = statistics.median(rng.choices(candidate, k=len(candidate)))
+        if base:
+            changes.append((cand - base) / abs(base))
+    if not changes:
+        return None
+    changes.sort()
+    return changes[int(0.025 * len(changes))], changes[int(0.975 * len(changes)) - 1]
+
+
+def _samples(runs, name):
+    """Pool a metric's samples over runs; runs without samples contribute their value"""
+    values = []
+    for run in runs:
+        entry = run["metrics"].get(name)
+        if entry is not None:
+            values.extend(entry.get("samples") or [entry["value"]])
+    return values
+
+
+def compare_metric(name, better, baseline, candidate, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+    """Compare the samples of one metric and return a result row with a verdict"""
+    base_median = statistics.median(baseline)
+    cand_median = statistics.median(candidate)
+    change = (cand_median - base_median) / abs(base_median) if base_median else 0.0
+    # Positive "worse" means the metric moved in the bad direction
+    worse = -change if better == "higher" else change
+
+    p_value = interval = None
+    if len(baseline) >= MIN_SAMPLES and len(candidate) >= MIN_SAMPLES:
+        _, p_value = mann_whitney_u(baseline, candidate)
+        interval = bootstrap_change(baseline, candidate)
+    if p_value is None:
+        significant = True
+    else:
+        # The whole interval must agree with the direction of the change
+        significant = (p_value < alpha and interval is not None
+                       and (interval[0] > 0 if change > 0 else interval[1] < 0))
+
+    if worse > threshold and significant:
+        verdict = "REGRESSED"
+    elif -worse > threshold and significant:
+        verdict = "improved"
+    elif abs(change) > threshold:
+        verdict = "inconclusive"
+    else:
+        verdict = "ok"
+    return {
+        "metric": name,
+        "better": better,
+        "baseline": base_median,
+        "candidate": cand_median,
+        "change": change,
+        "p_value": p_value,
+        "interval": interval,
+        "verdict": verdict,
+        "baseline_samples": len(baseline),
+        "candidate_samples": len(candidate),
+    }
+
+
+def select_runs(runs, suite, name=None, fingerprint=None, baseline_commit=None):
+    """
+    Pick (candidate runs, baseline runs) from the history
+
+    The candidate is the latest run of the suite (and name) on this machine,
+    together with any other runs of the same benchmark at the same commit.
+    The baseline is every run at baseline_commit, or by default at the most
+    recent other commit.
+    """
+    fingerprint = fingerprint or machine_info()["fingerprint"]
+    matching = [run for run in runs
+                if run["suite"] == suite and run["machine"]["fingerprint"] == fingerprint
+                and (name is None or run["name"] == name)]
+    if not matching:
+        return [], []
+    latest = matching[-1]
+    same_benchmark = [run for run in matching if run["name"] == latest["name"]]
+    candidate = [run for run in same_benchmark if run["commit"] == latest["commit"]
+                 and run["dirty"] == latest["dirty"]]
+    if baseline_commit is None:
+        earlier = [run for run in same_benchmark if run not in candidate]
+        if not earlier:
+            return candidate, []
+        baseline_commit = earlier[-1]["commit"]
+        baseline_dirty = earlier[-1]["dirty"]
+        baseline = [run for run in earlier if run["commit"] == baseline_commit and run["dirty"] == baseline_dirty]
+    else:
+        baseline = [run for run in same_benchmark if run["commit"].startswith(baseline_commit)
+                    and run not in candidate]
+    return candidate, baseline
+
+
+def compare_runs(candidate, baseline, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+    """Compare every metric the candidate and baseline runs have in common"""
+    rows = []
+    for name, entry in candidate[-1]["metrics"].items():
+        baseline_values = _samples(baseline, name)
+        if not baseline_values:
+            continue
+        rows.append(compare_metric(name, entry["better"], baseline_values, _samples(candidate, name),
+                                   threshold, alpha))
+    return rows
+
+
+def _describe(runs):
+    run = runs[-1]
+    commit = run["commit"][:10] + ("+dirty" if run["dirty"] else "")
+    return f"{commit} ({len(runs)} run{'s' if len(runs) != 1 else ''}, latest {run['timestamp']})"
+
+
+def print_comparison(rows):
+    print(f"{'metric':<52} {'baseline':>12} {'candidate':>12} {'change':>9} {'95% CI':>19} {'p':>7}  verdict")
+    for row in rows:
+        interval = (f"[{row['interval'][0] * 100:+.1f}%, {row['interval'][1] * 100:+.1f}%]"
+                    if row["interval"] else "-")
+        p_value = f"{row['p_value']:.3f}" if row["p_value"] is not None else "-"
+        print(f"{row['metric']:<52} {row['baseline']:>12.6g} {row['candidate']:>12.6g} "
+              f"{row['change'] * 100:>+8.1f}% {interval:>19} {p_value:>7}  {row['verdict']}")
+
+
+def command_compare(args):
+    runs = load_runs(args.history)
+    candidate, baseline = select_runs(runs, args.suite, args.name, baseline_commit=args.baseline)
+    if not candidate:
+        print(f"No {args.suite} runs recorded on this machine in {args.history or HISTORY_PATH}")
+        return 1
+    print(f"Benchmark: {args.suite} / {candidate[-1]['name']}")
+    print(f"Candidate: {_describe(candidate)}")
+    if not baseline:
+        print("No baseline to compare against yet; record a run at another commit first")
+        return 0
+    print(f"Baseline:  {_describe(baseline)}")
+    print(f"Regression threshold: {args.threshold * 100:.1f}%, significance level: {args.alpha}\n")
+
+    rows = compare_runs(candidate, baseline, args.threshold, args.alpha)
+    print_comparison(rows)
+    regressions = [row for row in rows if row["verdict"] == "REGRESSED"]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed:")
+        for row in regressions:
+            print(f"  {row['metric']}: {row['baseline']:.6g} -> {row['candidate']:.6g} "
+                  f"({row['change'] * 100:+.1f}%, {row['better']} is better)")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def command_list(args):
+    runs = load_runs(args.history)
+    if args.suite:
+        runs = [run for run in runs if run["suite"] == args.suite]
+    for run in runs[-args.limit:]:
+        commit = run["commit"][:10] + ("+dirty" if run["dirty"] else "")
+        print(f"{run['timestamp']}  {commit:<16} {run['machine']['fingerprint']}  "
+              f"{run['suite']:<18} {run['name']:<30} {len(run['metrics'])} metrics")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark history and regression checks")
+    parser.add_argument("--history", help=f"History file (default: {HISTORY_PATH})")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    compare = subcommands.add_parser("compare", help="Compare the latest run with a baseline")
+    compare.add_argument("--suite", required=True, help="Benchmark suite, e.g. load_test or asgi_bench")
+    compare.add_argument("--name", help="Benchmark name within the suite (default: that of the latest run)")
+    compare.add_argument("--baseline", help="Commit (or prefix) to compare against (default: the previous one)")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="Relative change of the median that counts as a regression")
+    compare.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="Significance level")
+    compare.set_defaults(handler=command_compare)
+
+    listing = subcommands.add_parser("list", help="Show recorded runs")
+    listing.add_argument("--suite", help="Only show runs of this suite")
+    listing.add_argument("--limit", type=int, default=20, help="Number of most recent runs to show")
+    listing.set_defaults(handler=command_list)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
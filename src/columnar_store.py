@@ -0,0 +1,221 @@
+"""
+Compact column-oriented storage for large catalogs
+
+InMemoryStore keeps every activity as a dict with its own description and
+schedule strings and a list of email strings, so a catalog with millions
+of signups spends most of its memory on per-object overhead. ColumnarStore
+holds the same catalog in a few flat columns:
+
+- descriptions and schedules are interned: each distinct text is stored
+  once and activities refer to it by index
+- every distinct email gets an integer student ID, and an activity's
+  participants are an array of 4-byte IDs in signup order
+- each student has an array of their activity IDs, used for duplicate
+  checks and to list the student's activities in O(k) of their signups
+- max_participants and participant counts are 8-byte integer columns, so
+  participant counts and spots left for the whole catalog are computed in
+  one vectorized operation (NumPy when installed, plain arrays otherwise)
+
+Activity dicts in the public API shape are built on demand, so the app
+serves the same responses as with the other backends. The store is not
+journaled; use InMemoryStore or SQLiteStore for durability.
+
+Select it with ACTIVITY_STORE=columnar (see app.create_store);
+memory_bench.py reports the memory saved.
+"""
+import threading
+import uuid
+from array import array
+
+from store import (ActivityStore, Change, ActivityNotFound, AlreadySignedUp, ActivityFull,
+                   NotSignedUp, _batch_changes)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; the same counts are computed from the arrays
+    numpy = None
+
+# Activities share this many locks, instead of holding one each
+LOCK_STRIPES = 64
+
+# Typecodes: student IDs, and 8-byte counts that NumPy can view as int64
+_ID_TYPE = "I"
+_COUNT_TYPE = "q"
+
+
+class ColumnarStore(ActivityStore):
+    """Keeps the catalog in interned, array-backed columns owned by this process"""
+
+    def __init__(self, activities):
+        # The seed catalog is copied into columns; callers may drop it afterwards
+        self.epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+        self._texts = []
+        self._text_ids = {}
+        self._emails = []
+        self._enrollments = []
+        self._student_ids = {}
+        self._students_lock = threading.Lock()
+
+        self._names = list(activities)
+        self._activity_ids = {name: i for i, name in enumerate(self._names)}
+        self._descriptions = array(_ID_TYPE, (self._intern(details["description"])
+                                              for details in activities.values()))
+        self._schedules = array(_ID_TYPE, (self._intern(details["schedule"])
+                                           for details in activities.values()))
+        self._max_participants = array(_COUNT_TYPE, (details["max_participants"]
+                                                     for details in activities.values()))
+        self._members = [array(_ID_TYPE, map(self._register, details["participants"]))
+                         for details in activities.values()]
+        for activity_id, members in enumerate(self._members):
+            for student_id in members:
+                self._enrollments[student_id].append(activity_id)
+        self._counts = array(_COUNT_TYPE, map(len, self._members))
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _intern(self, text):
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = self._text_ids[text] = len(self._texts)
+            self._texts.append(text)
+        return text_id
+
+    def _register(self, email):
+        """Return the student ID of an email, assigning one if it is new"""
+        student_id = self._student_ids.get(email)
+        if student_id is None:
+            with self._students_lock:
+                student_id = self._student_ids.get(email)
+                if student_id is None:
+                    # Append first: an ID is only published once its columns are readable
+                    self._emails.append(email)
+                    self._enrollments.append(array(_ID_TYPE))
+                    student_id = self._student_ids[email] = len(self._emails) - 1
+        return student_id
+
+    def _activity_id(self, name):
+        try:
+            return self._activity_ids[name]
+        except KeyError:
+            raise ActivityNotFound(name) from None
+
+    def _lock(self, activity_id):
+        return self._locks[activity_id % LOCK_STRIPES]
+
+    def _is_member(self, activity_id, student_id):
+        # A student has few activities, so scanning theirs beats searching the activity's
+        return student_id is not None and activity_id in self._enrollments[student_id]
+
+    def _add(self, activity_id, student_id):
+        """Record a signup; must be called under the activity's lock"""
+        self._members[activity_id].append(student_id)
+        self._enrollments[student_id].append(activity_id)
+        self._counts[activity_id] += 1
+
+    def _activity(self, activity_id):
+        return {
+            "description": self._texts[self._descriptions[activity_id]],
+            "schedule": self._texts[self._schedules[activity_id]],
+            "max_participants": self._max_participants[activity_id],
+            "participants": list(map(self._emails.__getitem__, self._members[activity_id]))
+        }
+
+    @property
+    def version(self):
+        return self._version
+
+    def _bump_version(self, count=1):
+        with self._version_lock:
+            self._version += count
+            return self._version
+
+    def get_catalog(self):
+        return {name: self._activity(activity_id) for activity_id, name in enumerate(self._names)}
+
+    def get_catalog_summary(self):
+        counts = self._counts.tolist()
+        texts = self._texts
+        if numpy is not None:
+            spots_left = (numpy.frombuffer(self._max_participants, dtype=numpy.int64)
+                          - numpy.frombuffer(self._counts, dtype=numpy.int64)).tolist()
+        else:
+            spots_left = [maximum - count for maximum, count in zip(self._max_participants, counts)]
+        return {
+            name: {
+                "description": texts[description],
+                "schedule": texts[schedule],
+                "max_participants": maximum,
+                "participant_count": count,
+                "spots_left": spots
+            }
+            for name, description, schedule, maximum, count, spots in zip(
+                self._names, self._descriptions, self._schedules, self._max_participants, counts, spots_left)
+        }
+
+    def get_activity(self, name):
+        return self._activity(self._activity_id(name))
+
+    def get_student_activities(self, email):
+        student_id = self._student_ids.get(email)
+        if student_id is None:
+            return []
+        return list(map(self._names.__getitem__, self._enrollments[student_id]))
+
+    def get_participants(self, name, offset, limit):
+        activity_id = self._activity_id(name)
+        members = self._members[activity_id]
+        return list(map(self._emails.__getitem__, members[offset:offset + limit])), len(members)
+
+    def add_participant(self, name, email):
+        activity_id = self._activity_id(name)
+        maximum = self._max_participants[activity_id]
+        with self._lock(activity_id):
+            if self._is_member(activity_id, self._student_ids.get(email)):
+                raise AlreadySignedUp(email)
+            if self._counts[activity_id] >= maximum:
+                raise ActivityFull(name)
+            self._add(activity_id, self._register(email))
+            version = self._bump_version()
+            self._notify((Change(name, email, "added", self._counts[activity_id], maximum, version),))
+        return version
+
+    def add_participants(self, name, emails):
+        try:
+            activity_id = self._activity_id(name)
+        except ActivityNotFound as e:
+            return [e] * len(emails)
+        maximum = self._max_participants[activity_id]
+        results = []
+        added = []
+        with self._lock(activity_id):
+            for email in emails:
+                if self._is_member(activity_id, self._student_ids.get(email)):
+                    results.append(AlreadySignedUp(email))
+                elif self._counts[activity_id] >= maximum:
+                    results.append(ActivityFull(name))
+                else:
+                    self._add(activity_id, self._register(email))
+                    added.append((email, self._counts[activity_id]))
+                    results.append(None)
+            if added:
+                version = self._bump_version(len(added))
+                self._notify(_batch_changes(name, added, maximum, version))
+        return results
+
+    def remove_participant(self, name, email):
+        activity_id = self._activity_id(name)
+        student_id = self._student_ids.get(email)
+        with self._lock(activity_id):
+            if not self._is_member(activity_id, student_id):
+                raise NotSignedUp(email)
+            # Linear in the activity's size: an O(1) removal would need a
+            # position index per signup, which costs the memory saved here
+            self._members[activity_id].remove(student_id)
+            self._enrollments[student_id].remove(activity_id)
+            self._counts[activity_id] -= 1
+            version = self._bump_version()
+            self._notify((Change(name, email, "removed", self._counts[activity_id],
+                                 self._max_participants[activity_id], version),))
+        return version
@@ -0,0 +1,44 @@
+"""
+Fixtures shared by the test modules
+
+A module that wants to run against every storage backend defines a `seed`
+fixture returning its catalog and asks for one of:
+
+- store: a fresh store of each backend holding a copy of the seed
+- app_store: the same store, installed as the app's store
+- client: a TestClient for the app serving app_store
+"""
+import copy
+
+import pytest
+
+from columnar_store import ColumnarStore
+from store import InMemoryStore, SQLiteStore
+
+# Backends that every store-level test runs against
+BACKENDS = ("memory", "sqlite", "columnar")
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request, seed, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStore(tmp_path / "activities.db", seed=seed)
+    if request.param == "columnar":
+        return ColumnarStore(copy.deepcopy(seed))
+    return InMemoryStore(copy.deepcopy(seed))
+
+
+@pytest.fixture
+def app_store(store, monkeypatch):
+    # Imported here so modules that do not test the app need no FastAPI
+    import app
+    monkeypatch.setattr(app, "store", store)
+    monkeypatch.setattr(app, "_catalog_cache", {})
+    return store
+
+
+@pytest.fixture
+def client(app_store):
+    import app
+    from fastapi.testclient import TestClient
+    return TestClient(app.app)
@@ -0,0 +1,206 @@
+"""
+Benchmark of response encoding at growing catalog sizes
+
+Compares ways of turning the catalog into JSON bytes, on generated catalogs
+(see seed_data.py):
+
+- FastAPI default: jsonable_encoder followed by stdlib json, which is what a
+  route returning a plain dict goes through
+- per-activity stdlib json: the catalog encoding before encode_json used
+  orjson, building a projected copy of every activity
+- encode_json, stdlib fallback: the current path without orjson installed
+- encode_json: the current path, as served by GET /activities
+
+and, for a batch signup response, the FastAPI default against the response
+model path (validation and serialization to bytes in pydantic-core) taken by
+routes that declare a response_model.
+
+Every path must produce the same bytes; the benchmark checks that before
+timing them.
+
+Usage:
+    python encoding_bench.py [--sizes 10,1000,100000] [--participants-per-activity 10] [--json results.json]
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import app as app_module
+import bench_history
+from seed_data import generate_catalog
+from store import InMemoryStore
+
+# Items in the batch signup response benchmark, the most a request may hold
+BATCH_ITEMS = app_module.MAX_BATCH_SIGNUPS
+
+
+def stdlib_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fastapi_default(catalog):
+    return stdlib_json(jsonable_encoder(catalog))
+
+
+def per_activity_stdlib(catalog):
+    fragments = [
+        stdlib_json(name) + b":" + stdlib_json({field: details[field] for field in app_module.DEFAULT_PROJECTION})
+        for name, details in catalog.items()
+    ]
+    return b"{" + b",".join(fragments) + b"}"
+
+
+def encode_catalog(catalog):
+    """The GET /activities encoding, with the cached body dropped first"""
+    app_module._catalog_cache.clear()
+    return app_module.get_encoded_catalog()[2]
+
+
+def encode_catalog_stdlib(catalog):
+    orjson, app_module.orjson = app_module.orjson, None
+    try:
+        return encode_catalog(catalog)
+    finally:
+        app_module.orjson = orjson
+
+
+def batch_response(count):
+    """Body of a batch signup response, as the route returns it"""
+    items = [("Chess Club", f"student{i}@mergington.edu", "ok" if i % 3 else "duplicate") for i in range(count)]
+    return {
+        "signed_up": sum(status == "ok" for _, _, status in items),
+        "results": [{"activity": a, "email": e, "status": s} for a, e, s in items]
+    }
+
+
+def response_model_encoder(model):
+    """What FastAPI does with the return value of a route declaring response_model=model"""
+    adapter = TypeAdapter(model)
+    return lambda content: adapter.dump_json(adapter.validate_python(content))
+
+
+def time_call(function, argument, rounds):
+    """Milliseconds of each of several calls"""
+    samples = []
+    for _ in range(rounds):
+        # Start each call without garbage left behind by the previous ones
+        gc.collect()
+        start = time.perf_counter()
+        function(argument)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run_size(num_activities, args):
+    catalog = generate_catalog(num_activities, num_activities * args.participants_per_activity, args.skew)
+    app_module.store = InMemoryStore(catalog)
+    app_module._catalog_cache.clear()
+
+    paths = [
+        ("FastAPI default (jsonable_encoder + json)", fastapi_default),
+        ("per-activity stdlib json (previous)", per_activity_stdlib),
+        ("encode_json, stdlib fallback", encode_catalog_stdlib),
+        ("encode_json", encode_catalog),
+    ]
+    if app_module.orjson is None:
+        print("orjson is not installed; encode_json uses the stdlib encoder")
+        paths.pop()
+    expected = per_activity_stdlib(catalog)
+    for name, function in paths:
+        if function(catalog) != expected:
+            raise AssertionError(f"{name} encodes the catalog differently")
+
+    results = []
+    for name, function in paths:
+        samples = time_call(function, catalog, args.rounds)
+        results.append({"name": name, "activities": num_activities, "ms": statistics.median(samples),
+                        "ms_rounds": samples, "bytes": len(expected)})
+    return results
+
+
+def run_batch(args):
+    content = batch_response(BATCH_ITEMS)
+    expected = stdlib_json(content)
+    paths = [
+        (f"batch response ({BATCH_ITEMS} items), FastAPI default", fastapi_default),
+        (f"batch response ({BATCH_ITEMS} items), response model",
+         response_model_encoder(app_module.BatchSignupResult)),
+    ]
+    for name, function in paths:
+        if function(content) != expected:
+            raise AssertionError(f"{name} encodes the response differently")
+    results = []
+    for name, function in paths:
+        samples = time_call(function, content, args.rounds * 20)
+        results.append({"name": name, "activities": None, "ms": statistics.median(samples),
+                        "ms_rounds": samples, "bytes": len(expected)})
+    return results
+
+
+def print_results(results):
+    baseline = results[0]["ms"]
+    for result in results:
+        per_activity = ""
+        if result["activities"]:
+            per_activity = f"{result['ms'] * 1e6 / result['activities']:>12,.0f}"
+        print(f"{result['name']:<58} {result['ms']:>10.3f} {per_activity:>12} {baseline / result['ms']:>8.1f}x")
+
+
+def record_history(results, size):
+    metrics = {f"{result['name']} ms": bench_history.metric(result["ms"], "lower", result["ms_rounds"])
+               for result in results}
+    bench_history.append_run("encoding_bench", f"{size} activities" if size else "batch response", metrics)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of JSON response encoding by catalog size")
+    parser.add_argument("--sizes", default="10,1000,100000", help="Comma-separated numbers of activities")
+    parser.add_argument("--participants-per-activity", type=int, default=10,
+                        help="Average participants per activity in the generated catalogs")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of participant counts")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed encodings per path; the median is reported")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the benchmark history used for regression checks")
+    args = parser.parse_args(argv)
+
+    header = f"{'encoding':<58} {'ms':>10} {'ns/activity':>12} {'speedup':>9}"
+    all_results = []
+    for size in sorted({int(size) for size in args.sizes.split(",")}):
+        print(f"\nCatalog: {size:,} activities, {size * args.participants_per_activity:,} participants")
+        print(header)
+        results = run_size(size, args)
+        print_results(results)
+        all_results.extend(results)
+        if not args.no_history:
+            record_history(results, size)
+
+    print(f"\nBatch signup response")
+    print(header)
+    results = run_batch(args)
+    print_results(results)
+    all_results.extend(results)
+    if not args.no_history:
+        record_history(results, None)
+        print(f"\nRuns recorded in the benchmark history: {bench_history.HISTORY_PATH}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": sys.version.split()[0],
+                "orjson": app_module.orjson is not None,
+                "results": all_results
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Server-Sent Events fan-out of catalog changes
+
+The store reports every committed mutation to EventBroadcaster.publish (see
+ActivityStore.add_listener), usually from a request thread. The broadcaster
+hands it to its event loop, keeps a bounded history for clients resuming with
+Last-Event-ID, and copies it into one bounded queue per connected client.
+
+A client that falls too far behind, or resumes from an event that is no
+longer in the history, receives a "reset" event and should reload the
+catalog instead of applying deltas.
+
+Only changes reported by this process's store are broadcast. With several
+uvicorn workers on SQLite each worker streams the changes it handled itself;
+workers sharing a state server (see shared_state.py) each receive and stream
+every change, under event ids of their own.
+"""
+import asyncio
+import json
+from collections import deque
+
+
+class _Subscriber:
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog and make it resync. The reset
+            # carries this event's id, so a resume after it starts from here.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event[0], None))
+
+
+class EventBroadcaster:
+    """Fans out catalog change events to every connected SSE client"""
+
+    def __init__(self, epoch, history_size=1024, queue_size=256, keepalive=15.0):
+        # Event ids are "<epoch>-<seq>" so ids from before a restart are
+        # recognised as unknown instead of silently matching new events
+        self.epoch = epoch
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self._loop = None
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+
+    def bind(self, loop):
+        """Attach to the event loop that serves the SSE connections"""
+        self._loop = loop
+
+    def publish(self, change):
+        """Broadcast a store Change; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, change)
+
+    def _dispatch(self, change):
+        self._seq += 1
+        event = (f"{self.epoch}-{self._seq}", {
+            "activity": change.activity,
+            "email": change.email,
+            "action": change.action,
+            "participant_count": change.participant_count,
+            "spots_left": change.max_participants - change.participant_count,
+            "version": change.version
+        })
+        self._history.append(event)
+        for subscriber in self._subscribers:
+            subscriber.deliver(event)
+
+    def _backlog(self, last_event_id):
+        """Events after last_event_id, or None if the client must resync"""
+        epoch, _, seq = last_event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self._seq - len(self._history) + 1
+        if seq < oldest - 1 or seq > self._seq:
+            return None
+        return list(self._history)[seq - oldest + 1:]
+
+    async def stream(self, last_event_id=None):
+        """Yield encoded SSE messages for one client until it disconnects"""
+        subscriber = _Subscriber(self.queue_size)
+        # Subscribing and computing the backlog happen without yielding in
+        # between, so every event lands in exactly one of the two
+        self._subscribers.add(subscriber)
+        backlog = []
+        if last_event_id:
+            backlog = self._backlog(last_event_id)
+            if backlog is None:
+                backlog = [(f"{self.epoch}-{self._seq}", None)]
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield _format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_event(event)
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+def _format_event(event):
+    """Encode an (id, data) event; data None means "reset"."""
+    event_id, data = event
+    if data is None:
+        return f"id: {event_id}\nevent: reset\ndata: {{}}\n\n"
+    return f"id: {event_id}\nevent: change\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
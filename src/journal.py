@@ -0,0 +1,248 @@
+"""
+Write-ahead journal and snapshots for the in-memory activity store
+
+Every mutation of an InMemoryStore is appended to a JSONL log before the
+request is acknowledged, and the store periodically writes a compacted
+snapshot of the whole catalog. On startup the latest snapshot is loaded and
+the log tail written after it is replayed.
+
+Layout of the journal directory:
+
+- snapshot.json: {"seq", "version", "activities"} where seq is the last
+  log record already reflected in the snapshot
+- journal-<first seq>.log: log segments, one JSON record per line. A new
+  segment is started at every snapshot, so old segments can be deleted once
+  the snapshot is safely on disk.
+
+How hard the log is pushed to disk is controlled by the fsync policy:
+
+- "always": a request waits until its record is fsynced. Concurrent writers
+  share one fsync (group commit), so throughput does not collapse to one
+  write per disk flush.
+- "interval": a background thread fsyncs every fsync_interval_ms, so a crash
+  can lose up to that much acknowledged work
+- "never": records are handed to the OS on every write and never fsynced
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class Journal:
+    """Append-only log of store mutations plus the snapshot it compacts into"""
+
+    def __init__(self, directory, fsync="interval", fsync_interval_ms=10, snapshot_every=10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}, not {fsync!r}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.snapshot_every = snapshot_every
+
+        # Guards the open segment, the sequence counter and snapshot bookkeeping
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._records_since_snapshot = 0
+        self._snapshot_pending = False
+        # Segments replaced by rotate(), closed once no fsync can be using them
+        self._retired = []
+
+        # Group commit state: one thread at a time fsyncs on behalf of everyone
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._synced_seq = 0
+
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def _segment_path(self, first_seq):
+        return self.directory / f"journal-{first_seq:012d}.log"
+
+    def _segments(self):
+        """Return [(first seq, path)] for every log segment, oldest first"""
+        segments = []
+        for path in self.directory.glob("journal-*.log"):
+            try:
+                segments.append((int(path.stem.split("-", 1)[1]), path))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def load(self):
+        """
+        Read the journal directory
+
+        Returns (snapshot, records) where snapshot is the decoded snapshot dict
+        or None, and records is the list of log records written after it, in
+        order. Must be called before open().
+        """
+        snapshot = None
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path, "rb") as f:
+                snapshot = json.load(f)
+        last_seq = snapshot["seq"] if snapshot else 0
+
+        records = []
+        for first_seq, path in self._segments():
+            if first_seq <= last_seq:
+                # Already compacted into the snapshot
+                continue
+            seq = first_seq - 1
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of a segment after a crash
+                        break
+                    records.append(record)
+                    seq += 1
+            last_seq = max(last_seq, seq)
+
+        self._seq = last_seq
+        return snapshot, records
+
+    def open(self):
+        """Start a fresh segment after the last replayed record"""
+        # A leftover segment with this name holds no complete record, so it
+        # is safe to truncate
+        self._file = open(self._segment_path(self._seq + 1), "wb")
+        self._synced_seq = self._seq
+        if self.fsync == "interval":
+            self._flusher = threading.Thread(target=self._flush_periodically,
+                                             name="journal-flusher", daemon=True)
+            self._flusher.start()
+
+    def append(self, record):
+        """
+        Append one record and return its sequence number
+
+        Callers append while holding the lock of the activity they mutate, so
+        records for one activity are logged in the order they were applied.
+        Call wait_durable() afterwards, outside that lock.
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(line)
+            if self.fsync == "never":
+                self._file.flush()
+            self._seq += 1
+            self._records_since_snapshot += 1
+            return self._seq
+
+    def wait_durable(self, seq):
+        """Block until record `seq` is fsynced (only under the "always" policy)"""
+        if self.fsync != "always":
+            return
+        with self._sync_cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    # Someone else is flushing; their fsync may cover us
+                    self._sync_cond.wait()
+                else:
+                    self._lead_sync()
+
+    def _lead_sync(self):
+        """Flush and fsync everything written so far. Called with _sync_cond held."""
+        self._syncing = True
+        self._sync_cond.release()
+        try:
+            with self._lock:
+                self._file.flush()
+                target = self._seq
+                fd = self._file.fileno()
+            os.fsync(fd)
+        finally:
+            self._sync_cond.acquire()
+            self._syncing = False
+            self._sync_cond.notify_all()
+        self._synced_seq = max(self._synced_seq, target)
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._sync_cond:
+                if self._synced_seq < self._seq and not self._syncing:
+                    self._lead_sync()
+
+    def claim_snapshot(self):
+        """Return True, at most once per interval, when a snapshot is due"""
+        with self._lock:
+            if self._snapshot_pending or self._records_since_snapshot < self.snapshot_every:
+                return False
+            self._snapshot_pending = True
+            return True
+
+    def rotate(self):
+        """
+        Close the current segment and start a new one
+
+        Returns the sequence number of the last record in the closed segment.
+        The caller must make sure no append is in flight, so that its copy of
+        the state matches exactly the records up to that number.
+        """
+        with self._lock:
+            self._file.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._retired.append(self._file)
+            self._file = open(self._segment_path(self._seq + 1), "wb")
+            self._records_since_snapshot = 0
+            return self._seq
+
+    def write_snapshot(self, activities, version, seq):
+        """Persist a snapshot taken at `seq` and drop the segments it replaces"""
+        path = self.directory / SNAPSHOT_FILE
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "version": version, "activities": activities},
+                      f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._fsync_directory()
+
+        for first_seq, segment in self._segments():
+            if first_seq <= seq:
+                segment.unlink()
+
+        # Close replaced segments once no group commit can still be using them
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            retired, self._retired = self._retired, []
+        for f in retired:
+            f.close()
+
+        with self._lock:
+            self._snapshot_pending = False
+
+    def _fsync_directory(self):
+        if self.fsync == "never" or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Stop the background flusher and push everything to disk"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
@@ -0,0 +1,140 @@
+"""
+Compact, mergeable latency histogram in the style of HdrHistogram
+
+Latencies are stored as integer microseconds in log-linear buckets: values
+below 2 * 10^significant_figures (rounded up to a power of two) get exact
+buckets, and above that every power-of-two range is split into the same number
+of linear sub-buckets. Recorded values therefore keep `significant_figures`
+significant digits of precision (relative error below 10^-significant_figures)
+while memory is bounded by the dynamic range, not by the number of requests.
+
+Histograms serialize to plain dicts (to_dict / from_dict) so they can be
+written to JSON and merged across runs and load generator processes.
+"""
+import math
+
+# Latencies are recorded as integer microseconds
+_UNITS_PER_SECOND = 1_000_000
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of latencies in seconds"""
+
+    def __init__(self, significant_figures=2):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.significant_figures = significant_figures
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._half_count = self._sub_bucket_count >> 1
+        # Sparse {bucket index: count}
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        return self._sub_bucket_count + (shift - 1) * self._half_count + (value >> shift) - self._half_count
+
+    def _bucket_range(self, index):
+        """Lowest and highest integer value that map to a bucket"""
+        if index < self._sub_bucket_count:
+            return index, index
+        offset = index - self._sub_bucket_count
+        shift = offset // self._half_count + 1
+        sub_bucket = offset % self._half_count + self._half_count
+        return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds, count=1):
+        """Record a latency in seconds"""
+        value = max(0, int(round(seconds * _UNITS_PER_SECOND)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add another histogram's recordings to this one"""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, percent):
+        """Latency in seconds at the given percentile (0-100), 0 if empty"""
+        if not self.total:
+            return 0
+        # Nearest-rank: the smallest value with at least percent% of samples at or below it
+        rank = max(1, math.ceil(percent / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bucket_range(index)
+                # Report the bucket midpoint, clamped to what was actually seen
+                value = min(max((low + high) / 2, self.min), self.max)
+                return value / _UNITS_PER_SECOND
+        return self.max / _UNITS_PER_SECOND
+
+    @property
+    def mean(self):
+        return self.sum / self.total / _UNITS_PER_SECOND if self.total else 0
+
+    @property
+    def min_seconds(self):
+        return self.min / _UNITS_PER_SECOND if self.total else 0
+
+    @property
+    def max_seconds(self):
+        return self.max / _UNITS_PER_SECOND if self.total else 0
+
+    def summary(self):
+        """Common latency statistics in seconds"""
+        return {
+            "count": self.total,
+            "min": self.min_seconds,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max_seconds
+        }
+
+    def to_dict(self):
+        return {
+            "significant_figures": self.significant_figures,
+            "unit": "us",
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            # JSON object keys must be strings
+            "counts": {str(index): count for index, count in self.counts.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["significant_figures"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.total = data["total"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
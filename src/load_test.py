@@ -3,8 +3,9 @@ Load Testing Script for High School Management System API
 This script performs load testing using asyncio and aiohttp to simulate
 many concurrent users accessing the application.
 
-It also includes a maximum throughput test to find the highest load
-that can be handled while maintaining a 99.99% success rate.
+It also includes a maximum throughput test to find the highest arrival rate
+that can be handled while maintaining a 99.99% success rate and the p99
+latency target.
 """
 import asyncio
 import aiohttp
@@ -15,8 +16,14 @@ import json
 import random
 import os
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote
+from latency_histogram import LatencyHistogram
+from scenario import load_scenario
+import bench_history
 
 # Base URL for the application
 BASE_URL = "http://localhost:8000"
@@ -25,11 +32,80 @@ BASE_URL = "http://localhost:8000"
 SLA_PARAMETERS = {
     "error_rate_threshold": 0.0001,  # 0.01% SLA means maximum allowed error rate is 0.01%
     "response_time_threshold": 1.0,   # Maximum allowed average response time in seconds
+    "p99_response_time_threshold": 0.5,  # Maximum allowed 99th percentile response time in seconds
 }
 
+# How virtual users connect: "pooled" shares one keep-alive connection pool
+# across all users, "fresh" gives every user (every arrival, in open-loop and
+# adaptive tests) its own session and connections
+CONNECTION_MODE = "pooled"
+
+# Maximum simultaneous connections in the shared pool (0 means unlimited)
+CONNECTION_LIMIT = 100
+
+# Arrival processes for open-loop tests: evenly spaced requests, a rate that
+# climbs in equal steps up to the target, or Poisson (exponential gaps)
+ARRIVAL_PROFILES = ("constant", "step", "poisson")
+
+# Number of steps used by the "step" arrival profile
+ARRIVAL_STEPS = 5
+
+# Share of open-loop arrivals that view the catalog; the rest sign up
+OPEN_LOOP_READ_RATIO = 0.5
+
+# Scenario file (see scenario.py) describing the workload, and the Scenario
+# loaded from it; without one users view the catalog once and sign up once
+SCENARIO_PATH = None
+SCENARIO = None
+
+# Precision of the latency histograms, in significant decimal digits
+HISTOGRAM_SIGNIFICANT_FIGURES = 2
+
+# Error messages kept per endpoint as examples
+MAX_ERROR_SAMPLES = 3
+
+# Recorder that requests report into; replaced at the start of every run
+RECORDER = None
+
+# Length in seconds of the intervals reported while a test is running
+METRICS_INTERVAL = 1.0
+
+# JSONL file the per-interval metrics are streamed to; None picks a
+# timestamped name in the working directory
+TIME_SERIES_PATH = None
+
+# Show the per-interval metrics on a live terminal line
+LIVE_OUTPUT = True
+
+# Receives (interval key, EndpointRecorder) for every completed interval:
+# the TimeSeriesReporter in a single process, a queue to the parent in workers
+INTERVAL_SINK = None
+
+# Number of load generator processes; each runs its own event loop
+WORKERS = 1
+
+# Seconds allowed for worker processes to start before a multi-process test begins
+WORKER_STARTUP_TIME = 3.0
+
+# Seconds between reads of the adaptive test's target rate by each worker
+RATE_POLL_INTERVAL = 0.1
+
+# Append every run to the benchmark history (see bench_history.py)
+RECORD_HISTORY = True
+
+# Check that the server's workers agree on the catalog after the test
+CHECK_CONSISTENCY = False
+
+# Requests, each on a fresh connection, made by each part of the consistency check
+CONSISTENCY_PROBES = 20
+
 # List of available activities (will be populated dynamically)
 AVAILABLE_ACTIVITIES = []
 
+# Last ETag seen for /activities, sent back as If-None-Match so unchanged
+# catalogs come back as an empty 304
+ACTIVITIES_ETAG = None
+
 # Generate a unique timestamp to prevent duplicate signups across test runs
 TEST_RUN_ID = int(time.time())
 
@@ -41,15 +117,270 @@ LOAD_TEST_RESULTS = {
     "optimization": {}
 }
 
-async def fetch_activities(session, user_id):
-    """Simulate a user viewing activities and return the list of activities"""
-    start_time = time.time()
-    global AVAILABLE_ACTIVITIES
+class EndpointRecorder:
+    """Request counters and latency histogram for one endpoint"""
+    
+    def __init__(self, significant_figures):
+        self.histogram = LatencyHistogram(significant_figures)
+        self.requests = 0
+        # 2xx (and 304) responses
+        self.http_successes = 0
+        # Responses that count as success for the business logic, such as
+        # "already signed up" or "activity full" for signups
+        self.business_successes = 0
+        # 2xx or business success, used for the overall success rate
+        self.successes = 0
+        self.error_samples = []
+    
+    def record(self, status, response_time, is_business_success=False, error=None):
+        self.requests += 1
+        self.histogram.record(response_time)
+        if 200 <= status < 300 or status == 304:
+            self.http_successes += 1
+        if is_business_success:
+            self.business_successes += 1
+        if 200 <= status < 300 or is_business_success:
+            self.successes += 1
+        if error is not None and len(self.error_samples) < MAX_ERROR_SAMPLES:
+            self.error_samples.append(error)
+    
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.requests += other.requests
+        self.http_successes += other.http_successes
+        self.business_successes += other.business_successes
+        self.successes += other.successes
+        self.error_samples = (self.error_samples + other.error_samples)[:MAX_ERROR_SAMPLES]
+    
+    def to_dict(self):
+        return {
+            "histogram": self.histogram.to_dict(),
+            "requests": self.requests,
+            "http_successes": self.http_successes,
+            "business_successes": self.business_successes,
+            "successes": self.successes,
+            "error_samples": self.error_samples
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        recorder = cls(data["histogram"]["significant_figures"])
+        recorder.histogram = LatencyHistogram.from_dict(data["histogram"])
+        recorder.requests = data["requests"]
+        recorder.http_successes = data["http_successes"]
+        recorder.business_successes = data["business_successes"]
+        recorder.successes = data["successes"]
+        recorder.error_samples = data["error_samples"]
+        return recorder
+
+class ResultRecorder:
+    """
+    Results of a load test, per endpoint, in constant memory
+    
+    Requests are folded into counters and a latency histogram as they complete
+    instead of being kept as one dict each. Recorders serialize with to_dict()
+    and can be merged across runs and worker processes.
+    """
+    
+    def __init__(self, significant_figures=None):
+        self.significant_figures = significant_figures or HISTOGRAM_SIGNIFICANT_FIGURES
+        self.endpoints = {}
+        # All endpoints together, per interval of completion time; drained by
+        # IntervalPublisher while the test runs and not serialized
+        self.intervals = {}
+    
+    def record(self, endpoint, status, response_time, is_business_success=False, error=None):
+        """Record one request under endpoint, a "METHOD /path/{template}" key"""
+        recorder = self.endpoints.get(endpoint)
+        if recorder is None:
+            recorder = self.endpoints[endpoint] = EndpointRecorder(self.significant_figures)
+        recorder.record(status, response_time, is_business_success, error)
+        
+        key = current_interval()
+        interval = self.intervals.get(key)
+        if interval is None:
+            interval = self.intervals[key] = EndpointRecorder(self.significant_figures)
+        interval.record(status, response_time, is_business_success)
+    
+    @property
+    def total_requests(self):
+        return sum(recorder.requests for recorder in self.endpoints.values())
+    
+    def merge(self, other):
+        for endpoint, recorder in other.endpoints.items():
+            if endpoint in self.endpoints:
+                self.endpoints[endpoint].merge(recorder)
+            else:
+                self.endpoints[endpoint] = recorder
+        return self
+    
+    def to_dict(self):
+        return {
+            "significant_figures": self.significant_figures,
+            "endpoints": {endpoint: recorder.to_dict() for endpoint, recorder in self.endpoints.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        recorder = cls(data["significant_figures"])
+        recorder.endpoints = {
+            endpoint: EndpointRecorder.from_dict(endpoint_data)
+            for endpoint, endpoint_data in data["endpoints"].items()
+        }
+        return recorder
+
+def reset_recorder():
+    """Start recording into a fresh ResultRecorder and return it"""
+    global RECORDER
+    RECORDER = ResultRecorder()
+    return RECORDER
+
+def current_interval():
+    """
+    Key of the metrics interval the current time falls in
+    
+    Keys count intervals since the epoch, so every worker process agrees on
+    them without coordination.
+    """
+    return int(time.time() // METRICS_INTERVAL)
+
+class IntervalPublisher:
+    """Hands every completed interval of a recorder to INTERVAL_SINK while a test runs"""
+    
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.next_key = current_interval()
+        self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            # Wake up just after each interval boundary
+            await asyncio.sleep(METRICS_INTERVAL - time.time() % METRICS_INTERVAL)
+            self._drain(current_interval())
+    
+    def _drain(self, until_key):
+        # Intervals without any completed request are reported too, so the
+        # series has no gaps and the parent hears from every worker
+        for key in range(self.next_key, until_key):
+            interval = self.recorder.intervals.pop(key, None)
+            INTERVAL_SINK(key, interval or EndpointRecorder(self.recorder.significant_figures))
+        self.next_key = max(self.next_key, until_key)
+    
+    async def stop(self):
+        """Stop the timer and report the remaining, partly filled interval"""
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self._drain(current_interval() + 1)
+
+class TimeSeriesReporter:
+    """
+    Streams per-interval throughput, error rate and latency percentiles
+    
+    Intervals from every worker process are merged and emitted in order once
+    each worker has reported them: one JSON object per line to the time series
+    file, and a live status line on the terminal. on_emit, if set, is called
+    with (key, merged EndpointRecorder) for every emitted interval.
+    """
+    
+    def __init__(self, path, workers=1, live=True):
+        self.path = path
+        self.workers = workers
+        self.live = live
+        self.on_emit = None
+        # {interval key: [merged EndpointRecorder, number of workers reported]}
+        self.pending = {}
+        self.series = []
+        self.first_key = None
+        self._file = open(path, "w", encoding="utf-8")
+    
+    def add(self, key, interval):
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = [interval, 1]
+        else:
+            entry[0].merge(interval)
+            entry[1] += 1
+        while self.pending:
+            first = min(self.pending)
+            if self.pending[first][1] < self.workers:
+                break
+            self._emit(first, self.pending.pop(first)[0])
+    
+    def _emit(self, key, interval):
+        if self.on_emit is not None:
+            self.on_emit(key, interval)
+        if self.first_key is None:
+            self.first_key = key
+        latency = interval.histogram.summary()
+        errors = interval.requests - interval.successes
+        row = {
+            "timestamp": key * METRICS_INTERVAL,
+            "elapsed": (key - self.first_key) * METRICS_INTERVAL,
+            "requests": interval.requests,
+            "requests_per_second": interval.requests / METRICS_INTERVAL,
+            "errors": errors,
+            "error_rate": errors / interval.requests if interval.requests else 0,
+            "p50_response_time": latency["p50"],
+            "p90_response_time": latency["p90"],
+            "p99_response_time": latency["p99"],
+            "max_response_time": latency["max"]
+        }
+        self.series.append(row)
+        self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+        
+        if self.live:
+            line = (f"[{row['elapsed']:6.1f}s] {row['requests_per_second']:9.1f} req/s  "
+                    f"errors {row['error_rate'] * 100:6.2f}%  "
+                    f"p50 {row['p50_response_time'] * 1000:7.1f}ms  "
+                    f"p99 {row['p99_response_time'] * 1000:7.1f}ms")
+            # Rewrite one line in a terminal, append lines when piped
+            if sys.stdout.isatty():
+                print(f"\r{line}", end="", flush=True)
+            else:
+                print(line, flush=True)
+    
+    def close(self):
+        """Emit whatever is still pending and close the time series file"""
+        for key in sorted(self.pending):
+            self._emit(key, self.pending[key][0])
+        self.pending = {}
+        self._file.close()
+        if self.live and self.series and sys.stdout.isatty():
+            print()
+
+def create_time_series_reporter(workers=1):
+    path = TIME_SERIES_PATH or f"load_test_timeseries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    return TimeSeriesReporter(path, workers=workers, live=LIVE_OUTPUT)
+
+async def fetch_activities(session, user_id, start_time=None):
+    """
+    Simulate a user viewing activities and record the outcome in RECORDER
+    
+    start_time is when the request was meant to be sent; open-loop tests pass
+    their schedule so latency includes any time spent waiting to send.
+    """
+    if start_time is None:
+        start_time = time.time()
+    global AVAILABLE_ACTIVITIES, ACTIVITIES_ETAG
+    
+    # Only revalidate once we hold a copy of the catalog to fall back on
+    headers = {}
+    if ACTIVITIES_ETAG and AVAILABLE_ACTIVITIES:
+        headers["If-None-Match"] = ACTIVITIES_ETAG
     
     try:
-        async with session.get(f"{BASE_URL}/activities") as response:
-            if response.status == 200:
+        async with session.get(f"{BASE_URL}/activities", headers=headers) as response:
+            if response.status == 304:
+                # Catalog unchanged since our last fetch
+                RECORDER.record("GET /activities", response.status, time.time() - start_time,
+                                is_business_success=True)
+            elif response.status == 200:
                 activities_data = await response.json()
+                ACTIVITIES_ETAG = response.headers.get("ETag")
                 
                 # Store available activities for signup
                 if not AVAILABLE_ACTIVITIES:
@@ -57,86 +388,188 @@ async def fetch_activities(session, user_id):
                     AVAILABLE_ACTIVITIES = list(activities_data.keys())
                     print(f"Available activities: {', '.join(AVAILABLE_ACTIVITIES)}")
                 
-                return {
-                    "user_id": user_id,
-                    "endpoint": "/activities",
-                    "status": response.status,
-                    "response_time": time.time() - start_time
-                }
+                RECORDER.record("GET /activities", response.status, time.time() - start_time)
             else:
-                return {
-                    "user_id": user_id,
-                    "endpoint": "/activities",
-                    "status": response.status,
-                    "response_time": time.time() - start_time,
-                    "error": f"Failed with status {response.status}"
-                }
+                RECORDER.record("GET /activities", response.status, time.time() - start_time,
+                                error=f"Failed with status {response.status}")
     except Exception as e:
-        return {
-            "user_id": user_id,
-            "endpoint": "/activities",
-            "status": 0,
-            "response_time": time.time() - start_time,
-            "error": str(e)
-        }
+        RECORDER.record("GET /activities", 0, time.time() - start_time, error=str(e))
+
+async def fetch_activity_resource(session, activity_name, endpoint, suffix="", start_time=None):
+    """
+    GET one activity, or one of its sub-resources, and record the outcome
+    
+    endpoint is the name results are recorded under, so that requests for
+    different activities are summarized together.
+    """
+    if start_time is None:
+        start_time = time.time()
+    try:
+        async with session.get(f"{BASE_URL}/activities/{quote(activity_name, safe='')}{suffix}") as response:
+            await response.read()
+            if response.status == 200:
+                RECORDER.record(endpoint, response.status, time.time() - start_time)
+            else:
+                RECORDER.record(endpoint, response.status, time.time() - start_time,
+                                error=f"Failed with status {response.status}")
+    except Exception as e:
+        RECORDER.record(endpoint, 0, time.time() - start_time, error=str(e))
 
-async def signup_for_activity(session, user_id):
-    """Simulate a user signing up for an activity"""
-    start_time = time.time()
+async def signup_for_activity(session, user_id, start_time=None, activity_name=None, email=None):
+    """
+    Simulate a user signing up for an activity (see fetch_activities for start_time)
+    
+    Without an explicit activity_name and email, the activity is picked
+    round-robin by user_id and the email is unique to the user and test run.
+    """
+    if start_time is None:
+        start_time = time.time()
     
     # Select an activity from available activities
-    if AVAILABLE_ACTIVITIES:
-        activity_name = AVAILABLE_ACTIVITIES[user_id % len(AVAILABLE_ACTIVITIES)]
-    else:
-        # Fallback to Chess Club if no activities were loaded
-        activity_name = "Chess Club"
+    if activity_name is None:
+        if AVAILABLE_ACTIVITIES:
+            activity_name = AVAILABLE_ACTIVITIES[user_id % len(AVAILABLE_ACTIVITIES)]
+        else:
+            # Fallback to Chess Club if no activities were loaded
+            activity_name = "Chess Club"
+    # One key for every activity, so results are not split per activity
+    endpoint = "POST /activities/{activity_name}/signup"
     
     # Create a unique email using both user_id and TEST_RUN_ID to prevent duplicates
     # across test runs
-    email = f"loadtest{user_id}_{TEST_RUN_ID}@mergington.edu"
+    if email is None:
+        email = f"loadtest{user_id}_{TEST_RUN_ID}@mergington.edu"
     
     try:
-        # URL encode the activity name for spaces and special characters
-        activity_name_encoded = activity_name.replace(" ", "%20")
-        
         async with session.post(
-            f"{BASE_URL}/activities/{activity_name_encoded}/signup",
+            f"{BASE_URL}/activities/{quote(activity_name, safe='')}/signup",
             params={"email": email}
         ) as response:
             response_body = await response.text()
             
-            # Consider 200 (success) and 400 (already signed up) as "successful" responses
-            # for the purpose of measuring throughput
-            is_success = response.status == 200 or (response.status == 400 and "already signed up" in response_body)
+            # Consider 200 (success) and 400 (already signed up / activity full) as
+            # "successful" responses for the purpose of measuring throughput
+            is_success = response.status == 200 or (
+                response.status == 400 and
+                ("already signed up" in response_body or "Activity is full" in response_body)
+            )
             
-            return {
-                "user_id": user_id,
-                "endpoint": f"/activities/{activity_name}/signup",
-                "status": response.status if is_success else response.status,
-                "response_time": time.time() - start_time,
-                "is_business_success": is_success,
-                "body": response_body[:100] + "..." if len(response_body) > 100 else response_body
-            }
+            RECORDER.record(endpoint, response.status, time.time() - start_time,
+                            is_business_success=is_success,
+                            error=None if is_success else f"{response.status}: {response_body[:100]}")
     except Exception as e:
-        return {
-            "user_id": user_id,
-            "endpoint": f"/activities/{activity_name}/signup",
-            "status": 0,
-            "response_time": time.time() - start_time,
-            "error": str(e),
-            "is_business_success": False
-        }
+        RECORDER.record(endpoint, 0, time.time() - start_time, error=str(e))
 
-async def simulate_user_session(user_id):
-    """Simulate a complete user session"""
-    async with aiohttp.ClientSession() as session:
-        # First, user views activities
-        view_result = await fetch_activities(session, user_id)
-        
-        # Then, user signs up for an activity
-        signup_result = await signup_for_activity(session, user_id)
-        
-        return [view_result, signup_result]
+async def unregister_from_activity(session, activity_name, email, start_time=None):
+    """Simulate a student dropping an activity (see fetch_activities for start_time)"""
+    if start_time is None:
+        start_time = time.time()
+    endpoint = "DELETE /activities/{activity_name}/signup"
+    try:
+        async with session.delete(
+            f"{BASE_URL}/activities/{quote(activity_name, safe='')}/signup",
+            params={"email": email}
+        ) as response:
+            response_body = await response.text()
+            
+            # Dropping a signup that was rejected (activity full) or is still in
+            # flight is refused with 400, which is the API working as intended
+            is_success = response.status == 200 or (
+                response.status == 400 and "not signed up" in response_body
+            )
+            
+            RECORDER.record(endpoint, response.status, time.time() - start_time,
+                            is_business_success=is_success,
+                            error=None if is_success else f"{response.status}: {response_body[:100]}")
+    except Exception as e:
+        RECORDER.record(endpoint, 0, time.time() - start_time, error=str(e))
+
+def create_session(limit=None):
+    """Create a client session whose connector keeps connections alive for reuse"""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT if limit is None else limit,
+        keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+async def simulate_user_session(user_id, session=None):
+    """
+    Simulate a complete user session
+    
+    Args:
+        user_id: Id of the simulated user
+        session: Shared session to send requests through; if None the user
+            opens (and pays for) a fresh session and connections of its own
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await simulate_user_session(user_id, own_session)
+    
+    if SCENARIO is not None:
+        requests = SCENARIO.session_requests()
+        for request_index in range(requests):
+            if request_index:
+                await asyncio.sleep(SCENARIO.pick_think_time())
+            await run_scenario_request(session, user_id, request_index)
+        return
+    
+    # First, user views activities
+    await fetch_activities(session, user_id)
+    
+    # Then, user signs up for an activity
+    await signup_for_activity(session, user_id)
+
+async def run_scenario_request(session, user_id, request_index, start_time=None):
+    """Send one request of SCENARIO's mix on behalf of a user"""
+    action = SCENARIO.pick_action()
+    if action == "view_activities":
+        await fetch_activities(session, user_id, start_time=start_time)
+        return
+    
+    activities = AVAILABLE_ACTIVITIES or ["Chess Club"]
+    if action == "unregister":
+        signup = SCENARIO.pick_unregister()
+        if signup is not None:
+            await unregister_from_activity(session, *signup, start_time=start_time)
+            return
+        # Nothing to drop yet: sign up instead, so there is something next time
+        action = "signup"
+    if action == "signup":
+        activity_name, email = SCENARIO.pick_signup(activities, user_id, request_index, TEST_RUN_ID)
+        await signup_for_activity(session, user_id, start_time=start_time,
+                                  activity_name=activity_name, email=email)
+    elif action == "view_activity":
+        await fetch_activity_resource(session, SCENARIO.pick_activity(activities),
+                                      "GET /activities/{activity_name}", start_time=start_time)
+    else:
+        await fetch_activity_resource(session, SCENARIO.pick_activity(activities),
+                                      "GET /activities/{activity_name}/participants",
+                                      suffix="/participants", start_time=start_time)
+
+async def open_loop_request(session, request_id, intended):
+    """
+    Send one open-loop arrival, drawn from SCENARIO or the default read/signup mix
+    
+    With session None the arrival opens (and pays for) a fresh session and
+    connection of its own, as simulate_user_session does for a user.
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await open_loop_request(own_session, request_id, intended)
+    if SCENARIO is not None:
+        return await run_scenario_request(session, request_id, 0, start_time=intended)
+    if random.random() < OPEN_LOOP_READ_RATIO:
+        return await fetch_activities(session, request_id, start_time=intended)
+    return await signup_for_activity(session, request_id, start_time=intended)
+
+async def prefetch_activities(session):
+    """Pre-populate the activities list; the request is not counted in the results"""
+    reset_recorder()
+    if session is not None:
+        await fetch_activities(session, 0)
+    else:
+        async with aiohttp.ClientSession() as own_session:
+            await fetch_activities(own_session, 0)
 
 async def run_load_test(num_users, ramp_up_time=1):
     """
@@ -146,118 +579,432 @@ async def run_load_test(num_users, ramp_up_time=1):
         num_users: Number of concurrent users to simulate
         ramp_up_time: Time (in seconds) to gradually add all users
     """
-    print(f"Starting load test with {num_users} concurrent users (ramp up: {ramp_up_time}s)")
+    print(f"Starting load test with {num_users} concurrent users (ramp up: {ramp_up_time}s, "
+          f"connections: {CONNECTION_MODE}, workers: {WORKERS})")
     
-    # Pre-populate the activities list
-    async with aiohttp.ClientSession() as session:
-        await fetch_activities(session, 0)
+    reporter = create_time_series_reporter(WORKERS)
+    try:
+        if WORKERS > 1:
+            # Every worker process simulates an interleaved share of the users
+            recorder, total_time, _ = await run_in_workers(run_user_sessions, [
+                (range(worker, num_users, WORKERS), num_users, ramp_up_time)
+                for worker in range(WORKERS)
+            ], reporter)
+        else:
+            recorder, start_time, end_time, _ = await run_with_reporter(
+                run_user_sessions(range(num_users), num_users, ramp_up_time), reporter)
+            total_time = end_time - start_time
+    finally:
+        reporter.close()
     
-    start_time = time.time()
-    test_results = []
+    # Process and report results
+    stats = process_results(recorder, total_time, num_users, time_series=reporter.series)
+    stats["connection_mode"] = CONNECTION_MODE
+    stats["workers"] = WORKERS
+    stats["overbooked_activities"] = await find_overbooked_activities()
+    if CHECK_CONSISTENCY:
+        stats["consistency"] = await check_consistency()
+    record_history(f"closed-loop {num_users} users", stats)
+    return stats
+
+async def run_user_sessions(user_ids, num_users, ramp_up_time, start_at=None):
+    """
+    Run the sessions of the given users
+    
+    Args:
+        user_ids: Ids of the users to simulate, out of num_users in the whole test
+        num_users: Total number of users, used to spread the ramp-up
+        ramp_up_time: Time (in seconds) to gradually add all users
+        start_at: Wall-clock time to start at, so several processes start together
     
-    # Create tasks for all users with delay for ramp-up
-    tasks = []
-    for user_id in range(num_users):
-        # Calculate delay for this user based on ramp-up time
-        if ramp_up_time > 0 and num_users > 1:
-            delay = (user_id / (num_users - 1)) * ramp_up_time
+    Returns (ResultRecorder, start time, end time, schedule lag)
+    """
+    # In pooled mode every user shares this session's keep-alive connections
+    shared_session = create_session() if CONNECTION_MODE == "pooled" else None
+    try:
+        await prefetch_activities(shared_session)
+        
+        recorder = reset_recorder()
+        if start_at is not None:
+            await asyncio.sleep(max(0, start_at - time.time()))
+        start_time = time.time()
+        publisher = IntervalPublisher(recorder)
+        
+        # Create tasks for all users with delay for ramp-up
+        tasks = []
+        for user_id in user_ids:
+            # Calculate delay for this user based on ramp-up time
+            if ramp_up_time > 0 and num_users > 1:
+                delay = (user_id / (num_users - 1)) * ramp_up_time
+            else:
+                delay = 0
+                
+            # Create task with delay
+            tasks.append(
+                asyncio.create_task(
+                    delayed_user_session(user_id, delay, shared_session)
+                )
+            )
+        
+        # Wait for all tasks to complete
+        await asyncio.gather(*tasks)
+        end_time = time.time()
+        await publisher.stop()
+    finally:
+        if shared_session is not None:
+            await shared_session.close()
+    
+    return recorder, start_time, end_time, 0
+
+def arrival_schedule(rate, duration, profile="constant"):
+    """
+    Return the intended send times (seconds after start) of an open-loop test
+    
+    Args:
+        rate: Target arrival rate in requests per second
+        duration: Length of the test in seconds
+        profile: One of ARRIVAL_PROFILES
+    """
+    if profile not in ARRIVAL_PROFILES:
+        raise ValueError(f"Unknown arrival profile: {profile}")
+    
+    schedule = []
+    if profile == "constant":
+        schedule = [i / rate for i in range(int(rate * duration))]
+    elif profile == "poisson":
+        t = random.expovariate(rate)
+        while t < duration:
+            schedule.append(t)
+            t += random.expovariate(rate)
+    else:
+        # Each step runs for an equal share of the duration at a higher rate
+        step_length = duration / ARRIVAL_STEPS
+        for step in range(ARRIVAL_STEPS):
+            step_rate = rate * (step + 1) / ARRIVAL_STEPS
+            step_start = step * step_length
+            schedule.extend(step_start + i / step_rate for i in range(int(step_rate * step_length)))
+    return schedule
+
+async def run_open_loop_test(rate, duration, profile="constant"):
+    """
+    Run an open-loop test that sends requests at a fixed schedule
+    
+    Unlike run_load_test, new requests keep arriving on schedule however slowly
+    the server answers, so a struggling server shows up as growing latency
+    instead of quietly lower offered load (coordinated omission). Latency is
+    measured from each request's intended send time.
+    
+    Args:
+        rate: Target arrival rate in requests per second
+        duration: Length of the test in seconds
+        profile: Arrival process, one of ARRIVAL_PROFILES
+    """
+    print(f"Starting open-loop test at {rate} req/s for {duration}s ({profile} arrivals, "
+          f"connections: {CONNECTION_MODE}, workers: {WORKERS})")
+    
+    reporter = create_time_series_reporter(WORKERS)
+    try:
+        if WORKERS > 1:
+            # Every worker process sends an equal share of the target rate
+            recorder, total_time, max_lag = await run_in_workers(run_open_loop_requests, [
+                (rate, duration, profile, worker, WORKERS) for worker in range(WORKERS)
+            ], reporter)
         else:
-            delay = 0
+            recorder, start_time, end_time, max_lag = await run_with_reporter(
+                run_open_loop_requests(rate, duration, profile), reporter)
+            total_time = end_time - start_time
+    finally:
+        reporter.close()
+    
+    stats = process_results(recorder, total_time, 0, target_rate=rate, time_series=reporter.series)
+    stats["arrival_profile"] = profile
+    stats["connection_mode"] = CONNECTION_MODE
+    stats["workers"] = WORKERS
+    stats["max_schedule_lag"] = max_lag
+    if max_lag > 0.1:
+        print(f"WARNING: load generator fell {max_lag:.3f}s behind schedule; "
+              "the client may be the bottleneck")
+    stats["overbooked_activities"] = await find_overbooked_activities()
+    if CHECK_CONSISTENCY:
+        stats["consistency"] = await check_consistency()
+    record_history(f"open-loop {rate:g} rps {profile}", stats)
+    return stats
+
+async def run_open_loop_requests(rate, duration, profile, worker=0, workers=1, start_at=None):
+    """
+    Send one worker's share of an open-loop test
+    
+    The worker sends rate / workers requests per second. Request ids are
+    interleaved across workers so generated emails stay unique.
+    
+    Returns (ResultRecorder, start time, end time, schedule lag)
+    """
+    schedule = arrival_schedule(rate / workers, duration, profile)
+    # Offset evenly spaced arrivals so the workers interleave instead of bursting together
+    phase = worker / rate if profile != "poisson" else 0
+    
+    # In fresh mode every arrival opens its own session (see open_loop_request)
+    session = create_session() if CONNECTION_MODE == "pooled" else None
+    try:
+        await prefetch_activities(session)
+        
+        recorder = reset_recorder()
+        if start_at is not None:
+            await asyncio.sleep(max(0, start_at - time.time()))
+        tasks = []
+        max_lag = 0
+        start_time = time.time()
+        publisher = IntervalPublisher(recorder)
+        for i, offset in enumerate(schedule):
+            request_id = i * workers + worker
+            intended = start_time + phase + offset
+            delay = intended - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # The generator itself is behind schedule
+                max_lag = max(max_lag, -delay)
             
-        # Create task with delay
-        tasks.append(
-            asyncio.create_task(
-                delayed_user_session(user_id, delay)
-            )
-        )
+            tasks.append(asyncio.create_task(open_loop_request(session, request_id, intended)))
+        
+        await asyncio.gather(*tasks)
+        end_time = time.time()
+        await publisher.stop()
+    finally:
+        if session is not None:
+            await session.close()
+    
+    return recorder, start_time, end_time, max_lag
+
+async def run_with_reporter(coroutine, reporter):
+    """Run a single-process test, feeding its intervals straight to reporter"""
+    global INTERVAL_SINK
+    INTERVAL_SINK = reporter.add
+    try:
+        return await coroutine
+    finally:
+        INTERVAL_SINK = None
+
+def _run_in_worker_process(settings, worker, interval_queue, coroutine_function, args):
+    """Entry point of a load generator process: apply the parent's settings and run"""
+    global BASE_URL, CONNECTION_MODE, CONNECTION_LIMIT, TEST_RUN_ID, HISTOGRAM_SIGNIFICANT_FIGURES
+    global METRICS_INTERVAL, INTERVAL_SINK, SCENARIO_PATH, SCENARIO
+    (BASE_URL, CONNECTION_MODE, CONNECTION_LIMIT, TEST_RUN_ID,
+     HISTOGRAM_SIGNIFICANT_FIGURES, METRICS_INTERVAL, SCENARIO_PATH) = settings
+    if SCENARIO_PATH:
+        SCENARIO = load_scenario(SCENARIO_PATH)
+        SCENARIO.reseed(worker)
+    INTERVAL_SINK = lambda key, interval: interval_queue.put((key, interval.to_dict()))
+    recorder, start_time, end_time, max_lag = asyncio.run(coroutine_function(*args))
+    # Ship histograms back in their serialized form
+    return recorder.to_dict(), start_time, end_time, max_lag
+
+async def forward_worker_intervals(interval_queue, reporter):
+    """Pass intervals from the worker processes to reporter until a None key arrives"""
+    loop = asyncio.get_running_loop()
+    while True:
+        key, data = await loop.run_in_executor(None, interval_queue.get)
+        if key is None:
+            return
+        reporter.add(key, EndpointRecorder.from_dict(data))
+
+async def run_in_workers(coroutine_function, worker_args, reporter):
+    """
+    Run coroutine_function(*args, start_at=...) in one process per args tuple
     
-    # Wait for all tasks to complete
-    results = await asyncio.gather(*tasks)
-    for user_results in results:
-        test_results.extend(user_results)
+    The processes start together at a common wall-clock time. While they run,
+    their completed intervals are streamed to reporter; afterwards their
+    recorders are merged so the caller can summarize them as if one process
+    sent them all.
     
-    total_time = time.time() - start_time
+    Returns (ResultRecorder, total time, largest schedule lag)
+    """
+    settings = (BASE_URL, CONNECTION_MODE, CONNECTION_LIMIT, TEST_RUN_ID,
+                HISTOGRAM_SIGNIFICANT_FIGURES, METRICS_INTERVAL, SCENARIO_PATH)
+    # Give every process time to start up and warm its connections first
+    start_at = time.time() + WORKER_STARTUP_TIME
+    loop = asyncio.get_running_loop()
+    # Spawn rather than fork: forking a process with a running event loop is unsafe
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        interval_queue = manager.Queue()
+        forwarder = asyncio.create_task(forward_worker_intervals(interval_queue, reporter))
+        try:
+            with ProcessPoolExecutor(max_workers=len(worker_args), mp_context=context) as pool:
+                outcomes = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _run_in_worker_process, settings, worker, interval_queue,
+                                         coroutine_function, (*args, start_at))
+                    for worker, args in enumerate(worker_args)
+                ))
+        finally:
+            # Every worker has returned, so all their intervals are queued ahead of this
+            interval_queue.put((None, None))
+            await forwarder
     
-    # Process and report results
-    return process_results(test_results, total_time, num_users)
+    recorder = ResultRecorder()
+    for recorder_data, _, _, _ in outcomes:
+        recorder.merge(ResultRecorder.from_dict(recorder_data))
+    start_time = min(outcome[1] for outcome in outcomes)
+    end_time = max(outcome[2] for outcome in outcomes)
+    max_lag = max(outcome[3] for outcome in outcomes)
+    return recorder, end_time - start_time, max_lag
 
-async def delayed_user_session(user_id, delay):
+async def find_overbooked_activities():
+    """Check that no activity ended up with more participants than its limit"""
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{BASE_URL}/activities") as response:
+                activities_data = await response.json()
+    except Exception as e:
+        print(f"Could not verify activity capacity: {e}")
+        return []
+    
+    overbooked = [
+        name for name, details in activities_data.items()
+        if len(details["participants"]) > details["max_participants"]
+    ]
+    if overbooked:
+        print(f"WARNING: activities over capacity: {', '.join(overbooked)}")
+    else:
+        print("Capacity check passed: no activity exceeds max_participants")
+    return overbooked
+
+async def fresh_request(method, path, **kwargs):
+    """One request on a new connection; return (status, ETag, body)"""
+    # A new connection may be accepted by any server worker, so repeated
+    # probes are spread over all of them
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as session:
+        async with session.request(method, f"{BASE_URL}{path}", **kwargs) as response:
+            return response.status, response.headers.get("ETag"), await response.read()
+
+async def check_consistency(probes=CONSISTENCY_PROBES):
+    """
+    Check that all server workers serve one consistent catalog
+    
+    Run once the load is over. With several workers (python app.py --workers N)
+    every probe may hit a different worker:
+    - every catalog read returns the same ETag and the same body
+    - no activity lists a participant twice or exceeds max_participants
+    - a signup is visible to the very next read, whichever worker serves it
+    """
+    print("\n====== CONSISTENCY CHECK ======")
+    problems = []
+    try:
+        reads = [await fresh_request("GET", "/activities") for _ in range(probes)]
+        etags = {etag for _, etag, _ in reads}
+        bodies = {body for _, _, body in reads}
+        if len(etags) > 1 or len(bodies) > 1:
+            problems.append(f"catalog reads disagree: {len(etags)} ETags and {len(bodies)} bodies "
+                            f"in {probes} reads")
+        
+        catalog = json.loads(reads[-1][2])
+        for name, details in catalog.items():
+            participants = details["participants"]
+            if len(set(participants)) != len(participants):
+                problems.append(f"{name} lists a participant more than once")
+            if len(participants) > details["max_participants"]:
+                problems.append(f"{name} has {len(participants)} participants, over its limit "
+                                f"of {details['max_participants']}")
+        
+        # Read-your-writes across workers, on the activity with most room left
+        name, details = max(catalog.items(),
+                            key=lambda item: item[1]["max_participants"] - len(item[1]["participants"]))
+        room = details["max_participants"] - len(details["participants"])
+        for i in range(min(probes, room)):
+            email = f"consistency{i}_{TEST_RUN_ID}@mergington.edu"
+            status, _, _ = await fresh_request("POST", f"/activities/{quote(name, safe='')}/signup", params={"email": email})
+            if status != 200:
+                problems.append(f"signup of {email} to {name} failed with status {status}")
+                continue
+            _, _, body = await fresh_request("GET", f"/activities/{quote(name, safe='')}")
+            if email not in json.loads(body)["participants"]:
+                problems.append(f"signup of {email} to {name} was not visible to the next read")
+        if room < probes:
+            print(f"Only {room} spots left in {name}; read back {room} of {probes} signups")
+    except Exception as e:
+        problems.append(f"consistency check failed: {e}")
+    
+    for problem in problems:
+        print(f"INCONSISTENT: {problem}")
+    if not problems:
+        print(f"Consistency check passed: {probes} catalog reads agree and every new signup was read back")
+    LOAD_TEST_RESULTS["consistency"] = {"passed": not problems, "problems": problems}
+    return LOAD_TEST_RESULTS["consistency"]
+
+async def delayed_user_session(user_id, delay, session=None):
     """Run a user session after a delay"""
     if delay > 0:
         await asyncio.sleep(delay)
-    return await simulate_user_session(user_id)
+    return await simulate_user_session(user_id, session)
 
-def calculate_success_rate(results):
+def calculate_success_rate(recorder):
     """
-    Calculate the overall success rate from test results
+    Calculate the overall success rate from a ResultRecorder
     For signup requests, we consider both 200 and 400 (already signed up) as "business successes"
     """
-    success_count = sum(1 for r in results if (
-        (200 <= r.get("status", 0) < 300) or
-        r.get("is_business_success", False)
-    ))
-    return success_count / len(results) if results else 0
-
-def process_results(results, total_time, num_users):
-    """Process and display test results"""
-    # Group results by endpoint
-    endpoints = {}
-    for result in results:
-        endpoint = result["endpoint"]
-        if endpoint not in endpoints:
-            endpoints[endpoint] = []
-        endpoints[endpoint].append(result)
+    total = recorder.total_requests
+    success_count = sum(endpoint.successes for endpoint in recorder.endpoints.values())
+    return success_count / total if total else 0
+
+def process_results(recorder, total_time, num_users, target_rate=None, time_series=None):
+    """
+    Process and display test results
+    
+    num_users is the concurrency of a closed-loop test; open-loop tests pass
+    their target_rate instead. time_series holds the per-interval rows
+    streamed while the test ran.
+    """
+    total_requests = recorder.total_requests
     
     # Calculate statistics
     stats = {
         "test_duration": total_time,
-        "total_requests": len(results),
-        "requests_per_second": len(results) / total_time,
+        "total_requests": total_requests,
+        "requests_per_second": total_requests / total_time,
         "concurrent_users": num_users,
-        "success_rate": calculate_success_rate(results),
-        "endpoints": {}
+        "target_rate": target_rate,
+        "success_rate": calculate_success_rate(recorder),
+        "endpoints": {},
+        # Serialized histograms, so results of separate runs can be merged later
+        "histograms": recorder.to_dict(),
+        "time_series": time_series or []
     }
     
     # Process each endpoint
-    for endpoint, endpoint_results in endpoints.items():
-        response_times = [r["response_time"] for r in endpoint_results]
-        
-        # Count both HTTP and business successes
-        http_success_count = sum(1 for r in endpoint_results if 200 <= r.get("status", 0) < 300)
-        business_success_count = sum(1 for r in endpoint_results if r.get("is_business_success", False))
+    for endpoint, endpoint_recorder in recorder.endpoints.items():
+        requests = endpoint_recorder.requests
         
         # For signup, both 200 and 400 (already signed up) can be considered business successes
-        combined_success_count = http_success_count
+        combined_success_count = endpoint_recorder.http_successes
         if "signup" in endpoint:
-            combined_success_count = business_success_count
-            
-        error_count = len(endpoint_results) - combined_success_count
-        
-        # Calculate percentiles
-        sorted_times = sorted(response_times)
-        p50_index = int(len(sorted_times) * 0.50)
-        p95_index = int(len(sorted_times) * 0.95)
-        p99_index = int(len(sorted_times) * 0.99)
+            combined_success_count = endpoint_recorder.business_successes
         
+        latency = endpoint_recorder.histogram.summary()
         stats["endpoints"][endpoint] = {
-            "requests": len(endpoint_results),
-            "http_success_rate": http_success_count / len(endpoint_results) if endpoint_results else 0,
-            "business_success_rate": combined_success_count / len(endpoint_results) if endpoint_results else 0,
-            "error_count": error_count,
-            "min_response_time": min(response_times) if response_times else 0,
-            "max_response_time": max(response_times) if response_times else 0,
-            "avg_response_time": statistics.mean(response_times) if response_times else 0,
-            "p50_response_time": sorted_times[p50_index] if len(response_times) >= 2 else 0,
-            "p95_response_time": sorted_times[p95_index] if len(response_times) >= 20 else 0,
-            "p99_response_time": sorted_times[p99_index] if len(response_times) >= 100 else 0
+            "requests": requests,
+            "http_success_rate": endpoint_recorder.http_successes / requests if requests else 0,
+            "business_success_rate": combined_success_count / requests if requests else 0,
+            "error_count": requests - combined_success_count,
+            "error_samples": endpoint_recorder.error_samples,
+            "min_response_time": latency["min"],
+            "max_response_time": latency["max"],
+            "avg_response_time": latency["mean"],
+            "p50_response_time": latency["p50"],
+            "p90_response_time": latency["p90"],
+            "p95_response_time": latency["p95"],
+            "p99_response_time": latency["p99"],
+            "p999_response_time": latency["p999"]
         }
     
     # Print summary
     print(f"\n====== LOAD TEST RESULTS ======")
     print(f"Test duration: {total_time:.2f} seconds")
-    print(f"Concurrent users: {num_users}")
-    print(f"Total requests: {len(results)}")
-    print(f"Requests per second: {len(results) / total_time:.2f}")
+    if target_rate is not None:
+        print(f"Target arrival rate: {target_rate} requests/second")
+    else:
+        print(f"Concurrent users: {num_users}")
+    print(f"Total requests: {total_requests}")
+    print(f"Requests per second: {total_requests / total_time:.2f}")
     print(f"Overall success rate: {stats['success_rate'] * 100:.4f}%")
     print(f"Error rate: {(1 - stats['success_rate']) * 100:.4f}%")
     
@@ -267,16 +1014,16 @@ def process_results(results, total_time, num_users):
         print(f"HTTP Success rate: {data['http_success_rate'] * 100:.2f}%")
         
         if "signup" in endpoint:
-            print(f"Business Success rate (including 'already signed up'): {data['business_success_rate'] * 100:.2f}%") 
+            print(f"Business Success rate (including 'already signed up' and 'full'): {data['business_success_rate'] * 100:.2f}%") 
             
         print(f"Error count: {data['error_count']}")
         print(f"Response time (min/avg/max): {data['min_response_time']:.3f}s / {data['avg_response_time']:.3f}s / {data['max_response_time']:.3f}s")
-        print(f"P50/P95/P99 response times: {data['p50_response_time']:.3f}s / {data['p95_response_time']:.3f}s / {data.get('p99_response_time', 'N/A')}")
+        print(f"P50/P90/P99/P99.9 response times: {data['p50_response_time']:.3f}s / {data['p90_response_time']:.3f}s / "
+              f"{data['p99_response_time']:.3f}s / {data['p999_response_time']:.3f}s")
         
         # Print some sample errors
-        error_samples = [r.get("error") for r in endpoint_results if "error" in r][:3]
-        if error_samples:
-            print(f"Sample errors: {error_samples}")
+        if data["error_samples"]:
+            print(f"Sample errors: {data['error_samples']}")
     
     # Save results to file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -325,6 +1072,7 @@ def update_load_test_metrics(stats):
             "avg_response_time": round(data["avg_response_time"], 3),
             "p95_response_time": round(data["p95_response_time"], 3),
             "p99_response_time": round(data.get("p99_response_time", 0), 3),
+            "p999_response_time": round(data.get("p999_response_time", 0), 3),
             "success_rate": round(data["business_success_rate"], 4)
         }
     
@@ -336,119 +1084,338 @@ def update_load_test_metrics(stats):
     LOAD_TEST_RESULTS["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     LOAD_TEST_RESULTS["duration"] = round(stats["test_duration"], 2)
     LOAD_TEST_RESULTS["total_requests"] = stats["total_requests"]
+    LOAD_TEST_RESULTS["time_series"] = stats.get("time_series", [])
 
-async def find_maximum_throughput():
+def record_history(name, stats, extra_metrics=None):
     """
-    Find the maximum throughput that maintains the SLA requirements
-    using a binary search approach
+    Append a run to the benchmark history for regression checks
+    
+    The per-interval rows are the samples of throughput, error rate and p99,
+    leaving out the first and last intervals, which only cover part of their
+    length. name identifies the benchmark, so only runs of the same shape are
+    compared with each other.
     """
-    print("\n====== MAXIMUM THROUGHPUT TEST ======")
-    print(f"Finding maximum throughput while maintaining {(1-SLA_PARAMETERS['error_rate_threshold'])*100:.4f}% success rate")
-    
-    lower_bound = 10  # Start with a reasonable lower bound
-    upper_bound = 200  # Start with a reasonable upper bound
-    max_throughput = lower_bound
-    max_rps = 0
-    optimal_concurrency = 0
-    throughput_data = {}
-    
-    # First test various concurrency levels to find the optimal one that gives the highest throughput
-    # with acceptable error rates
-    print("\n--- Testing different concurrency levels to find optimal throughput ---")
-    concurrency_levels = [5, 10, 20, 40, 60, 80, 100, 150, 200]
-    
-    for concurrency in concurrency_levels:
-        print(f"\nTesting concurrency level: {concurrency} users")
-        stats = await run_load_test(concurrency, ramp_up_time=3)
-        success_rate = stats["success_rate"]
-        rps = stats["requests_per_second"]
-        
-        throughput_data[concurrency] = {
-            "success_rate": success_rate,
-            "requests_per_second": rps,
-            "error_rate": 1 - success_rate
-        }
-        
-        print(f"Concurrency {concurrency}: {rps:.2f} RPS, {success_rate*100:.2f}% success rate")
-        
-        # Check if this is better than our current optimum while maintaining SLA
-        if success_rate >= (1 - SLA_PARAMETERS["error_rate_threshold"]) and rps > max_rps:
-            max_rps = rps
-            optimal_concurrency = concurrency
+    if not RECORD_HISTORY:
+        return
+    if SCENARIO:
+        name += f" [{SCENARIO.name}]"
+    if WORKERS > 1:
+        name += f" x{WORKERS} workers"
+    
+    series = [row for row in stats.get("time_series", [])[1:-1] if row["requests"]]
+    histograms = stats["histograms"]
+    overall = LatencyHistogram(histograms["significant_figures"])
+    for endpoint in histograms["endpoints"].values():
+        overall.merge(LatencyHistogram.from_dict(endpoint["histogram"]))
+    metric = bench_history.metric
+    metrics = {
+        "requests_per_second": metric(stats["requests_per_second"], "higher",
+                                      [row["requests_per_second"] for row in series]),
+        "error_rate": metric(1 - stats["success_rate"], "lower", [row["error_rate"] for row in series]),
+        "p50_response_time": metric(overall.percentile(50), "lower",
+                                    [row["p50_response_time"] for row in series]),
+        "p99_response_time": metric(overall.percentile(99), "lower",
+                                    [row["p99_response_time"] for row in series]),
+    }
+    for endpoint, data in stats["endpoints"].items():
+        metrics[f"{endpoint}.p99_response_time"] = metric(data["p99_response_time"], "lower")
+    metrics.update(extra_metrics or {})
+    
+    bench_history.append_run("load_test", name, metrics)
+    print(f"Run recorded in the benchmark history: {bench_history.HISTORY_PATH}")
+
+class CapacityController:
+    """
+    Steers the arrival rate of an adaptive test towards the knee of the throughput curve
+    
+    Arrivals are judged in windows of window_intervals metrics intervals. Until
+    the first window breaches the SLA the rate grows geometrically by `step`;
+    after that it bisects between the highest rate that met the SLA and the
+    lowest one that did not. Once those are within min_step of each other the
+    controller holds the good rate for hold_windows windows, whose achieved
+    throughput is the measurement. After every rate change the first
+    settle_intervals intervals are skipped so queues built up at the old rate
+    do not count against the new one.
+    """
+    
+    def __init__(self, initial_rate, step=0.5, min_step=0.02, window_intervals=3,
+                 settle_intervals=1, hold_windows=5):
+        self.rate = initial_rate
+        self.step = step
+        self.min_step = min_step
+        self.window_intervals = window_intervals
+        self.settle_intervals = settle_intervals
+        self.hold_windows = hold_windows
+        self.phase = "search"
+        # Sustainable rate so far: always one a judged window met the SLA at
+        self.last_good_rate = None
+        self.breaking_rate = None
+        # Every rate a judged window met the SLA at
+        self._good_rates = []
+        # One entry per judged window, for the report
+        self.probes = []
+        # Achieved requests/second of every hold window that met the SLA
+        self.held = []
+        self.done = False
+        self._start_window(settle_intervals)
+    
+    def _start_window(self, settle):
+        self._settle = settle
+        self._window = EndpointRecorder(HISTOGRAM_SIGNIFICANT_FIGURES)
+        self._intervals = 0
+    
+    def observe(self, interval):
+        """Take one completed metrics interval (an EndpointRecorder)"""
+        if self.done:
+            return
+        if self._settle:
+            self._settle -= 1
+            return
+        self._window.merge(interval)
+        self._intervals += 1
+        if self._intervals >= self.window_intervals:
+            self._judge()
+    
+    def _judge(self):
+        window = self._window
+        achieved = window.requests / (self._intervals * METRICS_INTERVAL)
+        error_rate = 1 - window.successes / window.requests if window.requests else 1
+        p99 = window.histogram.percentile(99)
+        meets_sla = (window.requests > 0
+                     and error_rate <= SLA_PARAMETERS["error_rate_threshold"]
+                     and p99 <= SLA_PARAMETERS["p99_response_time_threshold"])
+        self.probes.append({
+            "phase": self.phase,
+            "target_rate": round(self.rate, 2),
+            "achieved_rps": round(achieved, 2),
+            "p99_response_time": round(p99, 4),
+            "error_rate": round(error_rate, 5),
+            "meets_sla": meets_sla
+        })
+        print(f"\n{self.phase}: {self.rate:.1f} req/s -> {achieved:.1f} req/s achieved, "
+              f"p99 {p99 * 1000:.1f}ms, errors {error_rate * 100:.3f}% "
+              f"({'meets SLA' if meets_sla else 'breaches SLA'})")
         
-        # If we're seeing high error rates, there's no need to test higher concurrency
-        if success_rate < 0.90:  # 90% success rate threshold
-            print(f"High error rate detected at concurrency {concurrency}. Stopping higher concurrency tests.")
-            break
-    
-    # Once we've tested various concurrency levels, use binary search to fine-tune
-    if optimal_concurrency > 0:
-        print(f"\nOptimal concurrency level identified: {optimal_concurrency} users")
-        print(f"Maximum throughput: {max_rps:.2f} requests/second")
-        print(f"Success rate: {throughput_data[optimal_concurrency]['success_rate']*100:.2f}%")
+        old_rate = self.rate
+        if meets_sla:
+            self._good_rates.append(self.rate)
+        if self.phase == "hold":
+            if meets_sla:
+                self.last_good_rate = self.rate
+                self.held.append(achieved)
+                self.done = len(self.held) >= self.hold_windows
+            else:
+                # Not sustainable after all: step down and measure again. The
+                # lower rate is unmeasured, so the good rate falls back to the
+                # best one below the breach that actually met the SLA.
+                self.breaking_rate = self.rate
+                self.rate *= 1 - self.min_step
+                self.last_good_rate = max((rate for rate in self._good_rates if rate < self.breaking_rate),
+                                          default=None)
+                self.held = []
+        else:
+            if meets_sla:
+                self.last_good_rate = self.rate
+            else:
+                self.breaking_rate = min(self.rate, self.breaking_rate or self.rate)
+            
+            if self.breaking_rate is None:
+                self.rate *= 1 + self.step
+            elif self.last_good_rate is None:
+                # Even the starting rate breaches the SLA
+                self.rate /= 2
+                self.done = self.rate < 1
+            elif self.breaking_rate <= self.last_good_rate * (1 + self.min_step):
+                self.phase = "hold"
+                self.rate = self.last_good_rate
+            else:
+                self.rate = (self.last_good_rate + self.breaking_rate) / 2
         
-        # Fine-tune around the optimal concurrency
-        lower_bound = max(5, optimal_concurrency - 20)
-        upper_bound = optimal_concurrency + 20
+        # A breach leaves a backlog behind, so give it longer to drain
+        settle = 0 if self.rate == old_rate else self.settle_intervals
+        if not meets_sla:
+            settle += self.settle_intervals
+        self._start_window(settle)
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_CRITICAL_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+                 8: 2.306, 9: 2.262, 10: 2.228, 15: 2.131, 20: 2.086, 30: 2.042}
+
+def confidence_interval(values):
+    """95% confidence interval (low, high) of the mean of values, None for fewer than two"""
+    if len(values) < 2:
+        return None
+    mean = statistics.mean(values)
+    degrees = len(values) - 1
+    # Round the degrees of freedom down, which widens the interval slightly
+    t = T_CRITICAL_95[max(k for k in T_CRITICAL_95 if k <= degrees)] if degrees <= 30 else 1.96
+    margin = t * statistics.stdev(values) / len(values) ** 0.5
+    return mean - margin, mean + margin
+
+async def run_adaptive_test(initial_rate, max_duration):
+    """
+    Search for the maximum sustainable arrival rate in one sustained open-loop run
+    
+    Requests arrive at evenly spaced intended times whose spacing follows the
+    CapacityController's current rate; as in run_open_loop_test, latency is
+    measured from the intended send time. The run ends when the controller
+    has finished holding the rate it converged on, or after max_duration
+    seconds.
+    
+    With several WORKERS every process sends an interleaved share of the
+    rate. The controller judges each interval once all workers have reported
+    it, merged by the TimeSeriesReporter, and the workers pick up its rate
+    changes from a shared control dict.
+    
+    Returns (controller, stats of the whole run)
+    """
+    print(f"Starting adaptive capacity search from {initial_rate} req/s "
+          f"(at most {max_duration}s, connections: {CONNECTION_MODE}, workers: {WORKERS})")
+    
+    controller = CapacityController(initial_rate)
+    reporter = create_time_series_reporter(WORKERS)
+    
+    def steer(control):
+        def observe(key, interval):
+            controller.observe(interval)
+            control.update(rate=controller.rate, done=controller.done)
+        reporter.on_emit = observe
+    
+    try:
+        if WORKERS > 1:
+            context = multiprocessing.get_context("spawn")
+            with context.Manager() as manager:
+                control = manager.dict(rate=initial_rate, done=False, max_duration=max_duration)
+                steer(control)
+                recorder, total_time, max_lag = await run_in_workers(run_adaptive_requests, [
+                    (control, worker, WORKERS) for worker in range(WORKERS)
+                ], reporter)
+        else:
+            control = {"rate": initial_rate, "done": False, "max_duration": max_duration}
+            steer(control)
+            recorder, start_time, end_time, max_lag = await run_with_reporter(
+                run_adaptive_requests(control), reporter)
+            total_time = end_time - start_time
+    finally:
+        reporter.close()
+    
+    if max_lag > 0.1:
+        print(f"WARNING: load generator fell {max_lag:.3f}s behind schedule; "
+              "the client may be the bottleneck")
+    stats = process_results(recorder, total_time, 0,
+                            target_rate=controller.last_good_rate, time_series=reporter.series)
+    stats["max_schedule_lag"] = max_lag
+    stats["connection_mode"] = CONNECTION_MODE
+    stats["workers"] = WORKERS
+    stats["overbooked_activities"] = await find_overbooked_activities()
+    if CHECK_CONSISTENCY:
+        stats["consistency"] = await check_consistency()
+    return controller, stats
+
+async def run_adaptive_requests(control, worker=0, workers=1, start_at=None):
+    """
+    Send one worker's share of an adaptive test
+    
+    control holds the target "rate" of the whole test, whether the search is
+    "done", and "max_duration". It is a plain dict in a single process and a
+    manager proxy shared with the parent otherwise, so it is re-read at most
+    every RATE_POLL_INTERVAL seconds rather than for every request.
+    
+    Returns (ResultRecorder, start time, end time, schedule lag)
+    """
+    state = control.copy()
+    # In fresh mode every arrival opens its own session (see open_loop_request)
+    session = create_session() if CONNECTION_MODE == "pooled" else None
+    try:
+        await prefetch_activities(session)
         
-        # Binary search to find the precise optimal concurrency
-        while upper_bound - lower_bound > 5:
-            mid = (lower_bound + upper_bound) // 2
-            print(f"\nFine-tuning: Testing {mid} users")
+        recorder = reset_recorder()
+        if start_at is not None:
+            await asyncio.sleep(max(0, start_at - time.time()))
+        tasks = set()
+        max_lag = 0
+        request_index = 0
+        start_time = polled = time.time()
+        publisher = IntervalPublisher(recorder)
+        # Offset the workers so their evenly spaced arrivals interleave
+        intended = start_time + worker / state["rate"]
+        while not state["done"] and intended - start_time < state["max_duration"]:
+            delay = intended - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # The generator itself is behind schedule
+                max_lag = max(max_lag, -delay)
             
-            stats = await run_load_test(mid, ramp_up_time=3)
-            success_rate = stats["success_rate"]
-            rps = stats["requests_per_second"]
+            # Request ids are interleaved across workers so generated emails stay unique
+            task = asyncio.create_task(open_loop_request(session, request_index * workers + worker, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            request_index += 1
+            intended += workers / state["rate"]
             
-            if success_rate >= (1 - SLA_PARAMETERS["error_rate_threshold"]):
-                # This maintains SLA, so it's a potential candidate
-                if rps > max_rps:
-                    max_rps = rps
-                    optimal_concurrency = mid
-                
-                # Still maintaining SLA, try higher
-                lower_bound = mid
-            else:
-                # Not maintaining SLA, try lower
-                upper_bound = mid
+            if time.time() - polled >= RATE_POLL_INTERVAL:
+                state = control.copy()
+                polled = time.time()
         
-        max_throughput = optimal_concurrency
+        await asyncio.gather(*tasks)
+        end_time = time.time()
+        await publisher.stop()
+    finally:
+        if session is not None:
+            await session.close()
+    
+    return recorder, start_time, end_time, max_lag
+
+async def find_maximum_throughput(initial_rate=50, max_duration=300):
+    """
+    Find the maximum throughput that maintains the SLA requirements
+    
+    Uses a single adaptive open-loop run (see CapacityController) instead of
+    a separate ramped-up test per candidate load.
+    """
+    print("\n====== MAXIMUM THROUGHPUT TEST ======")
+    print(f"Finding maximum throughput while maintaining {(1-SLA_PARAMETERS['error_rate_threshold'])*100:.4f}% "
+          f"success rate and p99 below {SLA_PARAMETERS['p99_response_time_threshold']}s")
+    
+    controller, stats = await run_adaptive_test(initial_rate, max_duration)
+    
+    if controller.held:
+        max_rps = statistics.mean(controller.held)
+        interval = confidence_interval(controller.held)
     else:
-        print("\nNo concurrency level found that maintains SLA requirements.")
-        # Use the best of what we have
-        if throughput_data:
-            best_concurrency = max(throughput_data.items(), key=lambda x: x[1]["requests_per_second"] * x[1]["success_rate"])[0]
-            max_throughput = best_concurrency
-            max_rps = throughput_data[best_concurrency]["requests_per_second"]
-            optimal_concurrency = best_concurrency
-    
-    # Final validation test with the optimal concurrency
-    print(f"\n--- Final validation with {max_throughput} users ---")
-    final_stats = await run_load_test(max_throughput, ramp_up_time=5)
+        # Ran out of time before the hold phase measured the rate
+        max_rps = controller.last_good_rate or 0
+        interval = None
     
     print("\n====== MAXIMUM THROUGHPUT RESULTS ======")
-    print(f"Maximum users while maintaining {(1-SLA_PARAMETERS['error_rate_threshold'])*100:.4f}% success rate: {max_throughput}")
-    print(f"Maximum requests per second: {max_rps:.2f}")
-    print(f"Final validation success rate: {final_stats['success_rate']*100:.4f}%")
-    print(f"Final validation error rate: {(1-final_stats['success_rate'])*100:.4f}%")
+    if not controller.done:
+        print(f"Search did not converge within {max_duration}s; results are a lower bound")
+    print(f"Maximum sustainable requests per second: {max_rps:.2f}")
+    if interval:
+        print(f"95% confidence interval: {interval[0]:.2f} - {interval[1]:.2f} requests/second")
+    if controller.breaking_rate:
+        print(f"Lowest rate that breached the SLA: {controller.breaking_rate:.2f} requests/second")
     
     # Save the optimization results
     LOAD_TEST_RESULTS["optimization"] = {
-        "optimal_concurrency": optimal_concurrency,
         "max_throughput_rps": round(max_rps, 2),
-        "concurrency_tests": {
-            str(k): {
-                "success_rate": round(v["success_rate"], 4),
-                "requests_per_second": round(v["requests_per_second"], 2),
-                "error_rate": round(v["error_rate"], 4)
-            } for k, v in throughput_data.items()
-        }
+        "confidence_interval": [round(bound, 2) for bound in interval] if interval else None,
+        "breaking_rate": round(controller.breaking_rate, 2) if controller.breaking_rate else None,
+        "converged": controller.done,
+        "probes": controller.probes
     }
     
+    # The held intervals are the samples of the sustainable rate; the
+    # per-interval rows of a search mix many rates and are not comparable
+    record_history("capacity search", {**stats, "time_series": []}, {
+        "max_throughput_rps": bench_history.metric(max_rps, "higher", controller.held)
+    })
+    
     # Save to performance_metrics.json for integration with the reports
     save_to_performance_metrics()
     
-    return max_throughput, max_rps
+    return max_rps, interval
 
 def save_to_performance_metrics():
     """Save the load test results to the performance_metrics.json file to integrate with the reporting system"""
@@ -482,8 +1449,9 @@ def save_to_performance_metrics():
                                                                                                       existing_metrics["throughput"].get("requests_per_second", 0))
         existing_metrics["throughput"]["concurrent_users"] = LOAD_TEST_RESULTS["optimization"].get("optimal_concurrency", 
                                                                                                   existing_metrics["throughput"].get("concurrent_users", 0))
-        if "concurrency_tests" in LOAD_TEST_RESULTS["optimization"]:
-            existing_metrics["throughput"]["all_concurrency_tests"] = LOAD_TEST_RESULTS["optimization"]["concurrency_tests"]
+        if "probes" in LOAD_TEST_RESULTS["optimization"]:
+            existing_metrics["throughput"]["confidence_interval"] = LOAD_TEST_RESULTS["optimization"]["confidence_interval"]
+            existing_metrics["throughput"]["capacity_probes"] = LOAD_TEST_RESULTS["optimization"]["probes"]
     
     # Save updated metrics back to file
     with open(metrics_path, "w") as f:
@@ -500,6 +1468,27 @@ def generate_load_test_report(report_dir):
     
     html_path = report_dir / "load_test_summary.html"
     
+    # Per-interval series of the last test, for the over-time charts
+    time_series = LOAD_TEST_RESULTS.get("time_series", [])
+    elapsed_labels = json.dumps([round(row["elapsed"], 1) for row in time_series])
+    interval_rps = json.dumps([round(row["requests_per_second"], 2) for row in time_series])
+    interval_error_rates = json.dumps([round(row["error_rate"] * 100, 3) for row in time_series])
+    interval_latency = {
+        percentile: json.dumps([round(row[f"{percentile}_response_time"] * 1000, 2) for row in time_series])
+        for percentile in ("p50", "p90", "p99")
+    }
+    
+    # Windows judged by the adaptive capacity search
+    optimization = LOAD_TEST_RESULTS.get("optimization", {})
+    probes = optimization.get("probes", [])
+    confidence = optimization.get("confidence_interval")
+    probe_rows = "".join(
+        f"<tr><td>{i + 1}</td><td>{probe['phase']}</td><td>{probe['target_rate']}</td><td>{probe['achieved_rps']}</td>"
+        f"<td>{probe['p99_response_time']}s</td><td>{probe['error_rate'] * 100:.3f}%</td>"
+        f"<td class=\"{'passed' if probe['meets_sla'] else 'failed'}\">{'MET' if probe['meets_sla'] else 'BREACHED'}</td></tr>"
+        for i, probe in enumerate(probes)
+    )
+    
     # Create a simple HTML report
     html_content = f'''
     <html>
@@ -529,27 +1518,33 @@ def generate_load_test_report(report_dir):
         <h2>Throughput Results</h2>
         <table>
             <tr><th>Metric</th><th>Value</th></tr>
-            <tr><td>Optimal Concurrent Users</td><td>{LOAD_TEST_RESULTS.get("optimization", {}).get("optimal_concurrency", "N/A")}</td></tr>
-            <tr><td>Maximum Throughput (RPS)</td><td>{LOAD_TEST_RESULTS.get("optimization", {}).get("max_throughput_rps", "N/A")}</td></tr>
+            <tr><td>Maximum Sustainable Throughput (RPS)</td><td>{optimization.get("max_throughput_rps", "N/A")}</td></tr>
+            <tr><td>95% Confidence Interval (RPS)</td><td>{f"{confidence[0]} - {confidence[1]}" if confidence else "N/A"}</td></tr>
+            <tr><td>Lowest Rate Breaching the SLA (RPS)</td><td>{optimization.get("breaking_rate") or "N/A"}</td></tr>
             <tr><td>Success Rate at Max Throughput</td><td>{LOAD_TEST_RESULTS.get("throughput", {}).get("success_rate", "N/A") * 100:.2f}%</td></tr>
             <tr><td>Error Rate at Max Throughput</td><td>{(1 - LOAD_TEST_RESULTS.get("throughput", {}).get("success_rate", 0)) * 100:.2f}%</td></tr>
         </table>
         
-        <h2>Concurrency Test Results</h2>
+        <h2>Capacity Search</h2>
         <div class="chart-container">
             <canvas id="throughputChart"></canvas>
         </div>
         
         <table>
-            <tr><th>Concurrency</th><th>RPS</th><th>Success Rate</th><th>Error Rate</th></tr>
-            {
-                ''.join([
-                    f"<tr><td>{c}</td><td>{data['requests_per_second']}</td><td>{data['success_rate']*100:.2f}%</td><td>{data['error_rate']*100:.2f}%</td></tr>"
-                    for c, data in sorted(LOAD_TEST_RESULTS.get("optimization", {}).get("concurrency_tests", {}).items(), key=lambda x: int(x[0]))
-                ])
-            }
+            <tr><th>Window</th><th>Phase</th><th>Target RPS</th><th>Achieved RPS</th><th>P99 Response Time</th><th>Error Rate</th><th>SLA</th></tr>
+            {probe_rows}
         </table>
         
+        <h2>Throughput Over Time</h2>
+        <div class="chart-container">
+            <canvas id="throughputOverTimeChart"></canvas>
+        </div>
+        
+        <h2>Latency Over Time</h2>
+        <div class="chart-container">
+            <canvas id="latencyOverTimeChart"></canvas>
+        </div>
+        
         <h2>SLA Metrics</h2>
         <table>
             <tr><th>Metric</th><th>Value</th><th>SLA Target</th><th>Status</th></tr>
@@ -573,25 +1568,29 @@ def generate_load_test_report(report_dir):
         
         <script>
             // Extract data for charts
-            const concurrencyLevels = [
-                {', '.join([c for c in sorted(LOAD_TEST_RESULTS.get("optimization", {}).get("concurrency_tests", {}).keys(), key=int)])}
-            ];
-            const rpsValues = [
-                {', '.join([str(data['requests_per_second']) for c, data in sorted(LOAD_TEST_RESULTS.get("optimization", {}).get("concurrency_tests", {}).items(), key=lambda x: int(x[0]))])}
-            ];
-            const successRates = [
-                {', '.join([str(data['success_rate']*100) for c, data in sorted(LOAD_TEST_RESULTS.get("optimization", {}).get("concurrency_tests", {}).items(), key=lambda x: int(x[0]))])}
-            ];
+            const probeWindows = {json.dumps(list(range(1, len(probes) + 1)))};
+            const targetRates = {json.dumps([probe["target_rate"] for probe in probes])};
+            const rpsValues = {json.dumps([probe["achieved_rps"] for probe in probes])};
+            const successRates = {json.dumps([round((1 - probe["error_rate"]) * 100, 3) for probe in probes])};
             
             // Create throughput chart
             const throughputCtx = document.getElementById('throughputChart').getContext('2d');
             new Chart(throughputCtx, {{
                 type: 'line',
                 data: {{
-                    labels: concurrencyLevels,
+                    labels: probeWindows,
                     datasets: [
                         {{
-                            label: 'Requests per Second',
+                            label: 'Target Requests per Second',
+                            borderColor: 'rgb(153, 102, 255)',
+                            backgroundColor: 'rgba(153, 102, 255, 0.1)',
+                            yAxisID: 'y',
+                            data: targetRates,
+                            borderDash: [5, 5],
+                            tension: 0.1
+                        }},
+                        {{
+                            label: 'Achieved Requests per Second',
                             borderColor: 'rgb(54, 162, 235)',
                             backgroundColor: 'rgba(54, 162, 235, 0.1)',
                             yAxisID: 'y',
@@ -642,6 +1641,118 @@ def generate_load_test_report(report_dir):
                     }}
                 }}
             }});
+            
+            // Per-interval series of the last test run
+            const elapsedLabels = {elapsed_labels};
+            
+            new Chart(document.getElementById('throughputOverTimeChart').getContext('2d'), {{
+                type: 'line',
+                data: {{
+                    labels: elapsedLabels,
+                    datasets: [
+                        {{
+                            label: 'Requests per Second',
+                            borderColor: 'rgb(54, 162, 235)',
+                            backgroundColor: 'rgba(54, 162, 235, 0.1)',
+                            yAxisID: 'y',
+                            data: {interval_rps},
+                            tension: 0.1
+                        }},
+                        {{
+                            label: 'Error Rate (%)',
+                            borderColor: 'rgb(255, 99, 132)',
+                            backgroundColor: 'rgba(255, 99, 132, 0.1)',
+                            yAxisID: 'y1',
+                            data: {interval_error_rates},
+                            tension: 0.1
+                        }}
+                    ]
+                }},
+                options: {{
+                    responsive: true,
+                    interaction: {{
+                        mode: 'index',
+                        intersect: false,
+                    }},
+                    scales: {{
+                        x: {{
+                            title: {{
+                                display: true,
+                                text: 'Elapsed Time (s)'
+                            }}
+                        }},
+                        y: {{
+                            type: 'linear',
+                            position: 'left',
+                            title: {{
+                                display: true,
+                                text: 'Requests per Second'
+                            }}
+                        }},
+                        y1: {{
+                            type: 'linear',
+                            position: 'right',
+                            title: {{
+                                display: true,
+                                text: 'Error Rate (%)'
+                            }},
+                            min: 0,
+                            grid: {{
+                                drawOnChartArea: false,
+                            }}
+                        }}
+                    }}
+                }}
+            }});
+            
+            new Chart(document.getElementById('latencyOverTimeChart').getContext('2d'), {{
+                type: 'line',
+                data: {{
+                    labels: elapsedLabels,
+                    datasets: [
+                        {{
+                            label: 'P50 (ms)',
+                            borderColor: 'rgb(75, 192, 192)',
+                            data: {interval_latency["p50"]},
+                            tension: 0.1
+                        }},
+                        {{
+                            label: 'P90 (ms)',
+                            borderColor: 'rgb(255, 159, 64)',
+                            data: {interval_latency["p90"]},
+                            tension: 0.1
+                        }},
+                        {{
+                            label: 'P99 (ms)',
+                            borderColor: 'rgb(255, 99, 132)',
+                            data: {interval_latency["p99"]},
+                            tension: 0.1
+                        }}
+                    ]
+                }},
+                options: {{
+                    responsive: true,
+                    interaction: {{
+                        mode: 'index',
+                        intersect: false,
+                    }},
+                    scales: {{
+                        x: {{
+                            title: {{
+                                display: true,
+                                text: 'Elapsed Time (s)'
+                            }}
+                        }},
+                        y: {{
+                            title: {{
+                                display: true,
+                                text: 'Response Time (ms)'
+                            }},
+                            min: 0
+                        }}
+                    }}
+                }}
+            }});
         </script>
     </body>
     </html>
@@ -654,18 +1765,69 @@ def generate_load_test_report(report_dir):
 
 async def main():
     """Parse arguments and run tests"""
+    global CONNECTION_MODE, CONNECTION_LIMIT, WORKERS, HISTOGRAM_SIGNIFICANT_FIGURES
+    global METRICS_INTERVAL, TIME_SERIES_PATH, LIVE_OUTPUT, SCENARIO_PATH, SCENARIO, RECORD_HISTORY
+    global CHECK_CONSISTENCY
     parser = argparse.ArgumentParser(description="Load Testing for High School Activities API")
     parser.add_argument("--users", type=int, default=50, help="Number of concurrent users to simulate")
     parser.add_argument("--ramp-up", type=float, default=5.0, help="Ramp-up time in seconds")
     parser.add_argument("--find-max", action="store_true", help="Find maximum throughput that maintains SLA")
     parser.add_argument("--optimize", action="store_true", help="Optimize for throughput with the lowest fail rate")
+    parser.add_argument("--rate", type=float,
+                        help="Run an open-loop test at this many requests/second instead of a fixed user count")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duration of an open-loop test in seconds")
+    parser.add_argument("--max-duration", type=float, default=300.0,
+                        help="Time limit in seconds of the adaptive search run by --find-max (--rate sets its starting rate)")
+    parser.add_argument("--arrival", choices=ARRIVAL_PROFILES, default="constant",
+                        help="Arrival process for the open-loop test")
+    parser.add_argument("--connection-mode", choices=["pooled", "fresh"], default=CONNECTION_MODE,
+                        help="Share one keep-alive connection pool across users, or open a fresh session "
+                             "per user (per request in open-loop and adaptive tests)")
+    parser.add_argument("--connection-limit", type=int, default=CONNECTION_LIMIT,
+                        help="Maximum connections in the shared pool (0 for unlimited)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Number of load generator processes to split users or rate across")
+    parser.add_argument("--histogram-precision", type=int, default=HISTOGRAM_SIGNIFICANT_FIGURES,
+                        help="Significant digits kept by the latency histograms (1-5)")
+    parser.add_argument("--interval", type=float, default=METRICS_INTERVAL,
+                        help="Length in seconds of the intervals reported while the test runs")
+    parser.add_argument("--timeseries-file",
+                        help="JSONL file to stream per-interval metrics to (default: timestamped file)")
+    parser.add_argument("--no-live", action="store_true",
+                        help="Do not print per-interval metrics while the test runs")
+    parser.add_argument("--scenario",
+                        help="Scenario file (JSON, or YAML with PyYAML) defining the request mix; see src/scenarios")
+    parser.add_argument("--check-consistency", action="store_true",
+                        help="After the test, check that all server workers serve one consistent catalog")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the benchmark history used for regression checks")
     args = parser.parse_args()
     
+    RECORD_HISTORY = not args.no_history
+    CHECK_CONSISTENCY = args.check_consistency
+    if args.scenario:
+        SCENARIO_PATH = args.scenario
+        SCENARIO = load_scenario(args.scenario)
+        print(f"Using scenario: {SCENARIO.name}")
+    METRICS_INTERVAL = args.interval
+    TIME_SERIES_PATH = args.timeseries_file
+    LIVE_OUTPUT = not args.no_live
+    HISTOGRAM_SIGNIFICANT_FIGURES = args.histogram_precision
+    WORKERS = max(1, args.workers)
+    CONNECTION_MODE = args.connection_mode
+    CONNECTION_LIMIT = args.connection_limit
+    
     if args.find_max or args.optimize:
-        await find_maximum_throughput()
+        await find_maximum_throughput(args.rate or 50, args.max_duration)
+    elif args.rate:
+        stats = await run_open_loop_test(args.rate, args.duration, args.arrival)
+        save_to_performance_metrics()
     else:
         stats = await run_load_test(args.users, args.ramp_up)
         save_to_performance_metrics()
+    
+    if CHECK_CONSISTENCY and not LOAD_TEST_RESULTS["consistency"]["passed"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
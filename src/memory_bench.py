@@ -0,0 +1,140 @@
+"""
+Memory held by the in-memory store backends at growing catalog sizes
+
+Builds generated catalogs (see seed_data.py) into InMemoryStore and
+ColumnarStore and reports, for each, the memory the store retains once the
+seed catalog is gone (traced with tracemalloc), the bytes per signup, and
+the time to build the count-only catalog view (?include_participants=false),
+which ColumnarStore computes from its count columns.
+
+Before measuring, the benchmark checks that both stores return the same
+catalog.
+
+Usage:
+    python memory_bench.py [--sizes 1000,10000,100000] [--participants-per-activity 10] [--json results.json]
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+import bench_history
+import columnar_store
+from columnar_store import ColumnarStore
+from seed_data import generate_catalog
+from store import InMemoryStore
+
+BACKENDS = {
+    "memory": InMemoryStore,
+    "columnar": ColumnarStore,
+}
+
+
+def build_catalog(num_activities, args):
+    return generate_catalog(num_activities, num_activities * args.participants_per_activity, args.skew)
+
+
+def retained_memory(backend, num_activities, args):
+    """(store, bytes allocated by building the store that are still alive once the seed is dropped)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        store = BACKENDS[backend](build_catalog(num_activities, args))
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return store, current
+
+
+def summary_ms(store, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        store.get_catalog_summary()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run_size(num_activities, args):
+    expected = build_catalog(num_activities, args)
+    signups = sum(len(details["participants"]) for details in expected.values())
+    results = []
+    for backend in BACKENDS:
+        store, retained = retained_memory(backend, num_activities, args)
+        if store.get_catalog() != expected:
+            raise AssertionError(f"{backend} store returns a different catalog")
+        samples = summary_ms(store, args.rounds)
+        results.append({
+            "backend": backend,
+            "activities": num_activities,
+            "signups": signups,
+            "bytes": retained,
+            "bytes_per_signup": retained / max(signups, 1),
+            "summary_ms": statistics.median(samples),
+            "summary_ms_rounds": samples
+        })
+        del store
+    return results
+
+
+def print_results(results):
+    baseline = results[0]["bytes"]
+    for result in results:
+        print(f"{result['backend']:<10} {result['bytes'] / 2**20:>12.1f} {result['bytes_per_signup']:>14.1f} "
+              f"{baseline / result['bytes']:>9.1f}x {result['summary_ms']:>12.2f}")
+
+
+def record_history(results, size):
+    metrics = {}
+    for result in results:
+        metrics[f"{result['backend']} bytes per signup"] = bench_history.metric(result["bytes_per_signup"], "lower")
+        metrics[f"{result['backend']} count-only catalog ms"] = bench_history.metric(
+            result["summary_ms"], "lower", result["summary_ms_rounds"])
+    bench_history.append_run("memory_bench", f"{size} activities", metrics)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory held by the in-memory store backends by catalog size")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated numbers of activities")
+    parser.add_argument("--participants-per-activity", type=int, default=10,
+                        help="Average participants per activity in the generated catalogs")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of participant counts")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="Timed count-only catalog builds per store; the median is reported")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the benchmark history used for regression checks")
+    args = parser.parse_args(argv)
+
+    if columnar_store.numpy is None:
+        print("numpy is not installed; ColumnarStore computes counts with plain arrays")
+    all_results = []
+    for size in sorted({int(size) for size in args.sizes.split(",")}):
+        print(f"\nCatalog: {size:,} activities, about {size * args.participants_per_activity:,} signups")
+        print(f"{'store':<10} {'retained MB':>12} {'bytes/signup':>14} {'saving':>10} {'summary ms':>12}")
+        results = run_size(size, args)
+        print_results(results)
+        all_results.extend(results)
+        if not args.no_history:
+            record_history(results, size)
+    if not args.no_history:
+        print(f"\nRuns recorded in the benchmark history: {bench_history.HISTORY_PATH}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": sys.version.split()[0],
+                "numpy": columnar_store.numpy is not None,
+                "results": all_results
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Declarative workload definitions for the load generator
+
+A scenario file describes what simulated users do instead of the built-in
+"view the catalog once, sign up once" session:
+
+    {
+        "name": "signup-rush",
+        "seed": 42,
+        "requests": [
+            {"action": "view_activities", "weight": 60},
+            {"action": "view_activity", "weight": 10},
+            {"action": "signup", "weight": 30}
+        ],
+        "requests_per_session": [3, 8],
+        "think_time": {"distribution": "exponential", "mean": 0.5},
+        "activity_popularity": {"distribution": "zipf", "s": 1.2},
+        "duplicate_signup_ratio": 0.05,
+        "emails": {"generator": "names", "domain": "mergington.edu"}
+    }
+
+Only "requests" is required; the available actions are listed in ACTIONS.
+An "unregister" drops one of the scenario's earlier signups, so mixing it
+with "signup" gives a churn workload (see scenarios/churn.json). Scenario files
+are JSON; files ending in .yaml or .yml are read as YAML when PyYAML is
+installed.
+
+Closed-loop tests run requests_per_session requests per user, sleeping a
+think time between them. Open-loop tests pick one request per arrival and
+ignore think times, since the arrival schedule already sets the pace.
+"""
+import json
+import random
+from collections import deque
+from itertools import accumulate
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional
+    yaml = None
+
+# Request types a scenario can mix
+ACTIONS = ("view_activities", "view_activity", "view_participants", "signup", "unregister")
+
+THINK_TIME_DISTRIBUTIONS = ("constant", "uniform", "exponential")
+
+POPULARITY_DISTRIBUTIONS = ("uniform", "zipf")
+
+EMAIL_GENERATORS = ("sequential", "names")
+
+# Signups remembered per process for deliberate duplicate signups
+MAX_REMEMBERED_SIGNUPS = 10000
+
+_FIRST_NAMES = ("emma", "liam", "olivia", "noah", "ava", "elijah", "sophia", "lucas",
+                "mia", "mason", "amelia", "ethan", "harper", "logan", "evelyn", "james")
+_LAST_NAMES = ("smith", "johnson", "garcia", "brown", "lee", "martinez", "davis", "lopez",
+               "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin", "white")
+
+
+def load_scenario(path):
+    """Read and validate a scenario file"""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError(f"{path} is YAML, but PyYAML is not installed; use JSON or pip install pyyaml")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    return Scenario(data, name=path.stem)
+
+
+class Scenario:
+    """A validated workload definition plus the random state it draws from"""
+
+    def __init__(self, data, name=None):
+        if not isinstance(data, dict):
+            raise ValueError("A scenario must be a mapping")
+        self.name = data.get("name", name or "scenario")
+        self.seed = data.get("seed")
+        self.random = random.Random(self.seed)
+
+        requests = data.get("requests")
+        if not requests:
+            raise ValueError("A scenario needs a non-empty 'requests' list")
+        for request in requests:
+            if request.get("action") not in ACTIONS:
+                raise ValueError(f"Unknown action {request.get('action')!r}; expected one of {', '.join(ACTIONS)}")
+            if request.get("weight", 1) < 0:
+                raise ValueError("Request weights must not be negative")
+        self.actions = [request["action"] for request in requests]
+        self._action_weights = list(accumulate(request.get("weight", 1) for request in requests))
+        if not self._action_weights[-1] > 0:
+            raise ValueError("At least one request needs a positive weight")
+
+        session_length = data.get("requests_per_session", 1)
+        if isinstance(session_length, int):
+            session_length = [session_length, session_length]
+        if len(session_length) != 2 or not 1 <= session_length[0] <= session_length[1]:
+            raise ValueError("requests_per_session must be a positive count or a [min, max] range")
+        self.session_length = tuple(session_length)
+
+        self.think_time = data.get("think_time", {"distribution": "constant", "value": 0})
+        if self.think_time.get("distribution") not in THINK_TIME_DISTRIBUTIONS:
+            raise ValueError(f"think_time distribution must be one of {', '.join(THINK_TIME_DISTRIBUTIONS)}")
+
+        self.popularity = data.get("activity_popularity", {"distribution": "uniform"})
+        if self.popularity.get("distribution") not in POPULARITY_DISTRIBUTIONS:
+            raise ValueError(f"activity_popularity distribution must be one of {', '.join(POPULARITY_DISTRIBUTIONS)}")
+
+        self.duplicate_signup_ratio = data.get("duplicate_signup_ratio", 0)
+        if not 0 <= self.duplicate_signup_ratio <= 1:
+            raise ValueError("duplicate_signup_ratio must be between 0 and 1")
+
+        self.emails = data.get("emails", {"generator": "sequential"})
+        if self.emails.get("generator") not in EMAIL_GENERATORS:
+            raise ValueError(f"emails generator must be one of {', '.join(EMAIL_GENERATORS)}")
+
+        # Activity order and cumulative weights, built once the catalog is known
+        self._source = None
+        self._activities = None
+        self._activity_weights = None
+        self._signups = deque(maxlen=MAX_REMEMBERED_SIGNUPS)
+
+    def reseed(self, offset):
+        """Give a worker process its own reproducible random stream"""
+        if self.seed is not None:
+            self.random.seed(self.seed + offset)
+
+    def session_requests(self):
+        """Number of requests in one closed-loop user session"""
+        return self.random.randint(*self.session_length)
+
+    def pick_action(self):
+        return self.random.choices(self.actions, cum_weights=self._action_weights)[0]
+
+    def pick_think_time(self):
+        """Seconds a user waits before its next request"""
+        distribution = self.think_time["distribution"]
+        if distribution == "constant":
+            return self.think_time.get("value", 0)
+        if distribution == "uniform":
+            return self.random.uniform(self.think_time.get("min", 0), self.think_time["max"])
+        return self.random.expovariate(1 / self.think_time["mean"])
+
+    def pick_activity(self, activities):
+        """Pick an activity, following the scenario's popularity distribution"""
+        # Compare by identity: the catalog list is replaced, not mutated, when it changes
+        if activities is not self._source:
+            self._rank_activities(activities)
+        return self.random.choices(self._activities, cum_weights=self._activity_weights)[0]
+
+    def _rank_activities(self, activities):
+        self._source = activities
+        self._activities = list(activities)
+        if self.popularity["distribution"] == "zipf":
+            # The activity at rank r is 1 / r^s as popular as the most popular one.
+            # Ranks are shuffled with the scenario's seed so the hot activity is
+            # not always the first in the catalog, yet is the same one in every
+            # worker process.
+            s = self.popularity.get("s", 1.0)
+            ranks = list(range(1, len(activities) + 1))
+            random.Random(self.seed or 0).shuffle(ranks)
+            weights = [1 / rank ** s for rank in ranks]
+        else:
+            weights = [1] * len(activities)
+        self._activity_weights = list(accumulate(weights))
+
+    def pick_signup(self, activities, user_id, request_index, run_id):
+        """
+        Return (activity, email) for the next signup
+
+        With probability duplicate_signup_ratio this repeats an earlier
+        signup, which the API must reject as a duplicate.
+        """
+        if self._signups and self.random.random() < self.duplicate_signup_ratio:
+            return self.random.choice(self._signups)
+        signup = (self.pick_activity(activities), self.make_email(user_id, request_index, run_id))
+        self._signups.append(signup)
+        return signup
+
+    def pick_unregister(self):
+        """
+        Return (activity, email) of an earlier signup to drop, or None if there is none
+
+        The signup is forgotten, so it is neither dropped twice nor repeated
+        as a duplicate.
+        """
+        if not self._signups:
+            return None
+        i = self.random.randrange(len(self._signups))
+        signup = self._signups[i]
+        self._signups[i] = self._signups[-1]
+        self._signups.pop()
+        return signup
+
+    def make_email(self, user_id, request_index, run_id):
+        """A new email, unique per (user_id, request_index) and test run"""
+        domain = self.emails.get("domain", "mergington.edu")
+        if self.emails["generator"] == "names":
+            first = _FIRST_NAMES[self.random.randrange(len(_FIRST_NAMES))]
+            last = _LAST_NAMES[self.random.randrange(len(_LAST_NAMES))]
+            return f"{first}.{last}.{user_id}.{request_index}.{run_id}@{domain}"
+        prefix = self.emails.get("prefix", "loadtest")
+        return f"{prefix}{user_id}_{request_index}_{run_id}@{domain}"
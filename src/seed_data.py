@@ -0,0 +1,132 @@
+"""
+Synthetic activity catalogs of configurable size
+
+The built-in catalog in app.py has nine activities with two participants
+each, which hides how the API behaves at realistic sizes. generate_catalog
+builds a catalog in the public API shape with any number of activities and
+participants:
+
+- participants are spread over activities by a Zipf popularity distribution
+  (skew 0 is uniform, larger values concentrate them on a few activities)
+- students join several activities, drawn from a pool of distinct emails,
+  and never twice the same one
+- capacity leaves some headroom above the current participant count, so
+  signups still succeed; headroom 0 makes every activity full
+
+The same arguments and seed always produce the same catalog, so separate
+processes (uvicorn workers, benchmark runs) agree on the data.
+
+The app seeds its store with a generated catalog when ACTIVITY_SEED_ACTIVITIES
+is set (see app.create_store). To write a catalog to a file instead:
+
+    python seed_data.py --activities 10000 --participants 1000000 --skew 1.1 --output catalog.json
+"""
+import argparse
+import json
+import math
+import random
+import sys
+
+_CATEGORIES = ("Club", "Team", "Workshop", "Society", "Studio", "Ensemble", "Lab", "League")
+
+_SUBJECTS = ("Chess", "Robotics", "Drama", "Basketball", "Painting", "Debate", "Chemistry",
+             "Swimming", "Poetry", "Jazz", "Astronomy", "Coding", "Photography", "Volleyball")
+
+_DAYS = ("Mondays", "Tuesdays", "Wednesdays", "Thursdays", "Fridays")
+
+_SLOTS = ("3:00 PM - 4:00 PM", "3:30 PM - 5:00 PM", "4:00 PM - 5:30 PM", "5:00 PM - 6:30 PM")
+
+
+def popularity_weights(count, skew, rng):
+    """Zipf weights 1 / rank^skew, with ranks shuffled over the positions"""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return [1 / rank ** skew for rank in ranks]
+
+
+def apportion(total, weights):
+    """Split total into integer parts proportional to weights (largest remainder)"""
+    weight_sum = sum(weights)
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    remaining = total - sum(counts)
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:remaining]:
+        counts[i] += 1
+    return counts
+
+
+def generate_catalog(num_activities, num_participants, skew=1.0, headroom=0.2,
+                     students=None, seed=0, domain="mergington.edu"):
+    """
+    Build a catalog of num_activities activities holding num_participants signups in total
+
+    students is the number of distinct emails to draw from; by default each
+    student joins about three activities. It is raised to the size of the
+    largest activity if needed.
+    """
+    if num_activities < 1:
+        raise ValueError("A catalog needs at least one activity")
+    if num_participants < 0 or skew < 0 or headroom < 0:
+        raise ValueError("Participants, skew and headroom must not be negative")
+    rng = random.Random(seed)
+    counts = apportion(num_participants, popularity_weights(num_activities, skew, rng))
+    students = max(students or num_participants // 3, max(counts), 1)
+    width = len(str(num_activities))
+
+    catalog = {}
+    for i, count in enumerate(counts):
+        subject = _SUBJECTS[rng.randrange(len(_SUBJECTS))]
+        category = _CATEGORIES[rng.randrange(len(_CATEGORIES))]
+        name = f"{subject} {category} {i:0{width}d}"
+        # A contiguous run of the student pool (wrapping around) is distinct
+        # within the activity and overlaps with other activities' runs
+        start = rng.randrange(students)
+        catalog[name] = {
+            "description": f"{subject} {category.lower()} for students of all levels",
+            "schedule": f"{_DAYS[rng.randrange(len(_DAYS))]}, {_SLOTS[rng.randrange(len(_SLOTS))]}",
+            "max_participants": max(1, math.ceil(count * (1 + headroom))),
+            "participants": [f"student{(start + j) % students}@{domain}" for j in range(count)]
+        }
+    return catalog
+
+
+def describe(catalog):
+    """Summary of a catalog's size and skew"""
+    counts = sorted((len(details["participants"]) for details in catalog.values()), reverse=True)
+    total = sum(counts)
+    top = max(1, len(counts) // 100)
+    return {
+        "activities": len(counts),
+        "participants": total,
+        "largest_activity": counts[0],
+        "median_activity": counts[len(counts) // 2],
+        "top_1_percent_share": sum(counts[:top]) / total if total else 0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic activities catalog")
+    parser.add_argument("--activities", type=int, default=1000, help="Number of activities")
+    parser.add_argument("--participants", type=int, default=10000, help="Total signups over all activities")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf exponent of activity popularity (0 for uniform)")
+    parser.add_argument("--headroom", type=float, default=0.2,
+                        help="Spare capacity as a fraction of each activity's participants")
+    parser.add_argument("--students", type=int, help="Number of distinct student emails")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="JSON file to write (default: only print a summary)")
+    args = parser.parse_args(argv)
+
+    catalog = generate_catalog(args.activities, args.participants, args.skew, args.headroom,
+                               args.students, args.seed)
+    print(json.dumps(describe(catalog), indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        print(f"Catalog written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Catalog state shared by several uvicorn worker processes
+
+With the in-memory store every worker process would hold its own diverging
+copy of the activities. For multi-worker deployments (python app.py
+--workers N) one process owns the store and the workers replicate it:
+
+- StateServer runs in the uvicorn supervisor process next to the real
+  InMemoryStore (journal included). It applies every mutation, one at a
+  time, and streams the resulting Changes over a Unix socket. Waiting for
+  a journaled mutation to be fsynced happens after that, concurrently, so
+  requests still share the journal's group commit.
+- RemoteStore is the backend of each worker. It loads a snapshot of the
+  catalog, applies the change stream to a local replica, and sends
+  mutations to the server. Reads never leave the process, so they scale
+  across all cores.
+- VersionCounter is a memory-mapped file holding the latest committed
+  catalog version. The server updates it before answering a mutation, and
+  a worker checks it before every read, waiting until its replica has
+  caught up. A read that starts after any signup has completed, in any
+  worker, therefore sees that signup.
+
+The protocol is one JSON object per line: {"op", "args"} requests answered
+by {"result"} or {"error", "message"}, and a "subscribe" request answered by
+the snapshot followed by one line per Change.
+"""
+import json
+import mmap
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import threading
+
+from store import (ActivityStore, Change, StoreError, ActivityNotFound, AlreadySignedUp,
+                   ActivityFull, NotSignedUp, _student_index)
+
+# Mutations a worker may ask the server to perform
+WRITE_OPS = ("add_participant", "add_participants", "remove_participant")
+
+# Store errors by name, to re-raise them in the worker
+ERRORS = {error.__name__: error for error in (ActivityNotFound, AlreadySignedUp, ActivityFull, NotSignedUp)}
+
+# Seconds a read waits for the replica to catch up before giving up
+SYNC_TIMEOUT = 5.0
+
+
+class StateServerUnavailable(RuntimeError):
+    """The worker lost its connection to the state server or fell behind"""
+
+
+def version_path(socket_path):
+    return f"{socket_path}.version"
+
+
+class VersionCounter:
+    """
+    Latest catalog version in a memory-mapped file, written only by the state server
+
+    The version is guarded by a sequence number (a seqlock): the writer makes
+    it odd while updating, and readers retry until they see the same even
+    sequence before and after reading the version.
+    """
+
+    _LAYOUT = struct.Struct("<QQ")  # sequence, version
+
+    def __init__(self, path, create=False):
+        self.path = path
+        if create:
+            with open(path, "wb") as f:
+                f.write(bytes(self._LAYOUT.size))
+        fd = os.open(path, os.O_RDWR if create else os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, self._LAYOUT.size,
+                                  access=mmap.ACCESS_WRITE if create else mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._sequence = 0
+
+    def write(self, version):
+        self._sequence += 1
+        struct.pack_into("<Q", self._map, 0, self._sequence)
+        struct.pack_into("<Q", self._map, 8, version)
+        self._sequence += 1
+        struct.pack_into("<Q", self._map, 0, self._sequence)
+
+    def read(self):
+        while True:
+            before, version = self._LAYOUT.unpack_from(self._map)
+            if before % 2 == 0 and struct.unpack_from("<Q", self._map, 0)[0] == before:
+                return version
+
+    def close(self):
+        self._map.close()
+
+
+def _send(wfile, message):
+    wfile.write(json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        state = self.server.state
+        for line in self.rfile:
+            request = json.loads(line)
+            if request["op"] == "subscribe":
+                state.stream_changes(self.wfile)
+                return
+            _send(self.wfile, state.execute(request["op"], request.get("args", ())))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class StateServer:
+    """Owns the store for all workers and serves it over a Unix socket"""
+
+    def __init__(self, store, socket_path):
+        self.store = store
+        self.socket_path = str(socket_path)
+        self.counter = VersionCounter(version_path(self.socket_path), create=True)
+        self.counter.write(store.version)
+        # Mutations run one at a time, so changes are streamed in version order
+        self._write_lock = threading.Lock()
+        self._subscribers = set()
+        self._server = None
+        store.add_listener(self._publish)
+
+    def start(self):
+        """Listen on the socket from a background thread"""
+        try:
+            existing = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            pass
+        else:
+            # Only replace a stale socket of ours, never someone else's file
+            if not stat.S_ISSOCK(existing.st_mode) or existing.st_uid != os.getuid():
+                raise FileExistsError(f"{self.socket_path} exists and is not a socket owned by this user")
+            os.unlink(self.socket_path)
+        self._server = _UnixServer(self.socket_path, _Handler)
+        # Any process that can connect can mutate the catalog
+        os.chmod(self.socket_path, 0o600)
+        self._server.state = self
+        threading.Thread(target=self._server.serve_forever, name="state-server", daemon=True).start()
+
+    def execute(self, op, args):
+        if op not in WRITE_OPS:
+            return {"error": "UnknownOperation", "message": op}
+        with self._write_lock:
+            try:
+                result, token = self.store.apply(op, *args)
+            except StoreError as e:
+                return {"error": type(e).__name__, "message": str(e)}
+            finally:
+                # Workers see the new version only once its changes are queued for them
+                self.counter.write(self.store.version)
+        # Outside the lock, so concurrent requests share the journal's group commit
+        self.store.wait_durable(token)
+        if op == "add_participants":
+            result = [None if error is None else type(error).__name__ for error in result]
+        return {"result": result}
+
+    def _publish(self, change):
+        """Store listener; called under the write lock, so in version order"""
+        line = json.dumps(list(change), ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        for subscriber in self._subscribers:
+            subscriber.put(line)
+
+    def stream_changes(self, wfile):
+        """Send a snapshot and then every later change until the worker disconnects"""
+        changes = queue.SimpleQueue()
+        # No mutation runs between copying the catalog and subscribing, so
+        # every change is either in the snapshot or in the stream
+        with self._write_lock:
+            snapshot = {
+                name: dict(details, participants=list(details["participants"]))
+                for name, details in self.store.get_catalog().items()
+            }
+            version = self.store.version
+            self._subscribers.add(changes)
+        try:
+            _send(wfile, {"epoch": self.store.epoch, "version": version, "activities": snapshot})
+            del snapshot
+            while True:
+                wfile.write(changes.get())
+                # Drain whatever else is queued before flushing
+                while not changes.empty():
+                    wfile.write(changes.get())
+                wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self._subscribers.discard(changes)
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.counter.close()
+        for path in (self.socket_path, self.counter.path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+class RemoteStore(ActivityStore):
+    """
+    Worker-side backend: a local replica of the state server's catalog
+
+    Reads are served from the replica once it has caught up with the shared
+    version counter; mutations are executed by the server and come back
+    through the change stream, which also feeds this store's listeners.
+    Every worker therefore sees, and can broadcast, every change.
+    """
+
+    def __init__(self, socket_path, sync_timeout=SYNC_TIMEOUT):
+        self.socket_path = str(socket_path)
+        self.sync_timeout = sync_timeout
+        self._local = threading.local()
+        self._counter = VersionCounter(version_path(self.socket_path))
+        self._applied = threading.Condition()
+        self._connected = True
+
+        self._stream = self._connect()
+        stream = self._stream.makefile("rwb")
+        _send(stream, {"op": "subscribe"})
+        snapshot = json.loads(stream.readline())
+        self.activities = snapshot["activities"]
+        # As in InMemoryStore: ordered dicts for O(1) removals, with the
+        # participants lists rebuilt on read after a removal
+        self._members = {name: dict.fromkeys(details["participants"])
+                         for name, details in self.activities.items()}
+        self._stale = set()
+        self._student_index = _student_index(self.activities)
+        self.epoch = snapshot["epoch"]
+        self._version = snapshot["version"]
+        threading.Thread(target=self._follow, args=(stream,), name="state-follower", daemon=True).start()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _follow(self, stream):
+        """Apply the server's changes to the replica, in order"""
+        try:
+            for line in stream:
+                change = Change(*json.loads(line))
+                with self._applied:
+                    if change.action == "added":
+                        self._members[change.activity][change.email] = None
+                        self.activities[change.activity]["participants"].append(change.email)
+                        self._student_index.setdefault(change.email, {})[change.activity] = None
+                    else:
+                        del self._members[change.activity][change.email]
+                        self._stale.add(change.activity)
+                        del self._student_index[change.email][change.activity]
+                    self._version = change.version
+                    self._applied.notify_all()
+                self._notify((change,))
+        except (OSError, ValueError):
+            pass
+        with self._applied:
+            self._connected = False
+            self._applied.notify_all()
+
+    def _sync(self):
+        """Wait until the replica includes every mutation committed so far"""
+        target = self._counter.read()
+        if self._version >= target:
+            return
+        with self._applied:
+            caught_up = self._applied.wait_for(
+                lambda: self._version >= target or not self._connected, self.sync_timeout)
+            if not caught_up or self._version < target:
+                raise StateServerUnavailable(f"replica at version {self._version}, expected {target}")
+
+    def _call(self, op, *args):
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            stream = self._local.stream = self._connect().makefile("rwb")
+        try:
+            _send(stream, {"op": op, "args": args})
+            response = json.loads(stream.readline())
+        except (OSError, ValueError) as e:
+            self._local.stream = None
+            raise StateServerUnavailable(f"state server request failed: {e}") from e
+        if "error" in response:
+            error = ERRORS.get(response["error"])
+            if error is None:
+                raise StateServerUnavailable(f"{response['error']}: {response['message']}")
+            raise error(response["message"])
+        return response["result"]
+
+    @property
+    def version(self):
+        self._sync()
+        return self._version
+
+    def _refresh(self, names):
+        with self._applied:
+            for name in names & self._stale:
+                self.activities[name]["participants"] = list(self._members[name])
+            self._stale -= names
+
+    def get_catalog(self):
+        self._sync()
+        if self._stale:
+            self._refresh(set(self._stale))
+        return self.activities
+
+    def get_activity(self, name):
+        self._sync()
+        try:
+            activity = self.activities[name]
+        except KeyError:
+            raise ActivityNotFound(name) from None
+        if name in self._stale:
+            self._refresh({name})
+        return activity
+
+    def get_student_activities(self, email):
+        self._sync()
+        return list(self._student_index.get(email, ()))
+
+    def add_participant(self, name, email):
+        return self._call("add_participant", name, email)
+
+    def add_participants(self, name, emails):
+        return [None if error is None else ERRORS[error](email)
+                for email, error in zip(emails, self._call("add_participants", name, list(emails)))]
+
+    def remove_participant(self, name, email):
+        return self._call("remove_participant", name, email)
+
+    def close(self):
+        # Shutting the socket down ends the follower thread's read
+        try:
+            self._stream.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._stream.close()
+        self._counter.close()
@@ -4,58 +4,161 @@ document.addEventListener("DOMContentLoaded", () => {
   const signupForm = document.getElementById("signup-form");
   const messageDiv = document.getElementById("message");
 
+  // Last catalog received from the API and its ETag, so repeat fetches can
+  // be answered with 304 Not Modified instead of a full download
+  let cachedActivities = null;
+  let cachedEtag = null;
+
+  // Catalog version an ETag ("<epoch>-v<version>[-<representation>]") was
+  // issued for. Change events carry the same version, so applyChange can
+  // tell which events a freshly loaded copy already reflects.
+  function etagVersion(response) {
+    const match = /-v(\d+)(?:-|")/.exec(response.headers.get("ETag") || "");
+    return match ? Number(match[1]) : undefined;
+  }
+
+  // Function to fill one activity card from its details
+  function renderActivityCard(activityCard, name, details) {
+    const spotsLeft = details.max_participants - details.participants.length;
+    
+    // Create participants list HTML
+    let participantsHTML = '<p><strong>Participants:</strong></p>';
+    if (details.participants.length > 0) {
+      participantsHTML += '<ul class="participants-list">';
+      details.participants.forEach(participant => {
+        participantsHTML += `<li>${participant}</li>`;
+      });
+      participantsHTML += '</ul>';
+    } else {
+      participantsHTML += '<p class="no-participants">No participants yet. Be the first to sign up!</p>';
+    }
+
+    activityCard.innerHTML = `
+      <h4>${name}</h4>
+      <p>${details.description}</p>
+      <p><strong>Schedule:</strong> ${details.schedule}</p>
+      <p><strong>Availability:</strong> ${spotsLeft} spots left</p>
+      <div class="participants-section">
+        ${participantsHTML}
+      </div>
+    `;
+  }
+
+  // Function to render activities into the list and dropdown
+  function renderActivities(activities) {
+    // Clear loading message
+    activitiesList.innerHTML = "";
+    activitySelect.querySelectorAll("option:not([value=''])").forEach((option) => option.remove());
+
+    // Populate activities list
+    Object.entries(activities).forEach(([name, details]) => {
+      const activityCard = document.createElement("div");
+      activityCard.className = "activity-card";
+      activityCard.dataset.activity = name;
+      renderActivityCard(activityCard, name, details);
+
+      activitiesList.appendChild(activityCard);
+
+      // Add option to select dropdown
+      const option = document.createElement("option");
+      option.value = name;
+      option.textContent = name;
+      activitySelect.appendChild(option);
+    });
+  }
+
+  // Function to refresh a single activity card without reloading the catalog
+  async function refreshActivity(name) {
+    try {
+      const response = await fetch(`/activities/${encodeURIComponent(name)}`, { cache: "no-store" });
+      if (!response.ok) {
+        return;
+      }
+      const details = await response.json();
+      details.version = etagVersion(response);
+      if (cachedActivities) {
+        cachedActivities[name] = details;
+      }
+      const activityCard = [...activitiesList.children].find((card) => card.dataset.activity === name);
+      if (activityCard) {
+        renderActivityCard(activityCard, name, details);
+      }
+    } catch (error) {
+      console.error("Error refreshing activity:", error);
+    }
+  }
+
   // Function to fetch activities from API
   async function fetchActivities() {
     try {
-      const response = await fetch("/activities");
-      const activities = await response.json();
+      const headers = {};
+      if (cachedEtag) {
+        headers["If-None-Match"] = cachedEtag;
+      }
+      const response = await fetch("/activities", { headers, cache: "no-store" });
 
-      // Clear loading message
-      activitiesList.innerHTML = "";
-
-      // Populate activities list
-      Object.entries(activities).forEach(([name, details]) => {
-        const activityCard = document.createElement("div");
-        activityCard.className = "activity-card";
-
-        const spotsLeft = details.max_participants - details.participants.length;
-        
-        // Create participants list HTML
-        let participantsHTML = '<p><strong>Participants:</strong></p>';
-        if (details.participants.length > 0) {
-          participantsHTML += '<ul class="participants-list">';
-          details.participants.forEach(participant => {
-            participantsHTML += `<li>${participant}</li>`;
-          });
-          participantsHTML += '</ul>';
-        } else {
-          participantsHTML += '<p class="no-participants">No participants yet. Be the first to sign up!</p>';
-        }
+      // Nothing changed since the last fetch, keep what is on screen
+      if (response.status === 304 && cachedActivities) {
+        return;
+      }
 
-        activityCard.innerHTML = `
-          <h4>${name}</h4>
-          <p>${details.description}</p>
-          <p><strong>Schedule:</strong> ${details.schedule}</p>
-          <p><strong>Availability:</strong> ${spotsLeft} spots left</p>
-          <div class="participants-section">
-            ${participantsHTML}
-          </div>
-        `;
-
-        activitiesList.appendChild(activityCard);
-
-        // Add option to select dropdown
-        const option = document.createElement("option");
-        option.value = name;
-        option.textContent = name;
-        activitySelect.appendChild(option);
+      const activities = await response.json();
+      const version = etagVersion(response);
+      Object.values(activities).forEach((details) => {
+        details.version = version;
       });
+      cachedActivities = activities;
+      cachedEtag = response.headers.get("ETag");
+
+      renderActivities(activities);
     } catch (error) {
       activitiesList.innerHTML = "<p>Failed to load activities. Please try again later.</p>";
       console.error("Error fetching activities:", error);
     }
   }
 
+  // Apply a change event from the server to the matching card in place
+  function applyChange(change) {
+    const details = cachedActivities && cachedActivities[change.activity];
+    if (!details) {
+      return;
+    }
+    // Our copy was loaded at or after this change's version, so it already
+    // includes it. Missed changes are caught by the count check below.
+    if (details.version !== undefined && change.version <= details.version) {
+      return;
+    }
+    if (change.action === "added" && !details.participants.includes(change.email)) {
+      details.participants.push(change.email);
+    } else if (change.action === "removed") {
+      details.participants = details.participants.filter((email) => email !== change.email);
+    }
+    details.version = change.version;
+
+    // A count that does not match means we missed events for this activity
+    if (details.participants.length !== change.participant_count) {
+      refreshActivity(change.activity);
+      return;
+    }
+
+    const activityCard = [...activitiesList.children].find((card) => card.dataset.activity === change.activity);
+    if (activityCard) {
+      renderActivityCard(activityCard, change.activity, details);
+    }
+  }
+
+  // Subscribe to live catalog changes instead of polling. EventSource
+  // reconnects by itself and resumes with Last-Event-ID.
+  function subscribeToChanges() {
+    if (!window.EventSource) {
+      return;
+    }
+    const events = new EventSource("/events");
+    events.addEventListener("change", (event) => applyChange(JSON.parse(event.data)));
+    // We missed events (slow connection or server restart): reload everything
+    events.addEventListener("reset", () => fetchActivities());
+  }
+
   // Handle form submission
   signupForm.addEventListener("submit", async (event) => {
     event.preventDefault();
@@ -77,6 +180,7 @@ document.addEventListener("DOMContentLoaded", () => {
         messageDiv.textContent = result.message;
         messageDiv.className = "success";
         signupForm.reset();
+        refreshActivity(activity);
       } else {
         messageDiv.textContent = result.detail || "An error occurred";
         messageDiv.className = "error";
@@ -98,4 +202,5 @@ document.addEventListener("DOMContentLoaded", () => {
 
   // Initialize app
   fetchActivities();
+  subscribeToChanges();
 });
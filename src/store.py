@@ -0,0 +1,653 @@
+"""
+Storage backends for the activities catalog
+
+Every backend exposes the same small interface (see ActivityStore) so that
+app.py does not care where activities and participants live:
+
+- InMemoryStore: the original module-level dict, fast but per-process,
+  optionally made durable by a write-ahead Journal (see journal.py)
+- SQLiteStore: a SQLite database in WAL mode, durable and shareable
+  between uvicorn workers
+- RemoteStore (shared_state.py): a worker's replica of an in-memory store
+  owned by another process, for multi-worker deployments
+- ColumnarStore (columnar_store.py): interned, array-backed columns that
+  take a fraction of the memory of InMemoryStore for large catalogs
+"""
+import sqlite3
+import threading
+import uuid
+from typing import NamedTuple
+
+
+class StoreError(Exception):
+    """Base class for rejected store operations"""
+
+
+class ActivityNotFound(StoreError):
+    """The requested activity does not exist"""
+
+
+class AlreadySignedUp(StoreError):
+    """The student is already signed up for the activity"""
+
+
+class ActivityFull(StoreError):
+    """The activity has reached max_participants"""
+
+
+class NotSignedUp(StoreError):
+    """The student is not signed up for the activity"""
+
+
+class Change(NamedTuple):
+    """One committed participant change, as reported to store listeners"""
+    activity: str
+    email: str
+    action: str  # "added" or "removed"
+    participant_count: int
+    max_participants: int
+    version: int
+
+
+class ActivityStore:
+    """
+    Interface implemented by every storage backend
+
+    Catalog and activity dicts use the public API shape:
+    {"description", "schedule", "max_participants", "participants"}.
+    They may be live views of the store's state, so callers must not mutate
+    them.
+
+    `version` increases on every mutation and `epoch` identifies the
+    lifetime of the underlying data, so (epoch, version) names one state of
+    the catalog.
+    """
+
+    epoch = None
+    _listeners = ()
+
+    @property
+    def version(self):
+        raise NotImplementedError
+
+    def add_listener(self, callback):
+        """
+        Call callback(Change) after every mutation
+
+        Backends call listeners while they still hold the activity's lock (or
+        transaction), so each activity's changes are reported in version
+        order, and before a journaled change has been fsynced. Callbacks must
+        therefore be quick and must not call back into the store.
+        """
+        self._listeners = (*self._listeners, callback)
+
+    def _notify(self, changes):
+        for change in changes:
+            for callback in self._listeners:
+                callback(change)
+
+    def get_catalog(self):
+        """Return {activity name: activity dict} for every activity"""
+        raise NotImplementedError
+
+    def get_catalog_summary(self):
+        """
+        Return {activity name: summary dict} for every activity
+
+        Summaries have the activity fields except "participants", plus
+        "participant_count" and "spots_left", so count-only views of the
+        catalog need not read every participant list.
+        """
+        return {name: _summarize(details) for name, details in self.get_catalog().items()}
+
+    def get_activity(self, name):
+        """Return one activity dict, or raise ActivityNotFound"""
+        raise NotImplementedError
+
+    def get_participants(self, name, offset, limit):
+        """Return (page of participant emails, total participants) for an activity"""
+        participants = self.get_activity(name)["participants"]
+        return participants[offset:offset + limit], len(participants)
+
+    def get_student_activities(self, email):
+        """
+        Return the names of the activities a student is signed up for
+
+        Backends keep a reverse index from email to activities, so the cost
+        is proportional to the student's own signups, not to the catalog.
+        """
+        raise NotImplementedError
+
+    def add_participant(self, name, email):
+        """Sign a student up and return the new catalog version"""
+        raise NotImplementedError
+
+    def add_participants(self, name, emails):
+        """
+        Sign several students up for one activity
+
+        Returns one entry per email: None if it was added, otherwise the
+        StoreError that rejected it. Backends override this to take the
+        activity's lock (or transaction) once for the whole list.
+        """
+        results = []
+        for email in emails:
+            try:
+                self.add_participant(name, email)
+                results.append(None)
+            except StoreError as e:
+                results.append(e)
+        return results
+
+    def remove_participant(self, name, email):
+        """Remove a student from an activity and return the new catalog version"""
+        raise NotImplementedError
+
+    def apply(self, op, *args):
+        """
+        Run the mutation method `op` without waiting for it to be durable
+
+        Returns (result, token). The mutation is visible to readers at once;
+        pass the token to wait_durable() before acknowledging it. This lets a
+        caller that serializes mutations (see shared_state.StateServer) wait
+        for durability outside its own lock.
+        """
+        return getattr(self, op)(*args), None
+
+    def wait_durable(self, token):
+        """Block until the mutation that returned `token` from apply() is durable"""
+
+    def close(self):
+        """Release resources held by the backend"""
+
+
+def _student_index(activities):
+    """Reverse index {email: {activity name: None}}; the dicts are insertion-ordered sets"""
+    index = {}
+    for name, details in activities.items():
+        for email in details["participants"]:
+            index.setdefault(email, {})[name] = None
+    return index
+
+
+def _summarize(details):
+    participant_count = len(details["participants"])
+    return {
+        "description": details["description"],
+        "schedule": details["schedule"],
+        "max_participants": details["max_participants"],
+        "participant_count": participant_count,
+        "spots_left": details["max_participants"] - participant_count
+    }
+
+
+def _batch_changes(name, added, max_participants, version):
+    """Changes for a batch of (email, participant count) that ended at `version`"""
+    first_version = version - len(added) + 1
+    return [
+        Change(name, email, "added", participant_count, max_participants, first_version + i)
+        for i, (email, participant_count) in enumerate(added)
+    ]
+
+
+class InMemoryStore(ActivityStore):
+    """Keeps the catalog in a plain dict owned by this process"""
+
+    def __init__(self, activities, journal=None):
+        # The dict is used in place, so the caller's copy stays the live state
+        self.activities = activities
+        self.epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._version_lock = threading.Lock()
+        self.journal = None
+        # Serializes snapshots with each other and with close()
+        self._snapshot_lock = threading.Lock()
+        if journal is not None:
+            self._recover(journal)
+        # Each activity's participants as an insertion-ordered dict (email ->
+        # None), the source of truth: O(1) duplicate checks, signups and
+        # removals, in signup order. The "participants" lists are the display
+        # copy. Signups append to them, while a removal only marks the list
+        # stale, to be rebuilt from the dict when it is next read.
+        self._participant_index = {
+            name: dict.fromkeys(details["participants"]) for name, details in activities.items()
+        }
+        self._stale = set()
+        # Reverse index of each student's activities, for get_student_activities.
+        # Entries are kept when they become empty, so a concurrent signup to
+        # another activity never writes into a dropped dict.
+        self._student_index = _student_index(activities)
+        # One lock per activity so check-then-insert is atomic without making
+        # signups to different activities wait on each other
+        self._locks = {name: threading.Lock() for name in activities}
+        if journal is not None:
+            journal.open()
+            self.journal = journal
+
+    def _recover(self, journal):
+        """Load the journal's snapshot into the catalog and replay its log tail"""
+        snapshot, records = journal.load()
+        if snapshot is not None:
+            self.activities.clear()
+            self.activities.update(snapshot["activities"])
+            self._version = snapshot["version"]
+        # Replay onto ordered dicts, so removals do not scan the lists
+        members = {name: dict.fromkeys(details["participants"]) for name, details in self.activities.items()}
+        for record in records:
+            if record["op"] == "add":
+                members[record["activity"]][record["email"]] = None
+            else:
+                del members[record["activity"]][record["email"]]
+            self._version += 1
+        for name, details in self.activities.items():
+            details["participants"] = list(members[name])
+
+    def _log(self, op, name, email):
+        """Journal a mutation; must be called under the activity's lock"""
+        if self.journal is None:
+            return None
+        return self.journal.append({"op": op, "activity": name, "email": email})
+
+    def _commit(self, seq):
+        """Wait for a journaled mutation to be durable and compact if due"""
+        if seq is None:
+            return
+        self.journal.wait_durable(seq)
+        if self.journal.claim_snapshot():
+            threading.Thread(target=self.snapshot, name="journal-snapshot", daemon=True).start()
+
+    def snapshot(self):
+        """Write a compacted snapshot of the catalog and truncate the journal"""
+        with self._snapshot_lock:
+            # Holding every activity lock means no mutation is half-applied or
+            # half-logged, so the copy matches the log exactly up to `seq`
+            names = sorted(self._locks)
+            for name in names:
+                self._locks[name].acquire()
+            try:
+                activities = {
+                    name: dict(details, participants=list(self._participant_index[name]))
+                    for name, details in self.activities.items()
+                }
+                version = self._version
+                seq = self.journal.rotate()
+            finally:
+                for name in names:
+                    self._locks[name].release()
+            self.journal.write_snapshot(activities, version, seq)
+
+    @property
+    def version(self):
+        return self._version
+
+    def _bump_version(self, count=1):
+        with self._version_lock:
+            self._version += count
+            return self._version
+
+    def _activity(self, name):
+        """The stored activity dict, whose participants list may be stale"""
+        try:
+            return self.activities[name]
+        except KeyError:
+            raise ActivityNotFound(name) from None
+
+    def _refresh(self, name):
+        """Rebuild a participants list that a removal made stale"""
+        with self._locks[name]:
+            if name in self._stale:
+                # Replaced, not updated in place, so readers of the old list are unaffected
+                self.activities[name]["participants"] = list(self._participant_index[name])
+                self._stale.discard(name)
+
+    def get_catalog(self):
+        for name in self._stale.copy():
+            self._refresh(name)
+        return self.activities
+
+    def get_activity(self, name):
+        activity = self._activity(name)
+        if name in self._stale:
+            self._refresh(name)
+        return activity
+
+    def get_student_activities(self, email):
+        return list(self._student_index.get(email, ()))
+
+    def apply(self, op, *args):
+        # The _apply_* methods mutate and journal; durability is left to the caller
+        return getattr(self, f"_apply_{op}")(*args)
+
+    def wait_durable(self, token):
+        self._commit(token)
+
+    def add_participant(self, name, email):
+        version, seq = self._apply_add_participant(name, email)
+        self._commit(seq)
+        return version
+
+    def add_participants(self, name, emails):
+        results, seq = self._apply_add_participants(name, emails)
+        self._commit(seq)
+        return results
+
+    def remove_participant(self, name, email):
+        version, seq = self._apply_remove_participant(name, email)
+        self._commit(seq)
+        return version
+
+    def _apply_add_participant(self, name, email):
+        activity = self._activity(name)
+        signed_up = self._participant_index[name]
+        with self._locks[name]:
+            if email in signed_up:
+                raise AlreadySignedUp(email)
+            if len(signed_up) >= activity["max_participants"]:
+                raise ActivityFull(name)
+            signed_up[email] = None
+            activity["participants"].append(email)
+            self._student_index.setdefault(email, {})[name] = None
+            version = self._bump_version()
+            seq = self._log("add", name, email)
+            self._notify((Change(name, email, "added", len(signed_up), activity["max_participants"], version),))
+        return version, seq
+
+    def _apply_add_participants(self, name, emails):
+        try:
+            activity = self._activity(name)
+        except ActivityNotFound as e:
+            return [e] * len(emails), None
+        signed_up = self._participant_index[name]
+        results = []
+        added = []
+        seq = None
+        with self._locks[name]:
+            participants = activity["participants"]
+            for email in emails:
+                if email in signed_up:
+                    results.append(AlreadySignedUp(email))
+                elif len(signed_up) >= activity["max_participants"]:
+                    results.append(ActivityFull(name))
+                else:
+                    signed_up[email] = None
+                    participants.append(email)
+                    self._student_index.setdefault(email, {})[name] = None
+                    seq = self._log("add", name, email)
+                    added.append((email, len(signed_up)))
+                    results.append(None)
+            if added:
+                version = self._bump_version(len(added))
+                self._notify(_batch_changes(name, added, activity["max_participants"], version))
+        return results, seq
+
+    def _apply_remove_participant(self, name, email):
+        activity = self._activity(name)
+        signed_up = self._participant_index[name]
+        with self._locks[name]:
+            if email not in signed_up:
+                raise NotSignedUp(email)
+            # O(1): the display list is rebuilt once, on its next read
+            del signed_up[email]
+            self._stale.add(name)
+            del self._student_index[email][name]
+            version = self._bump_version()
+            seq = self._log("remove", name, email)
+            self._notify((Change(name, email, "removed", len(signed_up), activity["max_participants"], version),))
+        return version, seq
+
+    def close(self):
+        if self.journal is not None:
+            with self._snapshot_lock:
+                self.journal.close()
+
+
+# Schema and statements are module constants so sqlite3's per-connection
+# statement cache compiles each of them once and reuses the prepared form
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    name TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    schedule TEXT NOT NULL,
+    max_participants INTEGER NOT NULL,
+    participant_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS participants (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity TEXT NOT NULL REFERENCES activities(name),
+    email TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS participants_activity_email
+    ON participants(activity, email);
+CREATE INDEX IF NOT EXISTS participants_email ON participants(email);
+CREATE TABLE IF NOT EXISTS catalog_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    epoch TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+_SQL_INIT_STATE = "INSERT OR IGNORE INTO catalog_state (id, epoch, version) VALUES (0, ?, 0)"
+_SQL_SEED_ACTIVITY = (
+    "INSERT OR IGNORE INTO activities (name, description, schedule, max_participants) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SQL_COUNT_ACTIVITIES = "SELECT COUNT(*) FROM activities"
+_SQL_SELECT_STATE = "SELECT epoch, version FROM catalog_state WHERE id = 0"
+_SQL_SELECT_VERSION = "SELECT version FROM catalog_state WHERE id = 0"
+_SQL_BUMP_VERSION = "UPDATE catalog_state SET version = version + 1 WHERE id = 0 RETURNING version"
+_SQL_ADD_VERSION = "UPDATE catalog_state SET version = version + ? WHERE id = 0 RETURNING version"
+_SQL_SELECT_ACTIVITIES = (
+    "SELECT name, description, schedule, max_participants FROM activities ORDER BY rowid"
+)
+_SQL_SELECT_SUMMARIES = (
+    "SELECT name, description, schedule, max_participants, participant_count "
+    "FROM activities ORDER BY rowid"
+)
+_SQL_SELECT_ACTIVITY = (
+    "SELECT description, schedule, max_participants, participant_count "
+    "FROM activities WHERE name = ?"
+)
+_SQL_SELECT_ALL_PARTICIPANTS = "SELECT activity, email FROM participants ORDER BY id"
+_SQL_SELECT_PARTICIPANTS = "SELECT email FROM participants WHERE activity = ? ORDER BY id"
+_SQL_SELECT_PARTICIPANT_PAGE = (
+    "SELECT email FROM participants WHERE activity = ? ORDER BY id LIMIT ? OFFSET ?"
+)
+_SQL_SELECT_STUDENT_ACTIVITIES = "SELECT activity FROM participants WHERE email = ? ORDER BY id"
+_SQL_SELECT_PARTICIPANT = "SELECT 1 FROM participants WHERE activity = ? AND email = ?"
+_SQL_INSERT_PARTICIPANT = "INSERT INTO participants (activity, email) VALUES (?, ?)"
+_SQL_DELETE_PARTICIPANT = "DELETE FROM participants WHERE activity = ? AND email = ?"
+_SQL_ADJUST_COUNT = (
+    "UPDATE activities SET participant_count = participant_count + ? WHERE name = ?"
+)
+
+
+class SQLiteStore(ActivityStore):
+    """
+    Keeps the catalog in a SQLite database in WAL mode
+
+    Each thread (and therefore each uvicorn worker) uses its own connection.
+    WAL lets readers proceed while a signup is being written, and writes run
+    in BEGIN IMMEDIATE transactions so the duplicate and capacity checks
+    cannot interleave with another writer.
+    """
+
+    def __init__(self, path, seed=None):
+        self.path = str(path)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        with self._write(conn):
+            conn.execute(_SQL_INIT_STATE, (uuid.uuid4().hex[:8],))
+            # Seed only an empty database, so restarts keep existing sign-ups
+            if seed and conn.execute(_SQL_COUNT_ACTIVITIES).fetchone()[0] == 0:
+                self._seed(conn, seed)
+        self.epoch = conn.execute(_SQL_SELECT_STATE).fetchone()[0]
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly in _write
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, conn):
+        return _ImmediateTransaction(conn)
+
+    def _seed(self, conn, activities):
+        # executemany keeps seeding large generated catalogs (see seed_data.py)
+        # to one prepared statement per table
+        conn.executemany(_SQL_SEED_ACTIVITY, (
+            (name, details["description"], details["schedule"], details["max_participants"])
+            for name, details in activities.items()
+        ))
+        conn.executemany(_SQL_INSERT_PARTICIPANT, (
+            (name, email) for name, details in activities.items() for email in details["participants"]
+        ))
+        conn.executemany(_SQL_ADJUST_COUNT, (
+            (len(details["participants"]), name) for name, details in activities.items()
+        ))
+
+    @property
+    def version(self):
+        return self._connection().execute(_SQL_SELECT_VERSION).fetchone()[0]
+
+    def get_catalog(self):
+        conn = self._connection()
+        # Both reads see the same snapshot of the database
+        with _ReadTransaction(conn):
+            catalog = {
+                name: {
+                    "description": description,
+                    "schedule": schedule,
+                    "max_participants": max_participants,
+                    "participants": []
+                }
+                for name, description, schedule, max_participants
+                in conn.execute(_SQL_SELECT_ACTIVITIES)
+            }
+            for activity, email in conn.execute(_SQL_SELECT_ALL_PARTICIPANTS):
+                catalog[activity]["participants"].append(email)
+        return catalog
+
+    def get_catalog_summary(self):
+        # Counts come from the activities table; participants are not read
+        return {
+            name: {
+                "description": description,
+                "schedule": schedule,
+                "max_participants": max_participants,
+                "participant_count": participant_count,
+                "spots_left": max_participants - participant_count
+            }
+            for name, description, schedule, max_participants, participant_count
+            in self._connection().execute(_SQL_SELECT_SUMMARIES)
+        }
+
+    def get_activity(self, name):
+        conn = self._connection()
+        with _ReadTransaction(conn):
+            row = conn.execute(_SQL_SELECT_ACTIVITY, (name,)).fetchone()
+            if row is None:
+                raise ActivityNotFound(name)
+            participants = [email for (email,) in conn.execute(_SQL_SELECT_PARTICIPANTS, (name,))]
+        return {
+            "description": row[0],
+            "schedule": row[1],
+            "max_participants": row[2],
+            "participants": participants
+        }
+
+    def get_participants(self, name, offset, limit):
+        conn = self._connection()
+        with _ReadTransaction(conn):
+            row = conn.execute(_SQL_SELECT_ACTIVITY, (name,)).fetchone()
+            if row is None:
+                raise ActivityNotFound(name)
+            page = [email for (email,) in conn.execute(_SQL_SELECT_PARTICIPANT_PAGE, (name, limit, offset))]
+        return page, row[3]
+
+    def get_student_activities(self, email):
+        # Served by the participants_email index
+        return [activity for (activity,) in self._connection().execute(_SQL_SELECT_STUDENT_ACTIVITIES, (email,))]
+
+    def add_participant(self, name, email):
+        conn = self._connection()
+        with self._write(conn):
+            row = conn.execute(_SQL_SELECT_ACTIVITY, (name,)).fetchone()
+            if row is None:
+                raise ActivityNotFound(name)
+            if conn.execute(_SQL_SELECT_PARTICIPANT, (name, email)).fetchone():
+                raise AlreadySignedUp(email)
+            max_participants, participant_count = row[2], row[3]
+            if participant_count >= max_participants:
+                raise ActivityFull(name)
+            conn.execute(_SQL_INSERT_PARTICIPANT, (name, email))
+            conn.execute(_SQL_ADJUST_COUNT, (1, name))
+            version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+            self._notify((Change(name, email, "added", participant_count + 1, max_participants, version),))
+        return version
+
+    def add_participants(self, name, emails):
+        conn = self._connection()
+        results = []
+        added = []
+        with self._write(conn):
+            row = conn.execute(_SQL_SELECT_ACTIVITY, (name,)).fetchone()
+            if row is None:
+                return [ActivityNotFound(name)] * len(emails)
+            max_participants, participant_count = row[2], row[3]
+            for email in emails:
+                if conn.execute(_SQL_SELECT_PARTICIPANT, (name, email)).fetchone():
+                    results.append(AlreadySignedUp(email))
+                elif participant_count >= max_participants:
+                    results.append(ActivityFull(name))
+                else:
+                    conn.execute(_SQL_INSERT_PARTICIPANT, (name, email))
+                    participant_count += 1
+                    added.append((email, participant_count))
+                    results.append(None)
+            if added:
+                conn.execute(_SQL_ADJUST_COUNT, (len(added), name))
+                version = conn.execute(_SQL_ADD_VERSION, (len(added),)).fetchone()[0]
+                self._notify(_batch_changes(name, added, max_participants, version))
+        return results
+
+    def remove_participant(self, name, email):
+        conn = self._connection()
+        with self._write(conn):
+            row = conn.execute(_SQL_SELECT_ACTIVITY, (name,)).fetchone()
+            if row is None:
+                raise ActivityNotFound(name)
+            if conn.execute(_SQL_DELETE_PARTICIPANT, (name, email)).rowcount == 0:
+                raise NotSignedUp(email)
+            conn.execute(_SQL_ADJUST_COUNT, (-1, name))
+            version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+            self._notify((Change(name, email, "removed", row[3] - 1, row[2], version),))
+        return version
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises"""
+
+    begin = "BEGIN IMMEDIATE"
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute(self.begin)
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class _ReadTransaction(_ImmediateTransaction):
+    """Deferred transaction used to read a consistent snapshot"""
+
+    begin = "BEGIN"
@@ -0,0 +1,122 @@
+import pytest
+
+import app
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 40,
+        "participants": [f"player{i}@mergington.edu" for i in range(23)]
+    },
+    "Math Club": {
+        "description": "Solve challenging problems",
+        "schedule": "Tuesdays, 3:30 PM - 4:30 PM",
+        "max_participants": 10,
+        "participants": []
+    }
+}
+
+
+@pytest.fixture
+def seed():
+    return SEED
+
+
+def participants_page(client, cursor=None, limit=5, activity="Chess Club"):
+    params = {"limit": limit}
+    if cursor is not None:
+        params["cursor"] = cursor
+    return client.get(f"/activities/{activity}/participants", params=params)
+
+
+@pytest.mark.parametrize("path", ["/activities/Missing Club", "/activities/Missing Club/participants"])
+def test_unknown_activity(client, path):
+    response = client.get(path)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Activity not found"
+
+
+def test_get_activity(client):
+    response = client.get("/activities/Chess Club")
+    assert response.status_code == 200
+    assert response.json() == SEED["Chess Club"]
+    assert response.json() == client.get("/activities").json()["Chess Club"]
+
+
+# The single-activity route takes the same projections as the catalog
+def test_activity_projection(client):
+    response = client.get("/activities/Chess Club", params={"fields": "spots_left,participant_count"})
+    assert response.json() == {"participant_count": 23, "spots_left": 17}
+
+    response = client.get("/activities/Chess Club", params={"include_participants": "false"})
+    assert response.json() == {"description": SEED["Chess Club"]["description"],
+                               "schedule": SEED["Chess Club"]["schedule"],
+                               "max_participants": 40, "participant_count": 23}
+
+    response = client.get("/activities/Chess Club", params={"fields": "participants,bogus"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: bogus"
+
+
+def test_activity_conditional_get(client):
+    response = client.get("/activities/Chess Club")
+    etag = response.headers["etag"]
+    cached = client.get("/activities/Chess Club", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # Other activities and projections have ETags of their own
+    assert client.get("/activities/Math Club", headers={"If-None-Match": etag}).status_code == 200
+    projected = client.get("/activities/Chess Club", params={"fields": "spots_left"},
+                           headers={"If-None-Match": etag})
+    assert projected.status_code == 200
+    assert projected.headers["etag"] != etag
+
+    client.post("/activities/Chess Club/signup", params={"email": "new@mergington.edu"})
+    response = client.get("/activities/Chess Club", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["participants"][-1] == "new@mergington.edu"
+
+
+# Following next_cursor visits every participant once, in signup order
+def test_participant_pages(client):
+    pages = [participants_page(client).json()]
+    while pages[-1]["next_cursor"] is not None:
+        pages.append(participants_page(client, pages[-1]["next_cursor"]).json())
+
+    assert [len(page["participants"]) for page in pages] == [5, 5, 5, 5, 3]
+    assert all(page["total"] == 23 and page["activity"] == "Chess Club" for page in pages)
+    assert [email for page in pages for email in page["participants"]] == SEED["Chess Club"]["participants"]
+
+
+def test_empty_participant_list(client):
+    assert participants_page(client, activity="Math Club").json() == {
+        "activity": "Math Club", "participants": [], "total": 0, "next_cursor": None}
+
+
+def test_participant_page_size(client):
+    assert participants_page(client, limit=0).status_code == 422
+    assert participants_page(client, limit=app.MAX_PAGE_SIZE + 1).status_code == 422
+    page = participants_page(client, limit=app.MAX_PAGE_SIZE).json()
+    assert len(page["participants"]) == 23
+    assert page["next_cursor"] is None
+    assert len(client.get("/activities/Chess Club/participants").json()["participants"]) == 23
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "eDo1"])
+def test_invalid_participant_cursor(client, cursor):
+    response = participants_page(client, cursor)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+# Removals can leave a cursor pointing past the end of the list
+def test_stale_participant_cursor(client):
+    cursor = participants_page(client, limit=20).json()["next_cursor"]
+    for i in range(20, 23):
+        client.delete("/activities/Chess Club/signup", params={"email": f"player{i}@mergington.edu"})
+    response = participants_page(client, cursor)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import bench_history
+from bench_history import append_run, compare_metric, load_runs, main, mann_whitney_u, metric
+
+
+def record(monkeypatch, path, commit, throughput, latency, fingerprint=None):
+    """Append a synthetic load test run at the given commit"""
+    monkeypatch.setattr(bench_history, "git_commit", lambda: (commit, False))
+    if fingerprint:
+        monkeypatch.setattr(bench_history, "machine_info", lambda: {"fingerprint": fingerprint})
+    append_run("load_test", "open-loop 100 rps constant", {
+        "requests_per_second": metric(sum(throughput) / len(throughput), "higher", throughput),
+        "p99_response_time": metric(max(latency), "lower", latency),
+    }, path)
+
+
+def noisy(rng, mean, spread=0.01, count=20):
+    return [rng.gauss(mean, mean * spread) for _ in range(count)]
+
+
+def compare(path, *options):
+    return main(["--history", str(path), "compare", "--suite", "load_test", *options])
+
+
+# Matches the normal approximation of scipy.stats.mannwhitneyu
+def test_mann_whitney_u():
+    u, p = mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 0
+    assert p == pytest.approx(0.0122, abs=1e-4)
+    _, p = mann_whitney_u([1, 2, 3], [1, 2, 3])
+    assert p == 1.0
+
+
+# Runs are appended, not overwritten, and read back in order
+def test_history_is_append_only(tmp_path, monkeypatch):
+    path = tmp_path / "history.jsonl"
+    record(monkeypatch, path, "a" * 40, [100.0], [0.01])
+    record(monkeypatch, path, "b" * 40, [101.0], [0.01])
+    runs = load_runs(path)
+    assert [run["commit"][0] for run in runs] == ["a", "b"]
+    assert runs[1]["metrics"]["requests_per_second"]["samples"] == [101.0]
+
+
+# A significant drop in throughput fails the comparison
+def test_detects_regression(tmp_path, monkeypatch, capsys):
+    rng = random.Random(1)
+    path = tmp_path / "history.jsonl"
+    record(monkeypatch, path, "a" * 40, noisy(rng, 1000), noisy(rng, 0.020))
+    record(monkeypatch, path, "b" * 40, noisy(rng, 900), noisy(rng, 0.020))
+    assert compare(path) == 1
+    output = capsys.readouterr().out
+    assert "requests_per_second" in output and "REGRESSED" in output
+
+
+# Noise below the threshold and improvements pass
+def test_passes_without_regression(tmp_path, monkeypatch):
+    rng = random.Random(2)
+    path = tmp_path / "history.jsonl"
+    record(monkeypatch, path, "a" * 40, noisy(rng, 1000), noisy(rng, 0.020))
+    record(monkeypatch, path, "b" * 40, noisy(rng, 1005), noisy(rng, 0.015))
+    assert compare(path) == 0
+
+
+# A low p-value alone is not enough: on bimodal samples the median jumps
+# between modes, and the bootstrap interval of the change still spans 0
+def test_regression_needs_interval_excluding_zero():
+    rng = random.Random(0)
+    baseline = [rng.choice([rng.gauss(100, 3), rng.gauss(150, 3)]) for _ in range(12)]
+    candidate = [value * 0.9 for value in baseline]
+    row = compare_metric("requests_per_second", "higher", baseline, candidate)
+    assert row["p_value"] < 0.05
+    assert row["interval"][0] < 0 < row["interval"][1]
+    assert row["verdict"] == "inconclusive"
+
+    row = compare_metric("requests_per_second", "higher", noisy(rng, 1000), noisy(rng, 900))
+    assert row["interval"][1] < 0
+    assert row["verdict"] == "REGRESSED"
+
+
+# An explicit baseline commit is used instead of the previous one
+def test_compares_against_chosen_baseline(tmp_path, monkeypatch):
+    rng = random.Random(3)
+    path = tmp_path / "history.jsonl"
+    record(monkeypatch, path, "a" * 40, noisy(rng, 1000), noisy(rng, 0.020))
+    record(monkeypatch, path, "b" * 40, noisy(rng, 800), noisy(rng, 0.020))
+    record(monkeypatch, path, "c" * 40, noisy(rng, 800), noisy(rng, 0.020))
+    assert compare(path) == 0
+    assert compare(path, "--baseline", "aaaa") == 1
+
+
+# Runs on other machines are never used as a baseline
+def test_ignores_other_machines(tmp_path, monkeypatch, capsys):
+    rng = random.Random(4)
+    path = tmp_path / "history.jsonl"
+    record(monkeypatch, path, "a" * 40, noisy(rng, 2000), noisy(rng, 0.010), fingerprint="other")
+    record(monkeypatch, path, "b" * 40, noisy(rng, 1000), noisy(rng, 0.020), fingerprint="this")
+    assert compare(path) == 0
+    assert "No baseline" in capsys.readouterr().out
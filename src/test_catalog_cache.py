@@ -0,0 +1,80 @@
+import pytest
+
+import app
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 12,
+        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+    },
+    "Drama Club": {
+        "description": "Theater performance and acting workshops",
+        "schedule": "Fridays, 3:00 PM - 5:30 PM",
+        "max_participants": 25,
+        "participants": []
+    }
+}
+
+
+@pytest.fixture
+def seed():
+    return SEED
+
+
+# The catalog is encoded once per version and the same bytes are served until a mutation
+def test_encoded_catalog_is_reused(app_store):
+    version, body = app.get_catalog_snapshot()
+    assert app.get_catalog_snapshot()[1] is body
+    assert version == app_store.version
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda store: store.add_participant("Drama Club", "new@mergington.edu"),
+    lambda store: store.remove_participant("Chess Club", "michael@mergington.edu"),
+])
+def test_mutations_reencode_the_catalog(app_store, client, mutate):
+    version, body = app.get_catalog_snapshot()
+    mutate(app_store)
+    new_version, new_body = app.get_catalog_snapshot()
+    assert new_version > version
+    assert new_body != body
+    assert client.get("/activities").json() == app_store.get_catalog()
+
+
+# A matching If-None-Match gets an empty 304 carrying the same ETag
+def test_matching_etag_returns_304(client):
+    response = client.get("/activities")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get("/activities", headers={"If-None-Match": header})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    assert client.get("/activities", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("path, method", [
+    ("/activities/Drama Club/signup", "post"),
+    ("/activities/Chess Club/signup", "delete"),
+])
+def test_etag_changes_after_mutation(client, path, method):
+    etag = client.get("/activities").headers["etag"]
+    email = "michael@mergington.edu" if method == "delete" else "new@mergington.edu"
+    assert getattr(client, method)(path, params={"email": email}).status_code == 200
+
+    response = client.get("/activities", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert client.get("/activities", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+# A rejected mutation leaves the version, and therefore the ETag, alone
+def test_rejected_signup_keeps_etag(client):
+    etag = client.get("/activities").headers["etag"]
+    assert client.post("/activities/Chess Club/signup", params={"email": "michael@mergington.edu"}).status_code == 400
+    assert client.get("/activities", headers={"If-None-Match": etag}).status_code == 304
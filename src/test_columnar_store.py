@@ -0,0 +1,79 @@
+import copy
+
+import pytest
+
+import app
+import columnar_store
+from columnar_store import ColumnarStore
+from seed_data import generate_catalog
+from store import (ActivityFull, ActivityNotFound, ActivityStore, AlreadySignedUp, InMemoryStore, NotSignedUp,
+                   SQLiteStore)
+
+
+@pytest.fixture
+def catalog():
+    return generate_catalog(50, 600, skew=1.2, seed=3)
+
+
+def test_round_trips_the_catalog(catalog):
+    store = ColumnarStore(copy.deepcopy(catalog))
+    assert store.get_catalog() == catalog
+    name = next(iter(catalog))
+    assert store.get_activity(name) == catalog[name]
+    assert store.get_participants(name, 1, 3) == (catalog[name]["participants"][1:4],
+                                                  len(catalog[name]["participants"]))
+    with pytest.raises(ActivityNotFound):
+        store.get_activity("Missing Club")
+
+
+# Texts and emails shared by several activities are stored once
+def test_interns_texts_and_emails(catalog):
+    store = ColumnarStore(catalog)
+    emails = {email for details in catalog.values() for email in details["participants"]}
+    assert len(store._emails) == len(emails)
+    assert len(store._texts) == len({details[field] for details in catalog.values()
+                                     for field in ("description", "schedule")})
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_summary_matches_generic_summary(catalog, monkeypatch, use_numpy):
+    if use_numpy and columnar_store.numpy is None:
+        pytest.skip("numpy is not installed")
+    if not use_numpy:
+        monkeypatch.setattr(columnar_store, "numpy", None)
+    store = ColumnarStore(copy.deepcopy(catalog))
+    store.add_participant(next(iter(catalog)), "new@mergington.edu")
+    assert store.get_catalog_summary() == ActivityStore.get_catalog_summary(store)
+
+
+def test_mutations_behave_like_the_dict_store(catalog):
+    columnar, memory = ColumnarStore(copy.deepcopy(catalog)), InMemoryStore(copy.deepcopy(catalog))
+    name = next(iter(catalog))
+    existing = catalog[name]["participants"][0]
+    for store in (columnar, memory):
+        with pytest.raises(AlreadySignedUp):
+            store.add_participant(name, existing)
+        with pytest.raises(NotSignedUp):
+            store.remove_participant(name, "nobody@mergington.edu")
+        store.remove_participant(name, existing)
+        store.add_participant(name, existing)
+        spots = catalog[name]["max_participants"] - len(catalog[name]["participants"])
+        results = store.add_participants(name, [f"batch{i}@mergington.edu" for i in range(spots + 1)])
+        assert results[:spots] == [None] * spots and isinstance(results[-1], ActivityFull)
+        with pytest.raises(ActivityFull):
+            store.add_participant(name, "late@mergington.edu")
+    assert columnar.get_catalog() == memory.get_catalog()
+    assert columnar.version == memory.version
+
+
+# Count-only views of the catalog are served from the count columns
+def test_count_only_catalog_is_unchanged(catalog, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "_catalog_cache", {})
+    bodies = []
+    for store in (InMemoryStore(copy.deepcopy(catalog)), ColumnarStore(copy.deepcopy(catalog)),
+                  SQLiteStore(tmp_path / "activities.db", seed=catalog)):
+        monkeypatch.setattr(app, "store", store)
+        app._catalog_cache.clear()
+        bodies.append([app.get_encoded_catalog(app.parse_projection(fields, include))[2]
+                       for fields, include in ((None, True), (None, False), ("spots_left", True))])
+    assert bodies[0] == bodies[1] == bodies[2]
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from seed_data import generate_catalog
+from store import InMemoryStore
+
+
+def stdlib_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """Run a test with orjson, when installed, and with the stdlib fallback"""
+    if request.param == "orjson" and app.orjson is None:
+        pytest.skip("orjson is not installed")
+    if request.param == "stdlib":
+        monkeypatch.setattr(app, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def catalog_store(monkeypatch):
+    catalog = generate_catalog(200, 2000, seed=5)
+    catalog["Café Club \U0001f600"] = {
+        "description": "Non-ASCII text is sent as UTF-8, not escaped",
+        "schedule": "Never",
+        "max_participants": 3,
+        "participants": ["zoë@mergington.edu"]
+    }
+    store = InMemoryStore(catalog)
+    monkeypatch.setattr(app, "store", store)
+    monkeypatch.setattr(app, "_catalog_cache", {})
+    return catalog
+
+
+# The catalog encodes to the same bytes as FastAPI's stdlib JSONResponse
+@pytest.mark.parametrize("fields", [None, "spots_left,participant_count", "participants"])
+def test_catalog_encoding_matches_stdlib(encoder, catalog_store, fields):
+    projection = app.parse_projection(fields, True)
+    _, _, body = app.get_encoded_catalog(projection)
+    expected = {name: app.project_activity(details, projection) for name, details in catalog_store.items()}
+    assert body == stdlib_json(expected)
+
+
+# Routes with a response model send the same bytes FastAPI's default path would
+def test_response_models_match_default_encoding(catalog_store):
+    client = TestClient(app.app)
+    name = next(iter(catalog_store))
+    response = client.post("/activities/signup:batch", json={"signups": [
+        {"activity": name, "email": "zoë@mergington.edu"},
+        {"activity": name, "email": "zoë@mergington.edu"},
+        {"activity": "Missing Club", "email": "a@mergington.edu"}
+    ]})
+    assert response.status_code == 200
+    assert response.content == stdlib_json({
+        "signed_up": 1,
+        "results": [{"activity": name, "email": "zoë@mergington.edu", "status": "ok"},
+                    {"activity": name, "email": "zoë@mergington.edu", "status": "duplicate"},
+                    {"activity": "Missing Club", "email": "a@mergington.edu", "status": "unknown_activity"}]
+    })
+
+    response = client.get(f"/activities/{name}/participants", params={"limit": 1})
+    participants = catalog_store[name]["participants"]
+    assert response.content == stdlib_json({
+        "activity": name, "participants": participants[:1], "total": len(participants),
+        "next_cursor": app.encode_cursor(1)
+    })
+
+    response = client.post(f"/activities/{name}/signup", params={"email": "new@mergington.edu"})
+    assert response.content == stdlib_json({"message": f"Signed up new@mergington.edu for {name}"})
+
+
+def test_response_models_are_documented():
+    schemas = app.app.openapi()["components"]["schemas"]
+    assert {"ParticipantPage", "SignupResult", "BatchSignupResult", "BatchItemResult"} <= set(schemas)
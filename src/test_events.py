@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from events import EventBroadcaster
+from store import Change
+
+EVENTS_CLUB = {
+    "events": {
+        "description": "Plans the school's events",
+        "schedule": "Mondays, 3:30 PM - 4:30 PM",
+        "max_participants": 10,
+        "participants": ["michael@mergington.edu"]
+    }
+}
+
+
+@pytest.fixture
+def seed():
+    return EVENTS_CLUB
+
+
+def change(i):
+    return Change("Chess Club", f"s{i}@mergington.edu", "added", i, 12, i)
+
+
+def parse(message):
+    """Split one encoded SSE message into (id, event, data)"""
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+async def publish(broadcaster, count, start=1):
+    for i in range(start, start + count):
+        broadcaster.publish(change(i))
+    # publish() hands events to the loop; let them be dispatched
+    await asyncio.sleep(0)
+
+
+async def read(stream, count):
+    return [parse(await anext(stream)) for _ in range(count)]
+
+
+def run(coroutine_function, **options):
+    async def main():
+        broadcaster = EventBroadcaster("epoch", **options)
+        broadcaster.bind(asyncio.get_running_loop())
+        return await coroutine_function(broadcaster)
+    return asyncio.run(main())
+
+
+# A client resuming with Last-Event-ID gets exactly the events it missed
+def test_resume_from_last_event_id():
+    async def scenario(broadcaster):
+        await publish(broadcaster, 5)
+        stream = broadcaster.stream("epoch-2")
+        assert await anext(stream) == "retry: 3000\n\n"
+        events = await read(stream, 3)
+        assert [event_id for event_id, _, _ in events] == ["epoch-3", "epoch-4", "epoch-5"]
+        assert [data["email"] for _, _, data in events] == ["s3@mergington.edu", "s4@mergington.edu",
+                                                            "s5@mergington.edu"]
+        assert events[0][2]["spots_left"] == 9
+
+        # Live events follow the backlog without a gap
+        await publish(broadcaster, 1, start=6)
+        assert (await read(stream, 1))[0][0] == "epoch-6"
+        await stream.aclose()
+
+    run(scenario)
+
+
+def test_resume_when_up_to_date():
+    async def scenario(broadcaster):
+        await publish(broadcaster, 3)
+        stream = broadcaster.stream("epoch-3")
+        await anext(stream)
+        await publish(broadcaster, 1, start=4)
+        assert (await read(stream, 1))[0][0] == "epoch-4"
+        await stream.aclose()
+
+    run(scenario)
+
+
+# Ids that are no longer in the history, or from another epoch, get a reset
+def test_reset_when_backlog_is_trimmed():
+    async def scenario(broadcaster):
+        await publish(broadcaster, 6)
+        for last_event_id in ("epoch-1", "other-5", "epoch-99", "epoch-x"):
+            stream = broadcaster.stream(last_event_id)
+            await anext(stream)
+            assert await read(stream, 1) == [("epoch-6", "reset", {})]
+            await stream.aclose()
+
+        # The oldest event still in the history can be resumed from
+        stream = broadcaster.stream("epoch-3")
+        await anext(stream)
+        assert [event_id for event_id, _, _ in await read(stream, 3)] == ["epoch-4", "epoch-5", "epoch-6"]
+        await stream.aclose()
+
+    run(scenario, history_size=3)
+
+
+# A subscriber whose queue overflows loses its backlog and is told to resync
+def test_slow_subscriber_gets_reset():
+    async def scenario(broadcaster):
+        slow = broadcaster.stream()
+        assert await anext(slow) == "retry: 3000\n\n"
+        await publish(broadcaster, 5)
+
+        # The reset carries the id of the event that overflowed the queue last
+        assert await read(slow, 1) == [("epoch-5", "reset", {})]
+        await publish(broadcaster, 1, start=6)
+        assert (await read(slow, 1))[0][:2] == ("epoch-6", "change")
+        await slow.aclose()
+
+        # Resuming from the reset's id replays only what came after it
+        stream = broadcaster.stream("epoch-5")
+        await anext(stream)
+        assert [event_id for event_id, _, _ in await read(stream, 1)] == ["epoch-6"]
+        await stream.aclose()
+        assert not broadcaster._subscribers
+
+    run(scenario, queue_size=2)
+
+
+# The stream lives outside /activities, so it shadows no activity's route
+def test_activity_named_events_is_reachable(client):
+    import app
+    assert "/events" in {route.path for route in app.app.routes}
+    response = client.get("/activities/events")
+    assert response.status_code == 200
+    assert response.json() == EVENTS_CLUB["events"]
+    assert client.get("/activities/events/participants").json()["participants"] == ["michael@mergington.edu"]
@@ -0,0 +1,83 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from journal import Journal
+from store import InMemoryStore
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 500,
+        "participants": ["michael@mergington.edu"]
+    },
+    "Drama Club": {
+        "description": "Theater performance and acting workshops",
+        "schedule": "Fridays, 3:00 PM - 5:30 PM",
+        "max_participants": 500,
+        "participants": []
+    }
+}
+
+
+def open_store(directory, **options):
+    return InMemoryStore(copy.deepcopy(SEED), journal=Journal(directory, **options))
+
+
+# Mutations survive a restart by replaying the log
+@pytest.mark.parametrize("fsync", ["always", "interval", "never"])
+def test_replays_log_after_restart(tmp_path, fsync):
+    store = open_store(tmp_path, fsync=fsync)
+    store.add_participant("Chess Club", "a@mergington.edu")
+    store.add_participant("Drama Club", "b@mergington.edu")
+    store.remove_participant("Chess Club", "michael@mergington.edu")
+    catalog, version = copy.deepcopy(store.get_catalog()), store.version
+    store.close()
+
+    recovered = open_store(tmp_path, fsync=fsync)
+    assert recovered.get_catalog() == catalog
+    assert recovered.version == version
+    recovered.close()
+
+
+# Snapshots compact the log and recovery combines snapshot plus tail
+def test_recovers_from_snapshot_and_tail(tmp_path):
+    store = open_store(tmp_path, fsync="always", snapshot_every=50)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(
+            lambda i: store.add_participant("Chess Club" if i % 2 else "Drama Club",
+                                            f"student{i}@mergington.edu"),
+            range(240)
+        ))
+    store.snapshot()
+    store.add_participant("Drama Club", "after_snapshot@mergington.edu")
+    catalog = copy.deepcopy(store.get_catalog())
+    store.close()
+
+    assert (tmp_path / "snapshot.json").exists()
+    assert len(list(tmp_path.glob("journal-*.log"))) == 1
+
+    recovered = open_store(tmp_path)
+    assert recovered.get_catalog() == catalog
+    recovered.close()
+
+
+# A torn final record from a crash is ignored instead of breaking startup
+def test_ignores_torn_final_record(tmp_path):
+    store = open_store(tmp_path, fsync="never")
+    store.add_participant("Chess Club", "a@mergington.edu")
+    store.close()
+    segment = next(tmp_path.glob("journal-*.log"))
+    with open(segment, "ab") as f:
+        f.write(b'{"op":"add","activity":"Chess')
+
+    recovered = open_store(tmp_path)
+    assert recovered.get_catalog()["Chess Club"]["participants"] == [
+        "michael@mergington.edu", "a@mergington.edu"
+    ]
+    recovered.add_participant("Chess Club", "b@mergington.edu")
+    recovered.close()
+
+    assert open_store(tmp_path).get_catalog()["Chess Club"]["participants"][-1] == "b@mergington.edu"
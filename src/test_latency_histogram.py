@@ -0,0 +1,49 @@
+import json
+import math
+import random
+
+import pytest
+
+from latency_histogram import LatencyHistogram
+
+
+def exact_percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# Percentiles stay within the configured relative precision
+@pytest.mark.parametrize("percent", [50, 90, 99, 99.9])
+def test_percentiles_within_precision(percent):
+    rng = random.Random(42)
+    values = [rng.lognormvariate(-5, 1) for _ in range(20000)]
+    histogram = LatencyHistogram(significant_figures=2)
+    for value in values:
+        histogram.record(value)
+
+    expected = exact_percentile(values, percent)
+    assert histogram.percentile(percent) == pytest.approx(expected, rel=0.01, abs=1e-6)
+    assert histogram.total == len(values)
+    assert histogram.max_seconds == pytest.approx(max(values), abs=1e-6)
+
+
+# Histograms merged from separate processes equal one histogram of all samples
+def test_merge_after_json_round_trip():
+    rng = random.Random(7)
+    values = [rng.expovariate(100) for _ in range(5000)]
+    combined = LatencyHistogram()
+    parts = [LatencyHistogram(), LatencyHistogram()]
+    for i, value in enumerate(values):
+        combined.record(value)
+        parts[i % 2].record(value)
+
+    merged = LatencyHistogram()
+    for part in parts:
+        merged.merge(LatencyHistogram.from_dict(json.loads(json.dumps(part.to_dict()))))
+    assert merged.summary() == combined.summary()
+
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        LatencyHistogram(2).merge(LatencyHistogram(3))
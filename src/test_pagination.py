@@ -0,0 +1,138 @@
+import base64
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from seed_data import generate_catalog
+from store import InMemoryStore
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = generate_catalog(25, 200, seed=11)
+    monkeypatch.setattr(app, "store", InMemoryStore(catalog))
+    monkeypatch.setattr(app, "_catalog_cache", {})
+    return catalog
+
+
+@pytest.fixture
+def client(catalog):
+    return TestClient(app.app)
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def read_all_pages(client, limit, **params):
+    """Follow X-Next-Cursor from the first page to the last, returning every page"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get("/activities", params={**params, "limit": limit,
+                                                     **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+
+
+# Pages cover the whole catalog once, in catalog order
+def test_pages_cover_the_catalog(client, catalog):
+    pages = read_all_pages(client, 7)
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    combined = {}
+    for page in pages:
+        combined.update(page)
+    assert list(combined) == list(catalog)
+    assert combined == client.get("/activities").json()
+
+
+def test_page_size_limits(client):
+    assert client.get("/activities", params={"limit": 0}).status_code == 422
+    assert client.get("/activities", params={"limit": app.MAX_PAGE_SIZE + 1}).status_code == 422
+    response = client.get("/activities", params={"limit": 100})
+    assert len(response.json()) == 25
+    assert "x-next-cursor" not in response.headers
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", raw_cursor("x:5"), raw_cursor("o:-1"), raw_cursor("o:five")])
+def test_invalid_cursor(client, cursor):
+    response = client.get("/activities", params={"cursor": cursor, "limit": 5})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+# A cursor outlives the version it was issued at: offsets stay valid after
+# signups, and a cursor past the end yields an empty last page
+def test_stale_cursors(client, catalog):
+    first = client.get("/activities", params={"limit": 10})
+    cursor = first.headers["x-next-cursor"]
+    name = list(catalog)[10]
+    client.post(f"/activities/{name}/signup", params={"email": "late@mergington.edu"})
+
+    second = client.get("/activities", params={"cursor": cursor, "limit": 10}).json()
+    assert list(second)[0] == name
+    assert "late@mergington.edu" in second[name]["participants"]
+
+    response = client.get("/activities", params={"cursor": app.encode_cursor(1000), "limit": 10})
+    assert response.status_code == 200
+    assert response.json() == {}
+    assert "x-next-cursor" not in response.headers
+
+
+def test_field_projection(client, catalog):
+    response = client.get("/activities", params={"fields": "spots_left,name,participant_count"})
+    assert response.status_code == 200
+    for name, details in response.json().items():
+        participants = catalog[name]["participants"]
+        assert details == {"participant_count": len(participants),
+                           "spots_left": catalog[name]["max_participants"] - len(participants)}
+
+    counts = client.get("/activities", params={"include_participants": "false"}).json()
+    assert all(list(details) == ["description", "schedule", "max_participants", "participant_count"]
+               for details in counts.values())
+
+    response = client.get("/activities", params={"fields": "schedule,secret"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: secret"
+
+
+# Projected pages are pages of the projected catalog
+def test_projected_pages(client):
+    pages = read_all_pages(client, 10, fields="spots_left")
+    combined = {}
+    for page in pages:
+        combined.update(page)
+    assert combined == client.get("/activities", params={"fields": "spots_left"}).json()
+
+
+REPRESENTATIONS = [
+    {},
+    {"fields": "spots_left"},
+    {"fields": "description,participants"},
+    {"include_participants": "false"},
+    {"limit": 5},
+    {"limit": 5, "fields": "participant_count"},
+]
+
+
+# Every representation revalidates on its own ETag, and only on its own
+@pytest.mark.parametrize("params", REPRESENTATIONS)
+def test_conditional_get_per_projection(client, catalog, params):
+    response = client.get("/activities", params=params)
+    etag = response.headers["etag"]
+
+    cached = client.get("/activities", params=params, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    others = [other for other in REPRESENTATIONS if other != params]
+    assert all(client.get("/activities", params=other, headers={"If-None-Match": etag}).status_code == 200
+               for other in others)
+
+    client.post(f"/activities/{next(iter(catalog))}/signup", params={"email": "late@mergington.edu"})
+    assert client.get("/activities", params=params, headers={"If-None-Match": etag}).status_code == 200
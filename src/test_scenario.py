@@ -0,0 +1,68 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from scenario import Scenario, load_scenario, yaml
+
+SCENARIO_DIR = Path(__file__).parent / "scenarios"
+
+ACTIVITIES = [f"Activity {i}" for i in range(10)]
+
+
+# The example scenarios shipped with the load test are valid
+@pytest.mark.parametrize("path", sorted(SCENARIO_DIR.iterdir()), ids=lambda path: path.name)
+def test_example_scenarios_load(path):
+    if path.suffix in (".yaml", ".yml") and yaml is None:
+        pytest.skip("PyYAML is not installed")
+    scenario = load_scenario(path)
+    assert scenario.pick_action() in scenario.actions
+
+
+# Zipf popularity concentrates traffic on the top-ranked activities
+def test_zipf_popularity_is_skewed():
+    scenario = Scenario({
+        "seed": 3,
+        "requests": [{"action": "view_activity"}],
+        "activity_popularity": {"distribution": "zipf", "s": 1.5}
+    })
+    counts = Counter(scenario.pick_activity(ACTIVITIES) for _ in range(20000))
+    most_popular = counts.most_common()
+    assert set(counts) == set(ACTIVITIES)
+    assert most_popular[0][1] > 2 * most_popular[1][1]
+    assert most_popular[0][1] > 10 * most_popular[-1][1]
+
+
+# Duplicate signups repeat an earlier (activity, email) pair at the configured ratio
+def test_duplicate_signup_ratio():
+    scenario = Scenario({
+        "seed": 4,
+        "requests": [{"action": "signup"}],
+        "duplicate_signup_ratio": 0.25
+    })
+    signups = [scenario.pick_signup(ACTIVITIES, user_id, 0, 1) for user_id in range(4000)]
+    duplicates = len(signups) - len(set(signups))
+    assert 0.2 < duplicates / len(signups) < 0.3
+
+
+# Drops pick earlier signups, each at most once
+def test_unregister_drops_earlier_signups():
+    scenario = Scenario({"seed": 5, "requests": [{"action": "signup"}, {"action": "unregister"}]})
+    assert scenario.pick_unregister() is None
+    signups = {scenario.pick_signup(ACTIVITIES, user_id, 0, 1) for user_id in range(100)}
+    drops = [scenario.pick_unregister() for _ in range(100)]
+    assert sorted(drops) == sorted(signups)
+    assert scenario.pick_unregister() is None
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    {"requests": [{"action": "delete_everything"}]},
+    {"requests": [{"action": "signup", "weight": 0}]},
+    {"requests": [{"action": "signup"}], "requests_per_session": [5, 2]},
+    {"requests": [{"action": "signup"}], "think_time": {"distribution": "pareto"}},
+    {"requests": [{"action": "signup"}], "duplicate_signup_ratio": 2},
+])
+def test_rejects_invalid_scenarios(data):
+    with pytest.raises(ValueError):
+        Scenario(data)
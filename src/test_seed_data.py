@@ -0,0 +1,68 @@
+import pytest
+
+import app
+from seed_data import apportion, generate_catalog
+from store import AlreadySignedUp, InMemoryStore, SQLiteStore
+
+
+# Sizes are exact and every activity is a valid catalog entry
+def test_generates_requested_size():
+    catalog = generate_catalog(500, 12345, skew=1.2)
+    assert len(catalog) == 500
+    assert sum(len(details["participants"]) for details in catalog.values()) == 12345
+    for details in catalog.values():
+        assert set(details) == {"description", "schedule", "max_participants", "participants"}
+        assert len(set(details["participants"])) == len(details["participants"])
+        assert len(details["participants"]) <= details["max_participants"]
+
+
+# Skew concentrates participants on a few activities; skew 0 spreads them evenly
+def test_skew():
+    skewed = sorted((len(d["participants"]) for d in generate_catalog(1000, 100000, skew=1.2).values()),
+                    reverse=True)
+    assert sum(skewed[:10]) > 0.5 * 100000
+    uniform = {len(d["participants"]) for d in generate_catalog(1000, 100000, skew=0).values()}
+    assert uniform == {100}
+
+
+# The same seed gives the same catalog, so worker processes agree on the data
+def test_deterministic():
+    assert generate_catalog(50, 1000, seed=7) == generate_catalog(50, 1000, seed=7)
+    assert generate_catalog(50, 1000, seed=7) != generate_catalog(50, 1000, seed=8)
+
+
+def test_headroom_zero_fills_activities():
+    catalog = generate_catalog(20, 400, skew=0.5, headroom=0)
+    assert all(len(d["participants"]) == d["max_participants"] for d in catalog.values() if d["participants"])
+
+
+def test_apportion_keeps_total():
+    assert apportion(10, [1, 1, 1]) == [4, 3, 3]
+    assert sum(apportion(999, [0.3, 0.2, 0.5, 0.01])) == 999
+
+
+# Both backends load a generated catalog and keep deduplicating signups
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_stores_load_generated_catalog(backend, tmp_path):
+    catalog = generate_catalog(200, 5000, skew=1.0)
+    if backend == "memory":
+        store = InMemoryStore(catalog)
+    else:
+        store = SQLiteStore(tmp_path / "activities.db", seed=catalog)
+    name, details = max(catalog.items(), key=lambda item: len(item[1]["participants"]))
+    assert store.get_activity(name)["participants"] == details["participants"]
+    with pytest.raises(AlreadySignedUp):
+        store.add_participant(name, details["participants"][0])
+    store.close()
+
+
+# ACTIVITY_SEED_* replaces the built-in catalog in place
+def test_app_seeds_generated_catalog(monkeypatch):
+    activities = {"Chess Club": {}}
+    monkeypatch.setattr(app, "activities", activities)
+    monkeypatch.setenv("ACTIVITY_SEED_ACTIVITIES", "30")
+    monkeypatch.setenv("ACTIVITY_SEED_PARTICIPANTS", "600")
+    app.seed_generated_catalog()
+    assert app.activities is activities
+    assert len(activities) == 30 and "Chess Club" not in activities
+    assert sum(len(d["participants"]) for d in activities.values()) == 600
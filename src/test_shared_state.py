@@ -0,0 +1,177 @@
+import copy
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import journal
+from journal import Journal
+from shared_state import RemoteStore, StateServer, VersionCounter
+from store import ActivityFull, AlreadySignedUp, InMemoryStore, NotSignedUp
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 25,
+        "participants": ["michael@mergington.edu"]
+    },
+    "Drama Club": {
+        "description": "Theater performance and acting workshops",
+        "schedule": "Fridays, 3:00 PM - 5:30 PM",
+        "max_participants": 500,
+        "participants": []
+    }
+}
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = StateServer(InMemoryStore(copy.deepcopy(SEED)), tmp_path / "state.sock")
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def workers(server):
+    """Two replicas, standing in for two uvicorn worker processes"""
+    replicas = [RemoteStore(server.socket_path) for _ in range(2)]
+    yield replicas
+    for replica in replicas:
+        replica.close()
+
+
+def test_version_counter_round_trip(tmp_path):
+    writer = VersionCounter(str(tmp_path / "version"), create=True)
+    reader = VersionCounter(str(tmp_path / "version"))
+    assert reader.read() == 0
+    writer.write(42)
+    assert reader.read() == 42
+
+
+# A signup through one worker is visible to the next read on another
+def test_reads_see_writes_from_other_workers(workers):
+    first, second = workers
+    for i in range(50):
+        version = first.add_participant("Drama Club", f"student{i}@mergington.edu")
+        assert f"student{i}@mergington.edu" in second.get_activity("Drama Club")["participants"]
+        assert second.version == version
+    assert first.get_catalog() == second.get_catalog()
+    assert first.epoch == second.epoch
+
+
+def test_errors_are_raised_in_the_worker(workers):
+    first, second = workers
+    with pytest.raises(AlreadySignedUp):
+        second.add_participant("Chess Club", "michael@mergington.edu")
+    with pytest.raises(NotSignedUp):
+        first.remove_participant("Chess Club", "nobody@mergington.edu")
+    results = first.add_participants("Chess Club", ["a@mergington.edu", "michael@mergington.edu"])
+    assert results[0] is None and isinstance(results[1], AlreadySignedUp)
+
+
+# Concurrent signups from both workers never overbook an activity
+def test_capacity_holds_across_workers(workers):
+    start = threading.Barrier(16)
+
+    def signup(i):
+        if i < 16:
+            start.wait()
+        try:
+            workers[i % 2].add_participant("Chess Club", f"stress{i // 2}@mergington.edu")
+            return "ok"
+        except (AlreadySignedUp, ActivityFull) as e:
+            return type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        outcomes = list(executor.map(signup, range(200)))
+
+    participants = workers[1].get_activity("Chess Club")["participants"]
+    assert len(participants) == 25
+    assert len(set(participants)) == 25
+    assert outcomes.count("ok") == 24
+    assert workers[0].get_catalog() == workers[1].get_catalog()
+
+
+# Every worker receives every change, so each can stream all of them over SSE
+def test_listeners_see_changes_from_all_workers(workers):
+    first, second = workers
+    seen = []
+    done = threading.Event()
+
+    def listener(change):
+        seen.append((change.email, change.action))
+        if len(seen) == 2:
+            done.set()
+
+    second.add_listener(listener)
+    first.add_participant("Drama Club", "a@mergington.edu")
+    first.remove_participant("Drama Club", "a@mergington.edu")
+    assert done.wait(5)
+    assert seen == [("a@mergington.edu", "added"), ("a@mergington.edu", "removed")]
+
+
+# Each replica keeps its own student index in step with the change stream
+def test_student_index_follows_other_workers(workers):
+    first, second = workers
+    first.add_participant("Drama Club", "michael@mergington.edu")
+    assert second.get_student_activities("michael@mergington.edu") == ["Chess Club", "Drama Club"]
+    first.remove_participant("Chess Club", "michael@mergington.edu")
+    assert second.get_student_activities("michael@mergington.edu") == ["Drama Club"]
+    assert second.get_activity("Chess Club")["participants"] == []
+    assert first.get_catalog() == second.get_catalog()
+
+
+# A worker started later begins from a snapshot that includes earlier changes
+def test_late_worker_gets_snapshot(server, workers):
+    workers[0].add_participant("Drama Club", "early@mergington.edu")
+    late = RemoteStore(server.socket_path)
+    try:
+        assert "early@mergington.edu" in late.get_activity("Drama Club")["participants"]
+        assert late.version == workers[0].version
+    finally:
+        late.close()
+
+
+# Workers' journaled writes wait for durability outside the server's write
+# lock, so concurrent requests share fsyncs instead of paying one each
+def test_durability_wait_shares_fsyncs(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = journal.os.fsync
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        time.sleep(0.005)
+        real_fsync(fd)
+
+    monkeypatch.setattr(journal.os, "fsync", slow_fsync)
+    store = InMemoryStore(copy.deepcopy(SEED), journal=Journal(tmp_path / "journal", fsync="always"))
+    server = StateServer(store, tmp_path / "state.sock")
+    server.start()
+    worker = RemoteStore(server.socket_path)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda i: worker.add_participant("Drama Club", f"s{i}@mergington.edu"), range(64)))
+        assert len(worker.get_activity("Drama Club")["participants"]) == 64
+        assert len(fsyncs) < 64
+    finally:
+        worker.close()
+        server.close()
+        store.close()
+
+
+# The socket is private to its owner, and anything else at its path is left alone
+def test_socket_is_private(server, tmp_path):
+    assert os.stat(server.socket_path).st_mode & 0o777 == 0o600
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me")
+    other = StateServer(InMemoryStore(copy.deepcopy(SEED)), path)
+    try:
+        with pytest.raises(FileExistsError):
+            other.start()
+        assert path.read_text() == "keep me"
+    finally:
+        other.counter.close()
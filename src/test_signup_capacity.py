@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import app
+
+
+def stress_catalog():
+    return {
+        "Capacity Stress Club": {
+            "description": "Only used by the capacity stress test",
+            "schedule": "Never",
+            "max_participants": 25,
+            "participants": []
+        },
+        "Other Club": {
+            "description": "Used to check activities do not block each other",
+            "schedule": "Never",
+            "max_participants": 5,
+            "participants": []
+        }
+    }
+
+
+@pytest.fixture
+def seed():
+    """Small-capacity activities, served by the app through the app_store fixture"""
+    return stress_catalog()
+
+
+# Hammer one activity from many threads and check it never overbooks
+def test_concurrent_signups_never_exceed_capacity(app_store):
+    num_requests = 400
+    start = threading.Barrier(32)
+
+    def signup(i):
+        # Every email is used twice to exercise the duplicate check too
+        email = f"stress{i // 2}@mergington.edu"
+        if i < 32:
+            start.wait()
+        try:
+            app.signup_for_activity("Capacity Stress Club", email)
+            return "ok"
+        except HTTPException as e:
+            return e.detail
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        outcomes = list(executor.map(signup, range(num_requests)))
+
+    participants = app_store.get_activity("Capacity Stress Club")["participants"]
+    assert len(participants) == 25
+    assert len(set(participants)) == len(participants)
+    assert outcomes.count("ok") == 25
+    assert "Activity is full" in outcomes
+
+
+# A full activity must not stop signups to other activities
+def test_full_activity_does_not_block_others(app_store):
+    for i in range(25):
+        app.signup_for_activity("Capacity Stress Club", f"filler{i}@mergington.edu")
+    with pytest.raises(HTTPException) as excinfo:
+        app.signup_for_activity("Capacity Stress Club", "late@mergington.edu")
+    assert excinfo.value.detail == "Activity is full"
+
+    result = app.signup_for_activity("Other Club", "other@mergington.edu")
+    assert "other@mergington.edu" in result["message"]
+
+
+# Batch signups report per-item status and share the same capacity limit
+def test_batch_signup_respects_capacity(app_store):
+    request = app.BatchSignupRequest(signups=[
+        {"activity": "Capacity Stress Club", "email": f"batch{i}@mergington.edu"} for i in range(30)
+    ] + [
+        {"activity": "Capacity Stress Club", "email": "batch0@mergington.edu"},
+        {"activity": "Missing Club", "email": "batch0@mergington.edu"}
+    ])
+    response = app.batch_signup(request)
+
+    statuses = [result["status"] for result in response["results"]]
+    assert statuses[:25] == ["ok"] * 25
+    assert statuses[25:30] == ["full"] * 5
+    assert statuses[30:] == ["duplicate", "unknown_activity"]
+    assert response["signed_up"] == 25
+    assert len(app_store.get_activity("Capacity Stress Club")["participants"]) == 25
+
+
+# Listeners see one activity's changes in version order, even under contention
+def test_listeners_see_changes_in_version_order(app_store):
+    versions = []
+    app_store.add_listener(lambda change: versions.append(change.version))
+    start = threading.Barrier(16)
+
+    def churn(i):
+        email = f"churn{i}@mergington.edu"
+        start.wait()
+        for _ in range(20):
+            app_store.add_participant("Capacity Stress Club", email)
+            app_store.remove_participant("Capacity Stress Club", email)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(churn, range(16)))
+
+    assert len(versions) == 16 * 20 * 2
+    assert versions == sorted(versions)
@@ -0,0 +1,76 @@
+import copy
+
+import pytest
+
+from journal import Journal
+from store import InMemoryStore
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 3,
+        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+    },
+    "Drama Club": {
+        "description": "Theater performance and acting workshops",
+        "schedule": "Fridays, 3:00 PM - 5:30 PM",
+        "max_participants": 500,
+        "participants": ["daniel@mergington.edu"]
+    },
+    "Math Club": {
+        "description": "Solve challenging problems",
+        "schedule": "Tuesdays, 3:30 PM - 4:30 PM",
+        "max_participants": 10,
+        "participants": []
+    }
+}
+
+
+@pytest.fixture
+def seed():
+    return SEED
+
+
+def scan(store, email):
+    """The answer the index must give, from a full scan of the catalog"""
+    return sorted(name for name, details in store.get_catalog().items() if email in details["participants"])
+
+
+def test_index_starts_from_the_seed(store):
+    assert store.get_student_activities("daniel@mergington.edu") == ["Chess Club", "Drama Club"]
+    assert store.get_student_activities("michael@mergington.edu") == ["Chess Club"]
+    assert store.get_student_activities("nobody@mergington.edu") == []
+
+
+# Signups, rejected signups and removals keep the index in step with the catalog
+def test_index_follows_mutations(store):
+    store.add_participant("Math Club", "michael@mergington.edu")
+    store.add_participants("Drama Club", ["michael@mergington.edu", "new@mergington.edu", "new@mergington.edu"])
+    store.add_participants("Chess Club", ["full1@mergington.edu", "full2@mergington.edu"])
+    store.remove_participant("Chess Club", "daniel@mergington.edu")
+    assert store.get_student_activities("michael@mergington.edu") == ["Chess Club", "Math Club", "Drama Club"]
+    for email in ("michael@mergington.edu", "daniel@mergington.edu", "new@mergington.edu",
+                  "full1@mergington.edu", "full2@mergington.edu"):
+        assert sorted(store.get_student_activities(email)) == scan(store, email)
+
+
+def test_index_is_rebuilt_from_the_journal(tmp_path):
+    store = InMemoryStore(copy.deepcopy(SEED), journal=Journal(tmp_path))
+    store.add_participant("Math Club", "daniel@mergington.edu")
+    store.remove_participant("Drama Club", "daniel@mergington.edu")
+    store.close()
+    recovered = InMemoryStore(copy.deepcopy(SEED), journal=Journal(tmp_path))
+    try:
+        assert recovered.get_student_activities("daniel@mergington.edu") == ["Chess Club", "Math Club"]
+    finally:
+        recovered.close()
+
+
+def test_student_activities_route(client):
+    client.post("/activities/Math Club/signup", params={"email": "daniel@mergington.edu"})
+    response = client.get("/students/daniel@mergington.edu/activities")
+    assert response.status_code == 200
+    assert response.json() == {"email": "daniel@mergington.edu",
+                               "activities": ["Chess Club", "Drama Club", "Math Club"]}
+    assert client.get("/students/nobody@mergington.edu/activities").json()["activities"] == []
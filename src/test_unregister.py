@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+from journal import Journal
+from store import InMemoryStore
+
+SEED = {
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 3,
+        "participants": ["michael@mergington.edu", "daniel@mergington.edu", "emma@mergington.edu"]
+    }
+}
+
+
+@pytest.fixture
+def seed():
+    return SEED
+
+
+def unregister(client, email, activity="Chess Club"):
+    return client.delete(f"/activities/{activity}/signup", params={"email": email})
+
+
+# Leaving frees the spot for the next signup and keeps everyone else in order
+def test_unregister_frees_capacity(client):
+    assert client.post("/activities/Chess Club/signup", params={"email": "late@mergington.edu"}).status_code == 400
+    response = unregister(client, "daniel@mergington.edu")
+    assert response.status_code == 200
+    assert response.json() == {"message": "Unregistered daniel@mergington.edu from Chess Club"}
+    assert client.post("/activities/Chess Club/signup", params={"email": "late@mergington.edu"}).status_code == 200
+    assert client.get("/activities").json()["Chess Club"]["participants"] == [
+        "michael@mergington.edu", "emma@mergington.edu", "late@mergington.edu"]
+
+
+def test_unregister_errors(client):
+    response = unregister(client, "nobody@mergington.edu")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Student is not signed up for this activity"
+    assert unregister(client, "michael@mergington.edu", activity="Missing Club").status_code == 404
+
+
+# The catalog version moves on, so cached bodies and ETags are replaced
+def test_unregister_invalidates_catalog(client):
+    etag = client.get("/activities").headers["etag"]
+    unregister(client, "emma@mergington.edu")
+    response = client.get("/activities", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "emma@mergington.edu" not in response.json()["Chess Club"]["participants"]
+    assert response.json()["Chess Club"]["participants"] == client.get("/activities/Chess Club").json()["participants"]
+
+
+# Removals do not touch the display list; it is rebuilt once, when next read
+def test_removal_rebuilds_list_lazily(tmp_path):
+    store = InMemoryStore(copy.deepcopy(SEED), journal=Journal(tmp_path))
+    listed = store.get_activity("Chess Club")["participants"]
+    store.remove_participant("Chess Club", "michael@mergington.edu")
+    store.remove_participant("Chess Club", "emma@mergington.edu")
+    assert len(listed) == 3
+    store.add_participant("Chess Club", "new@mergington.edu")
+    assert store.get_catalog()["Chess Club"]["participants"] == ["daniel@mergington.edu", "new@mergington.edu"]
+    store.close()
+
+    recovered = InMemoryStore(copy.deepcopy(SEED), journal=Journal(tmp_path))
+    try:
+        assert recovered.get_activity("Chess Club")["participants"] == ["daniel@mergington.edu",
+                                                                        "new@mergington.edu"]
+    finally:
+        recovered.close()